@@ -1,19 +1,21 @@
+import os
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 from config import Config  
 from extensions import db, migrate
 from blueprints import register_blueprints
 from services.schenduler_jobs import init_scheduler
-from models import config
-
-def load_token_from_db():
-    row = config.query.filter_by(name="ACCESS_TOKEN").first()
-    if row:
-        return row.value
-    return None
+from services.facebook_likes import configure_graph_client
+from services import assets, compression, metrics, page_cache, qr_cache, query_plans, user_import
+from services.token_provider import access_token_provider
+from services.leaderboard_events import broadcaster
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    # templates are compiled once per deploy instead of once per fresh worker
+    os.makedirs(app.config["JINJA_CACHE_DIR"], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config["JINJA_CACHE_DIR"])
 
    
     # Initialize CSRF protection
@@ -22,13 +24,27 @@ def create_app(config_class=Config):
     # init extensions
     db.init_app(app)
     migrate.init_app(app, db)
+    # Graph keep-alive pool, timeouts, retries and circuit breaker
+    configure_graph_client(app.config)
+    page_cache.init_app(app)
+    qr_cache.init_app(app)
+    query_plans.init_app(app)
+    user_import.init_app(app)
+    # fingerprinted, pre-compressed static files (built by build.sh)
+    assets.init_app(app)
+    # Graph token is read lazily from the config table and hot-reloaded
+    access_token_provider.init_app(app)
+    # live leaderboard pushes, fed by Postgres LISTEN/NOTIFY
+    broadcaster.init_app(app)
 
     # register blueprints
     register_blueprints(app)
 
     with app.app_context():
-         # load token once at startup
-        app.config["FACEBOOK_ACCESS_TOKEN"] = load_token_from_db()
+        # latency / SQL / template / Graph metrics, exposed on /api/metrics
+        metrics.init_app(app, db.engine)
+        # registered after metrics: its hooks run first, so latency includes compression
+        compression.init_app(app)
         init_scheduler(app)
 
     return app
@@ -0,0 +1,126 @@
+"""
+TTFB and bytes on the wire per Accept-Encoding, against a running server.
+
+    python -m benchmarks.compression --base-url http://127.0.0.1:8000 --requests 50
+
+Runs user_home and /api/users (paged, full, streamed) with identity, gzip
+and br, over one keep-alive connection each. Bodies are read raw (not
+decoded), so `wire_bytes` is what crosses cloudflared. Also times the
+template compile of a freshly started worker with an empty and a warm
+Jinja bytecode cache.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from urllib.parse import urlsplit
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from benchmarks.load_test import _admin_session, _percentile
+
+ENCODINGS = ("identity", "gzip", "br")
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+
+def _measure(base_url, path_factory, encoding, count, cookie):
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+    headers = {"Accept-Encoding": encoding}
+    if cookie:
+        headers["Cookie"] = cookie
+    ttfb, total, sizes = [], [], []
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            conn.request("GET", path_factory(), headers=headers)
+            response = conn.getresponse()
+            first = response.read(1)  # status line and headers are in, wait for the body's first byte
+            ttfb.append(time.perf_counter() - started)
+            body = first + response.read()
+            total.append(time.perf_counter() - started)
+            if response.status != 200:
+                raise SystemExit(f"{path_factory.__name__}: HTTP {response.status}")
+            sizes.append(len(body))
+            served = response.getheader("Content-Encoding") or "identity"
+    finally:
+        conn.close()
+    return {
+        "served_encoding": served,
+        "wire_bytes": round(statistics.fmean(sizes)),
+        "ttfb_p50_ms": round(_percentile(ttfb, 50) * 1000, 2),
+        "ttfb_p95_ms": round(_percentile(ttfb, 95) * 1000, 2),
+        "total_p50_ms": round(_percentile(total, 50) * 1000, 2),
+    }
+
+
+def template_compile(repeat):
+    """Load every template in a fresh Environment: no cache, cold bytecode cache, warm one."""
+    names = [n for n in Environment(loader=FileSystemLoader(TEMPLATES_DIR)).list_templates() if n.endswith(".html")]
+
+    def load_all(cache):
+        env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), bytecode_cache=cache)
+        started = time.perf_counter()
+        for name in names:
+            env.get_template(name)
+        return time.perf_counter() - started
+
+    no_cache = [load_all(None) for _ in range(repeat)]
+    cold, warm = [], []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            cold.append(load_all(FileSystemBytecodeCache(directory)))
+            warm.append(load_all(FileSystemBytecodeCache(directory)))
+    return {
+        "templates": len(names),
+        "no_cache_ms": round(statistics.median(no_cache) * 1000, 2),
+        "bytecode_cold_ms": round(statistics.median(cold) * 1000, 2),
+        "bytecode_warm_ms": round(statistics.median(warm) * 1000, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compression and template cache benchmark.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=50, help="per route and encoding")
+    parser.add_argument("--qr-ids", default="1-1000", help="USER<n> range for user_home")
+    parser.add_argument("--admin-username", default=os.getenv("ADMIN_USERNAME"))
+    parser.add_argument("--admin-password", default=os.getenv("ADMIN_PASSWORD"))
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    base = args.base_url.rstrip("/")
+    low, high = (int(x) for x in args.qr_ids.split("-", 1))
+    session = _admin_session(base, args.admin_username, args.admin_password)
+    cookie = "; ".join(f"{c.name}={c.value}" for c in session.cookies)
+
+    def user_home():
+        return f"/AbX9TqVrKmNUSER{random.randint(low, high)}4FjHsW2GyUeRc"
+
+    routes = {
+        "user_home": (user_home, None, args.requests),
+        "api_users_page": (lambda: "/api/users?limit=1000", cookie, args.requests),
+        "api_users_full": (lambda: "/api/users", cookie, max(5, args.requests // 5)),
+        "api_users_stream": (lambda: "/api/users?stream=1", cookie, max(5, args.requests // 5)),
+    }
+
+    report = {"routes": {}}
+    for name, (path_factory, route_cookie, count) in routes.items():
+        path_factory.__name__ = name
+        report["routes"][name] = {
+            encoding: _measure(base, path_factory, encoding, count, route_cookie) for encoding in ENCODINGS
+        }
+    report["templates"] = template_compile(repeat=5)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
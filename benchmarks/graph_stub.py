@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def error_payload(video_id=None):
+    # what Graph answers for a deleted / foreign video, it fails the whole multi-ID request
+    named = f" Object with ID '{video_id}' does not exist" if video_id else ""
+    return {"error": {
+        "message": f"Unsupported get request.{named}",
+        "type": "GraphMethodException",
+        "code": 100,
+    }}
+
+
+def video_payload(video_id):
+    # deterministic, so runs are comparable
+    n = int(video_id) % 1000
+    return {
+        "id": video_id,
+        "video_insights": {"data": [
+            {"name": "post_video_likes_by_reaction_type",
+             "values": [{"value": {"REACTION_LIKE": n, "REACTION_LOVE": n % 7}}]},
+            {"name": "fb_reels_total_plays", "values": [{"value": n * 10}]},
+        ]},
+    }
+
+
+class GraphStub:
+    """
+    Local stand-in for the Graph API video endpoints, with a fixed latency per request.
+
+    Serves /<version>/<video_id> and /<version>/?ids=a,b,c in a background
+    thread, counts the requests it answered and the IDs each one asked for.
+    Requests naming one of `bad_ids` get a Graph error instead, which names
+    the first bad ID unless `name_bad_ids` is off.
+    """
+
+    def __init__(self, latency_s=0.05, host="127.0.0.1", port=0, bad_ids=(), name_bad_ids=True):
+        self.latency_s = latency_s
+        self.bad_ids = set(bad_ids)
+        self.name_bad_ids = name_bad_ids
+        self.requests = 0
+        self.ids_per_request = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(stub.latency_s)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if "ids" in query:
+                    ids = query["ids"][0].split(",")
+                else:
+                    ids = [url.path.rstrip("/").split("/")[-1]]
+                with stub._lock:
+                    stub.requests += 1
+                    stub.ids_per_request.append(len(ids))
+
+                bad = [v for v in ids if v in stub.bad_ids]
+                if bad:
+                    status, body = 400, error_payload(bad[0] if stub.name_bad_ids else None)
+                elif "ids" in query:
+                    status, body = 200, {v: video_payload(v) for v in ids}
+                else:
+                    status, body = 200, video_payload(ids[0])
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("X-App-Usage", json.dumps({"call_count": 1, "total_time": 1, "total_cputime": 1}))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v24.0"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.ids_per_request = []
@@ -0,0 +1,141 @@
+"""
+Concurrent load against a running server (gunicorn, any profile).
+
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 \\
+        --scan-clients 32 --admin-clients 4 --competition-id 1 --duration 30
+
+Scan clients GET QR landing pages (user_home) in a loop. Admin clients
+POST update_likes at the same time and poll the background job until it
+finishes (clicks during a refresh coalesce on the running job).
+Compare the scan latencies between GUNICORN_PROFILE=sync / gthread / gevent.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import requests
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Group:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def summary(self, elapsed):
+        values = self.latencies
+        return {
+            "requests": len(values),
+            "errors": self.errors,
+            "p50_ms": round(_percentile(values, 50) * 1000, 1),
+            "p95_ms": round(_percentile(values, 95) * 1000, 1),
+            "max_ms": round(max(values, default=0) * 1000, 1),
+            "mean_ms": round(statistics.fmean(values) * 1000, 1) if values else 0.0,
+            "throughput_per_s": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def _client_loop(group, session, make_request, deadline, timeout):
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            response = make_request(session, timeout)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        group.record(time.perf_counter() - started, ok)
+
+
+def _admin_session(base_url, username, password):
+    session = requests.Session()
+    response = session.post(f"{base_url}/admin", data={"username": username, "password": password},
+                            allow_redirects=False)
+    if response.status_code != 302 or "error" in response.headers.get("Location", ""):
+        raise SystemExit("admin login failed")
+    return session
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test: QR scans while admins refresh likes.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--scan-clients", type=int, default=32)
+    parser.add_argument("--admin-clients", type=int, default=4, help="concurrent update_likes callers (0: none)")
+    parser.add_argument("--competition-id", type=int, default=1)
+    parser.add_argument("--qr-ids", default="1-1000", help="USER<n> range scanned, e.g. 1-1000")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--admin-username", default=os.getenv("ADMIN_USERNAME"))
+    parser.add_argument("--admin-password", default=os.getenv("ADMIN_PASSWORD"))
+    parser.add_argument("--label", help="free text stored in the report (e.g. the profile)")
+    args = parser.parse_args(argv)
+
+    low, high = (int(x) for x in args.qr_ids.split("-", 1))
+    base = args.base_url.rstrip("/")
+
+    def scan(session, timeout):
+        qr_id = f"USER{random.randint(low, high)}"
+        return session.get(f"{base}/AbX9TqVrKmN{qr_id}4FjHsW2GyUeRc", timeout=timeout)
+
+    def refresh(session, timeout):
+        response = session.post(f"{base}/api/competitions/{args.competition_id}/update_likes", timeout=timeout)
+        if response.status_code != 202:
+            return response
+        # latency of a refresh: until its job is done
+        progress_url = base + response.headers["Location"]
+        while True:
+            response = session.get(progress_url, timeout=timeout)
+            if response.status_code != 200:
+                return response
+            status = response.json()["status"]
+            if status in ("done", "failed"):
+                response.status_code = 200 if status == "done" else 500
+                return response
+            time.sleep(0.2)
+
+    scans, admins = Group("scan"), Group("update_likes")
+    deadline = time.time() + args.duration
+    threads = []
+    for _ in range(args.admin_clients):
+        session = _admin_session(base, args.admin_username, args.admin_password)
+        threads.append(threading.Thread(target=_client_loop, args=(admins, session, refresh, deadline, args.timeout)))
+    for _ in range(args.scan_clients):
+        threads.append(threading.Thread(target=_client_loop, args=(scans, requests.Session(), scan, deadline, args.timeout)))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        "label": args.label,
+        "base_url": base,
+        "duration_s": round(elapsed, 1),
+        "scan_clients": args.scan_clients,
+        "admin_clients": args.admin_clients,
+        "scan": scans.summary(elapsed),
+        "update_likes": admins.summary(elapsed),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
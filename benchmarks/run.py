@@ -0,0 +1,198 @@
+"""
+Benchmark the hot routes and scheduler jobs against a seeded local database.
+
+    python -m benchmarks.run --database-url postgresql://postgres:pw@localhost:5432/vip_bench \\
+        --scale 10k --graph-latency-ms 50 --output bench-10k.json
+
+The database is wiped and re-seeded: never point this at real data.
+Results are written as JSON (p50/p95 latency, queries per request,
+throughput) so runs can be diffed across changes.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(latencies, queries, elapsed):
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "queries_p50": _percentile(queries, 50),
+        "queries_max": max(queries),
+        "throughput_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _configure_env(args, graph_url):
+    """Point config.py at the benchmark database before the app is imported."""
+    from sqlalchemy.engine import make_url
+    url = make_url(args.database_url)
+    os.environ.update({
+        "user": url.username or "",
+        "password": url.password or "",
+        "host": url.host or "localhost",
+        "port": str(url.port or 5432),
+        "dbname": url.database,
+        "GRAPH_API_URL": graph_url,
+        "PAGE_CACHE_ENABLED": "1" if args.page_cache else "0",
+        "PAGE_CACHE_PATH": os.path.join(tempfile.mkdtemp(prefix="vip-bench-"), "page_cache.sqlite"),
+    })
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark hot routes and scheduler jobs.")
+    parser.add_argument("--database-url", required=True, help="throwaway Postgres database (wiped!)")
+    parser.add_argument("--scale", default="1k", help="users to seed: 1k, 10k, 100k or a number")
+    parser.add_argument("--graph-latency-ms", type=float, default=50, help="stub Graph API latency")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per route")
+    parser.add_argument("--page-cache", action="store_true", help="keep the rendered page cache on")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data of the previous run")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the sampled users")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from benchmarks.graph_stub import GraphStub
+    stub = GraphStub(latency_s=args.graph_latency_ms / 1000).start()
+    _configure_env(args, stub.url)
+
+    # imported late: config.py reads the environment at import time
+    from flask_migrate import upgrade
+    from app import app
+    from extensions import db, scheduler
+    from benchmarks.seed import parse_scale, seed
+    from services.competition_service import update_competitions, close_competition
+    from services.refresh_planner import run_planned_refresh
+    from services.query_counter import count_queries
+
+    # jobs are called directly below, the background scheduler must not race them
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    app.logger.setLevel("WARNING")
+
+    users = parse_scale(args.scale)
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        upgrade()
+        if args.skip_seed:
+            seeded = {"users": db.session.execute(db.text("SELECT count(*) FROM users")).scalar()}
+        else:
+            started = time.perf_counter()
+            seeded = seed(users)
+            seeded["seed_s"] = round(time.perf_counter() - started, 2)
+        engine = db.engine
+        participants = db.session.execute(db.text(
+            "SELECT u.id_qr_code FROM users u JOIN user_competition uc ON uc.user_id = u.id "
+            "JOIN competitions c ON c.id = uc.competition_id "
+            "WHERE c.is_active AND c.end_date > now() ORDER BY u.id LIMIT 5000"
+        )).scalars().all()
+        all_codes = db.session.execute(db.text(
+            "SELECT id_qr_code FROM users ORDER BY random() LIMIT 5000"
+        )).scalars().all()
+        db.session.remove()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin_logged_in"] = True
+
+    routes = {
+        "user_home": lambda: f"/AbX9TqVrKmN{rng.choice(participants or all_codes)}4FjHsW2GyUeRc",
+        "dashboard": lambda: f"/AbX9TqVrKmN{rng.choice(all_codes)}4FjHsW2GyUeRk",
+        "api_users_page": lambda: "/api/users?limit=1000",
+        "api_users_stream": lambda: "/api/users?stream=1",
+        "api_competitions": lambda: "/api/competitions",
+    }
+
+    report = {"routes": {}, "jobs": {}}
+    for name, make_url in routes.items():
+        # the full export is heavy at 100k: fewer iterations
+        count = args.requests if name != "api_users_stream" else max(5, args.requests // 20)
+        for _ in range(min(args.warmup, count)):
+            client.get(make_url()).close()
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for _ in range(count):
+            url = make_url()
+            with count_queries(engine) as statements:
+                t0 = time.perf_counter()
+                response = client.get(url)
+                response.get_data()  # drain streamed bodies inside the timing
+                latencies.append(time.perf_counter() - t0)
+            queries.append(len(statements))
+            if response.status_code >= 400:
+                raise SystemExit(f"{name}: {url} returned {response.status_code}")
+        report["routes"][name] = _summary(latencies, queries, time.perf_counter() - started)
+
+    # each job runs once on the seeded state, in this order (the planned refresh
+    # is the scheduler's likes job: one run within its share of the Graph budget,
+    # update_competitions enrolls new participants, close_competition closes the ended competition)
+    jobs = {
+        "planned_refresh": run_planned_refresh,
+        "update_competitions": update_competitions,
+        "close_competition": close_competition,
+    }
+    for name, job in jobs.items():
+        stub.reset()
+        with count_queries(engine) as statements:
+            t0 = time.perf_counter()
+            job(app)
+            elapsed = time.perf_counter() - t0
+        report["jobs"][name] = {
+            "elapsed_s": round(elapsed, 3),
+            "queries": len(statements),
+            "graph_requests": stub.requests,
+        }
+
+    stub.stop()
+    report["meta"] = {
+        "scale": args.scale,
+        "seed": seeded,
+        "graph_latency_ms": args.graph_latency_ms,
+        "requests_per_route": args.requests,
+        "page_cache": args.page_cache,
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+    }
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from extensions import db
+from models import Competition
+from services.competition_service import now_tunis
+from services.leaderboard import rebuild_leaderboard
+from services import data_versions
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+# every table the seed owns, wiped before seeding
+TABLES = "likes_snapshots, leaderboard_entries, user_competition, competitions, users, config, graph_call_counts"
+
+_USERS_SQL = db.text("""
+INSERT INTO users (
+    id_qr_code, full_name, phone_number, is_gold, is_active, date_wedding, lieu_wedding, url,
+    solde_to_pay, avance_paid, reduction, pnts, is_winner, rank, likes_number, views_number
+)
+SELECT
+    'USER' || g, 'Couple ' || g, '216' || lpad(g::text, 8, '0'),
+    g % 10 <> 0,                                  -- 90% gold
+    g % 7 <> 0,                                   -- ~85% active
+    (CAST(:today AS date) - (g % 90)),            -- weddings over the last 90 days
+    'Tunis',
+    'https://www.facebook.com/reel/' || (10000000 + g),
+    1500, 500, 0, 0, false, 0, 0, 0
+FROM generate_series(1, :n) AS g
+""")
+
+# participants: every 5th user in the running competition, every 3rd in the ended one
+_PARTICIPANTS_SQL = db.text("""
+INSERT INTO user_competition (user_id, competition_id)
+SELECT id, :competition_id FROM users WHERE id % :every = 0 AND is_gold AND is_active
+""")
+
+
+def parse_scale(value):
+    return SCALES.get(value) or int(value)
+
+
+def seed(users):
+    """
+    Wipe and fill the benchmark database.
+
+    `users` users, a running competition (open for registration), an ended
+    one that close_competition will pick up, twelve closed past ones, and
+    their participants. Leaderboards are rebuilt so pages have data.
+    """
+    now = now_tunis().replace(tzinfo=None)
+    db.session.execute(db.text(f"TRUNCATE {TABLES} RESTART IDENTITY CASCADE"))
+    db.session.execute(
+        db.text("INSERT INTO config (name, value) VALUES ('ACCESS_TOKEN', 'benchmark')")
+    )
+    db.session.execute(_USERS_SQL, {"n": users, "today": now.date()})
+
+    running = Competition(
+        name="Benchmark running", start_date=now - timedelta(days=20),
+        end_date=now + timedelta(days=10), registration_deadline=now + timedelta(days=5), is_active=True
+    )
+    ended = Competition(
+        name="Benchmark ended", start_date=now - timedelta(days=50),
+        end_date=now - timedelta(hours=1), registration_deadline=now - timedelta(days=25), is_active=True
+    )
+    past = [
+        Competition(
+            name=f"Benchmark past {i}", start_date=now - timedelta(days=30 * i + 60),
+            end_date=now - timedelta(days=30 * i + 30), registration_deadline=now - timedelta(days=30 * i + 45),
+            is_active=False
+        )
+        for i in range(1, 13)
+    ]
+    db.session.add_all([running, ended, *past])
+    db.session.flush()
+
+    db.session.execute(_PARTICIPANTS_SQL, {"competition_id": running.id, "every": 5})
+    db.session.execute(_PARTICIPANTS_SQL, {"competition_id": ended.id, "every": 3})
+    for comp in (running, ended):
+        rebuild_leaderboard(comp.id)
+    # raw SQL above: cached admin lists must not survive a re-seed
+    data_versions.touch("users", "competitions", "participation")
+    db.session.commit()
+
+    db.session.execute(db.text("ANALYZE"))
+    db.session.commit()
+    return {"users": users, "running_competition_id": running.id, "ended_competition_id": ended.id}
@@ -1,8 +1,17 @@
-from flask import jsonify, request, current_app
+from flask import jsonify, request, current_app, Response, stream_with_context, abort, url_for
 from . import api_bp
-from models import Competition, User
+from models import Competition, User, user_competition
 from extensions import db
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import io
+from secrets import compare_digest
+from services.leaderboard import rebuild_leaderboard
+from services.ranking import top_n
+from services import page_cache
+from services.leader_election import scheduler_leader
+from services.facebook_likes import graph_circuit, graph_usage
+from services.refresh_planner import staleness
+from services import data_versions, likes_history, likes_jobs, metrics, qr_cache, user_import
 
 # Simple admin-like check decorator for the API blueprint (reuse session if available)
 def admin_required(f):
@@ -15,24 +24,52 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated
 
+def _competitions_summary_query():
+    """Competitions with participant count and winner name, in one statement (no lazy loads)."""
+    counts = db.select(
+        user_competition.c.competition_id,
+        db.func.count().label('participants_count')
+    ).group_by(user_competition.c.competition_id).subquery('counts')
+    winner = db.aliased(User)
+
+    return db.select(
+        Competition.id,
+        Competition.name,
+        Competition.start_date,
+        Competition.end_date,
+        Competition.registration_deadline,
+        Competition.is_active,
+        db.func.coalesce(counts.c.participants_count, 0).label('participants_count'),
+        winner.full_name.label('winner_name')
+    ).outerjoin(
+        counts, counts.c.competition_id == Competition.id
+    ).outerjoin(
+        winner, winner.id == Competition.winner_id
+    )
+
+
+def _competition_summary_to_dict(c):
+    return {
+        'id': c.id,
+        'name': c.name,
+        'start_date': c.start_date.isoformat(),
+        'end_date': c.end_date.isoformat(),
+        'registration_deadline': c.registration_deadline.isoformat(),
+        'is_active': c.is_active,
+        'participants_count': c.participants_count,
+        'winner_name': c.winner_name
+    }
+
 # GET all competitions / POST new competition
 @api_bp.route("/competitions", methods=["GET", "POST"])
 @admin_required
+@data_versions.conditional("competitions", "participation", "users")
 def manage_competitions():
     if request.method == "GET":
-        comps = Competition.query.order_by(Competition.start_date.desc()).all()
-        results = []
-        for c in comps:
-            results.append({
-                'id': c.id,
-                'name': c.name,
-                'start_date': c.start_date.isoformat(),
-                'end_date': c.end_date.isoformat(),
-                'registration_deadline': c.registration_deadline.isoformat(),
-                'is_active': c.is_active,
-                'participants_count': len(c.users),
-                'winner_name': c.winner.full_name if c.winner else None
-            })
+        comps = db.session.execute(
+            _competitions_summary_query().order_by(Competition.start_date.desc())
+        ).all()
+        results = [_competition_summary_to_dict(c) for c in comps]
         return jsonify({'success': True, 'competitions': results})
 
     if request.method == "POST":
@@ -56,20 +93,15 @@ def manage_competitions():
 @api_bp.route("/competitions/<int:comp_id>", methods=["GET", "PUT", "DELETE"])
 @admin_required
 def single_competition(comp_id):
-    comp = Competition.query.get_or_404(comp_id)
-
     if request.method == "GET":
-        return jsonify({
-            'success': True,
-            'competition': {
-                'id': comp.id,
-                'name': comp.name,
-                'start_date': comp.start_date.isoformat(),
-                'end_date': comp.end_date.isoformat(),
-                'registration_deadline': comp.registration_deadline.isoformat(),
-                'is_active': comp.is_active
-            }
-        })
+        comp = db.session.execute(
+            _competitions_summary_query().where(Competition.id == comp_id)
+        ).first()
+        if comp is None:
+            abort(404)
+        return jsonify({'success': True, 'competition': _competition_summary_to_dict(comp)})
+
+    comp = Competition.query.get_or_404(comp_id)
 
     if request.method == "PUT":
         data = request.json
@@ -79,6 +111,7 @@ def single_competition(comp_id):
             comp.end_date = datetime.fromisoformat(data['end_date'])
             comp.registration_deadline = datetime.fromisoformat(data['registration_deadline'])
             comp.is_active = data['is_active']
+            page_cache.invalidate_on_commit(competition_ids=[comp.id])
             db.session.commit()
             return jsonify({'success': True})
         except Exception as e:
@@ -87,6 +120,9 @@ def single_competition(comp_id):
 
     if request.method == "DELETE":
         try:
+            page_cache.invalidate_on_commit(
+                qr_ids=[u.id_qr_code for u in comp.users], competition_ids=[comp.id]
+            )
             comp.users = []
             db.session.delete(comp)
             db.session.commit()
@@ -98,30 +134,41 @@ def single_competition(comp_id):
 # participants list / add
 @api_bp.route("/competitions/<int:comp_id>/participants", methods=["GET", "POST"])
 @admin_required
+@data_versions.conditional("competitions", "participation", "users", "standings")
 def competition_participants(comp_id):
-    comp = Competition.query.get_or_404(comp_id)
-
     if request.method == "GET":
-        participants = sorted(comp.users, key=lambda u: u.likes_number or 0, reverse=True)
+        winner_id = db.session.execute(
+            db.select(Competition.id, Competition.winner_id).where(Competition.id == comp_id)
+        ).first()
+        if winner_id is None:
+            abort(404)
+        winner_id = winner_id.winner_id
+
         results = []
-        for u in participants:
+        for u in top_n(comp_id, None):
             results.append({
-                'id': u.id,
+                'id': u.user_id,
                 'full_name': u.full_name,
                 'id_qr_code': u.id_qr_code,
                 'is_gold': u.is_gold,
                 'likes_number': u.likes_number,
                 'views_number': u.views_number,
                 'url': u.url,
-                'is_winner': (comp.winner_id == u.id)
+                'rank': u.rank,
+                'is_winner': (winner_id == u.user_id)
             })
         return jsonify({'success': True, 'participants': results})
 
+    comp = Competition.query.get_or_404(comp_id)
+
     if request.method == "POST":
         user_id = request.json.get('user_id')
         user = User.query.get(user_id)
         if user and user not in comp.users:
             comp.users.append(user)
+            db.session.flush()
+            rebuild_leaderboard(comp.id)
+            page_cache.invalidate_on_commit(qr_ids=[user.id_qr_code])
             db.session.commit()
             return jsonify({'success': True})
         return jsonify({'success': False, 'message': 'User not found or already added'}), 400
@@ -138,23 +185,44 @@ def remove_participant(comp_id, user_id):
         if comp.winner_id == user.id:
             comp.winner_id = None
             user.is_winner = False
+        db.session.flush()
+        rebuild_leaderboard(comp.id)
+        page_cache.invalidate_on_commit(qr_ids=[user.id_qr_code])
         db.session.commit()
         return jsonify({'success': True})
     return jsonify({'success': False, 'error': 'User not in competition'}), 400
 
-# update likes for a competition
+# update likes for a competition: queued as a background job, polled for progress
 @api_bp.route("/competitions/<int:comp_id>/update_likes", methods=["POST"])
 @admin_required
 def update_competition_likes(comp_id):
     comp = Competition.query.get_or_404(comp_id)
     try:
-        for user in comp.users:
-            user.update_likes_number()
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Likes updated'})
+        job, created = likes_jobs.enqueue(current_app._get_current_object(), comp.id)
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
+    # a click while a refresh is queued / running gets that job back
+    response = jsonify({'success': True, 'coalesced': not created, 'job': likes_jobs.to_dict(job)})
+    response.status_code = 202
+    response.headers['Location'] = url_for('api_bp.likes_job', job_id=job.id)
+    return response
+
+# last likes refresh job of a competition (the running one first), lets the page resume polling
+@api_bp.route("/competitions/<int:comp_id>/update_likes", methods=["GET"])
+@admin_required
+def latest_likes_job(comp_id):
+    job = likes_jobs.latest(comp_id)
+    return jsonify({'job': likes_jobs.to_dict(job) if job else None})
+
+# progress of a likes refresh job: done / total / errors, counted in participants
+@api_bp.route("/likes_jobs/<int:job_id>", methods=["GET"])
+@admin_required
+def likes_job(job_id):
+    job = likes_jobs.get(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(likes_jobs.to_dict(job))
 
 # set winner manually
 @api_bp.route("/competitions/<int:comp_id>/winner", methods=["POST"])
@@ -165,10 +233,14 @@ def set_competition_winner(comp_id):
     user = User.query.get(user_id)
 
     if user and user in comp.users:
+        qr_ids = [user.id_qr_code]
         if comp.winner:
             comp.winner.is_winner = False
+            qr_ids.append(comp.winner.id_qr_code)
         comp.winner = user
         user.is_winner = True
+        # finished_event pages are cached without a competition: invalidate both winners by QR
+        page_cache.invalidate_on_commit(qr_ids=qr_ids, competition_ids=[comp.id])
         db.session.commit()
         return jsonify({'success': True})
     return jsonify({'success': False, 'error': 'Invalid user'}), 400
@@ -265,43 +337,140 @@ def save_user():
         else:
             user.date_wedding = None
 
+        page_cache.invalidate_on_commit(qr_ids=[user.id_qr_code])
         db.session.commit()
         return jsonify({'success': True, 'user_id': user.id})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# columns exposed by /api/users, selectable with ?fields=
+USER_FIELDS = {
+    'id': User.id,
+    'id_qr_code': User.id_qr_code,
+    'full_name': User.full_name,
+    'phone_number': User.phone_number,
+    'date_wedding': User.date_wedding,
+    'lieu_wedding': User.lieu_wedding,
+    'url': User.url,
+    'solde_to_pay': User.solde_to_pay,
+    'avance_paid': User.avance_paid,
+    'reduction': User.reduction,
+    'slow_music': User.slow_music,
+    'in_music': User.in_music,
+    'special_music': User.special_music,
+    'pnts': User.points,
+    'note': User.note,
+    'is_gold': User.is_gold,
+    'is_active': User.is_active,
+}
+USERS_PAGE_MAX = 1000
+USERS_STREAM_CHUNK = 1000
+
+
+def _user_row_to_dict(row, fields):
+    data = dict(zip(fields, row))
+    if data.get('date_wedding'):
+        data['date_wedding'] = data['date_wedding'].strftime('%Y-%m-%d')
+    return data
+
+
 # get all users
+# ?fields=id,full_name  -> only those columns are selected
+# ?after_id=&limit=     -> keyset pagination ordered by id
+# ?stream=1             -> chunked JSON export, memory stays flat
 @api_bp.route("/users", methods=["GET"])
 @admin_required
+@data_versions.conditional("users")
 def get_all_users():
+    requested = request.args.get('fields')
+    fields = [f for f in requested.split(',') if f] if requested else list(USER_FIELDS)
+    unknown = [f for f in fields if f not in USER_FIELDS]
+    if unknown:
+        return jsonify({'success': False, 'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    after_id = request.args.get('after_id', type=int)
+    limit = request.args.get('limit', type=int)
+
+    query = db.select(*(USER_FIELDS[f] for f in fields)).order_by(User.id)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+
+    if request.args.get('stream') == '1':
+        return _stream_users(query, fields)
+
     try:
-        users = User.query.all()
-        users_data = []
-        for user in users:
-            users_data.append({
-                'id': user.id,
-                'id_qr_code': user.id_qr_code,
-                'full_name': user.full_name,
-                'phone_number': user.phone_number,
-                'date_wedding': user.date_wedding.strftime('%Y-%m-%d') if user.date_wedding else None,
-                'lieu_wedding': user.lieu_wedding,
-                'url': user.url,
-                'solde_to_pay': user.solde_to_pay,
-                'avance_paid': user.avance_paid,
-                'reduction': user.reduction,
-                'slow_music': user.slow_music,
-                'in_music': user.in_music,
-                'special_music': user.special_music,
-                'pnts': user.points,
-                'note': user.note,
-                'is_gold': user.is_gold,
-                'is_active': user.is_active
-            })
+        if limit:
+            limit = max(1, min(limit, USERS_PAGE_MAX))
+            # fetch the id too, the cursor of the next page
+            rows = db.session.execute(query.add_columns(User.id).limit(limit)).all()
+            users_data = [_user_row_to_dict(row[:-1], fields) for row in rows]
+            next_after_id = rows[-1][-1] if len(rows) == limit else None
+            return jsonify({'success': True, 'users': users_data, 'next_after_id': next_after_id})
+
+        rows = db.session.execute(query).all()
+        users_data = [_user_row_to_dict(row, fields) for row in rows]
         return jsonify({'success': True, 'users': users_data})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+
+def _stream_users(query, fields):
+    dumps = current_app.json.dumps
+
+    @stream_with_context
+    def generate():
+        yield '{"success": true, "users": ['
+        # server-side cursor: rows are pulled from Postgres chunk by chunk
+        result = db.session.execute(query.execution_options(yield_per=USERS_STREAM_CHUNK))
+        first = True
+        for partition in result.partitions():
+            chunk = ','.join(dumps(_user_row_to_dict(row, fields)) for row in partition)
+            if not first:
+                chunk = ',' + chunk
+            first = False
+            yield chunk
+        yield ']}'
+
+    return Response(generate(), mimetype='application/json')
+
+# bulk upsert of users from a CSV / NDJSON upload (multipart "file" or raw body)
+# ?format=csv|ndjson (default: from the file name), ?dry_run=1 validates only
+@api_bp.route("/users/import", methods=["POST"])
+@admin_required
+def import_users():
+    upload = request.files.get('file')
+    raw = upload.stream if upload else request.stream
+    fmt = request.args.get('format') or user_import.guess_format(upload.filename if upload else None)
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'error': 'format must be csv or ndjson'}), 400
+
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    try:
+        summary = user_import.import_users(stream, fmt, dry_run=request.args.get('dry_run') == '1')
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, **summary})
+
+# streaming export, same columns as the import: ?format=csv|ndjson
+@api_bp.route("/users/export", methods=["GET"])
+@admin_required
+def export_users():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'error': 'format must be csv or ndjson'}), 400
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(user_import.export_users(fmt)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=users.{fmt}'}
+    )
+
 # delete user
 @api_bp.route("/user/delete/<int:user_id>", methods=["DELETE"])
 @admin_required
@@ -310,6 +479,7 @@ def delete_user(user_id):
         user = User.query.get(user_id)
         if not user:
             return jsonify({'success': False, 'error': 'User not found'}), 404
+        page_cache.invalidate_on_commit(qr_ids=[user.id_qr_code])
         db.session.delete(user)
         db.session.commit()
         return jsonify({'success': True})
@@ -330,5 +500,124 @@ def update_user(qr_id):
     user.special_music = data.get("special_music", user.special_music)
     user.note = data.get("note", user.note)
 
+    page_cache.invalidate_on_commit(qr_ids=[qr_id])
     db.session.commit()
     return jsonify({"status": "success", "message": "Data updated"})
+
+# QR card image for any qr id, rendered on demand (cached on disk, immutable per URL)
+@api_bp.route("/qr/<qr_id>.<any(png, svg):fmt>", methods=["GET"])
+@admin_required
+def qr_image(qr_id, fmt):
+    etag = qr_cache.etag_for(qr_id, fmt)
+    if request.if_none_match.contains_weak(etag):  # weak: SVGs go out compressed
+        response = Response(status=304)
+    else:
+        response = Response(qr_cache.get_image(qr_id, fmt), mimetype=qr_cache.MIMETYPES[fmt])
+    response.set_etag(etag)
+    # admin-only, so private; the content for a given URL never changes
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+# Prometheus metrics of all workers: admin session or "Authorization: Bearer <METRICS_TOKEN>"
+@api_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    from flask import session
+    token = current_app.config.get("METRICS_TOKEN")
+    auth = request.headers.get("Authorization", "")
+    bearer_ok = bool(token) and compare_digest(auth, f"Bearer {token}")
+    if 'admin_logged_in' not in session and not bearer_ok:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    body, content_type = metrics.render_latest()
+    return Response(body, content_type=content_type)
+
+# rendered page cache counters
+@api_bp.route("/cache/stats", methods=["GET"])
+@admin_required
+def page_cache_stats():
+    return jsonify({'success': True, 'page_cache': page_cache.stats()})
+
+# which worker runs the scheduler jobs
+@api_bp.route("/scheduler/leader", methods=["GET"])
+@admin_required
+def scheduler_leadership():
+    return jsonify({
+        'success': True,
+        'this_worker': scheduler_leader.identity,
+        'this_worker_is_leader': scheduler_leader.is_leader,
+        'leader': scheduler_leader.holder()
+    })
+
+# Graph client health: circuit breaker (this worker), rate-limit usage, stale participants
+@api_bp.route("/graph/state", methods=["GET"])
+@admin_required
+def graph_state():
+    return jsonify({
+        'success': True,
+        'circuit': graph_circuit.snapshot(),
+        'usage': graph_usage.snapshot(),
+        'likes': staleness(current_app)
+    })
+
+def _utc_param(name):
+    """?name= as a naive UTC datetime (the DB columns are naive UTC), offsets are converted."""
+    value = datetime.fromisoformat(request.args[name])
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _history_range():
+    """Parse ?start=&end= (ISO, UTC unless an offset is given) and pick or validate ?resolution=.
+
+    Returns ((start, end, resolution), None), or (None, error response).
+    """
+    now = datetime.utcnow()
+    try:
+        end = _utc_param('end') if request.args.get('end') else now
+        start = _utc_param('start') if request.args.get('start') else end - timedelta(days=7)
+    except ValueError:
+        return None, (jsonify({'success': False, 'error': 'start/end must be ISO dates'}), 400)
+    if start >= end:
+        return None, (jsonify({'success': False, 'error': 'start must be before end'}), 400)
+
+    resolution = request.args.get('resolution') or likes_history.pick_resolution(
+        start, end, now,
+        current_app.config["LIKES_HISTORY_RAW_DAYS"],
+        current_app.config["LIKES_HISTORY_HOURLY_DAYS"]
+    )
+    if resolution not in likes_history.RESOLUTIONS:
+        return None, (jsonify({'success': False, 'error': 'resolution must be raw, hour or day'}), 400)
+    return (start, end, resolution), None
+
+# likes/views history of one user (chart data)
+@api_bp.route("/history/users/<int:user_id>", methods=["GET"])
+@admin_required
+def user_likes_history(user_id):
+    history_range, error = _history_range()
+    if error:
+        return error
+    start, end, resolution = history_range
+    return jsonify({
+        'success': True,
+        'user_id': user_id,
+        'resolution': resolution,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'points': likes_history.user_history(user_id, resolution, start, end)
+    })
+
+# likes/views history of every participant of a competition
+@api_bp.route("/history/competitions/<int:comp_id>", methods=["GET"])
+@admin_required
+def competition_likes_history(comp_id):
+    history_range, error = _history_range()
+    if error:
+        return error
+    start, end, resolution = history_range
+    return jsonify({
+        'success': True,
+        'competition_id': comp_id,
+        'resolution': resolution,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': likes_history.competition_history(comp_id, resolution, start, end)
+    })
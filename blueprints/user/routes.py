@@ -1,8 +1,10 @@
-from flask import render_template
+from flask import Response, render_template
 from . import user_bp
 from models import User
 from services.competition_service import now_tunis
-from extensions import db
+from services.leaderboard import get_top_entries
+from services import page_cache
+from services.leaderboard_events import broadcaster
 
 
 @user_bp.route("/")
@@ -11,43 +13,87 @@ def home():
 
 @user_bp.route("/AbX9TqVrKmN<qr_id>4FjHsW2GyUeRc", methods=["GET"])
 def user_home(qr_id):
+    cached = page_cache.get_page(qr_id, "home")
+    if cached:
+        return cached
+
     user = User.query.filter_by(id_qr_code=qr_id).first()
     # not found or not active
     if not user or not getattr(user, "date_wedding", None)  or not getattr(user, "is_active", False) :      
         return render_template("user/not_active.html")
+
+    html, competition_id = _render_user_home(user)
+    page_cache.set_page(qr_id, "home", html, competition_id=competition_id)
+    return html
+
+
+def _render_user_home(user):
+    """Render the QR landing page, returns (html, competition_id it depends on)."""
     # before wedding
     if user.date_wedding > now_tunis().date():
-        return render_template("user/befor_wedding.html", user=user)
+        return render_template("user/befor_wedding.html", user=user), None
         
     # gold user and active
     if  getattr(user, "is_gold", False):
         # in competition
         active_comp = next((c for c in user.competitions if c.is_active), None)
         if active_comp:
-            sorted_users = sorted(active_comp.users, key=lambda u: u.likes_number or 0, reverse=True)
-            for idx, u in enumerate(sorted_users, start=1):
-                u.rank = idx
-            db.session.commit()
-            return render_template("user/competition.html", user=user, competition=active_comp)
+            # read-only: ranks are materialized by services.leaderboard on likes refresh
+            leaderboard = get_top_entries(active_comp.id)
+            return render_template("user/competition.html", user=user, competition=active_comp, leaderboard=leaderboard), active_comp.id
         # after competition
         else:
-            return render_template("user/finished_event.html", user=user)
+            return render_template("user/finished_event.html", user=user), None
     # platinum user and active
     if not getattr(user, "is_gold", True) and user.date_wedding <= now_tunis().date():
-        return render_template("user/finished_event.html", user=user)
+        return render_template("user/finished_event.html", user=user), None
              
-    return render_template("user/not_active.html")
+    return render_template("user/not_active.html"), None
 
 
 @user_bp.route("/AbX9TqVrKmN<qr_id>4FjHsW2GyUeRk", methods=["GET"])
 def dashboard(qr_id):
+    cached = page_cache.get_page(qr_id, "dashboard")
+    if cached:
+        return cached
 
     user = User.query.filter_by(id_qr_code=qr_id).first()
     if not user:
         return render_template("user/not_active.html"), 404
 
     if not getattr(user, "is_active", False):
-        return render_template("user/not_active.html")
+        html = render_template("user/not_active.html")
+    else:
+        html = render_template("user/user_dashboard.html", user=user)
+
+    page_cache.set_page(qr_id, "dashboard", html)
+    return html
+
+
+# keyed by the obfuscated QR path like the page itself: competition ids are sequential
+@user_bp.route("/AbX9TqVrKmN<qr_id>4FjHsW2GyUeRc/live", methods=["GET"])
+def competition_live(qr_id):
+    """Server-Sent Events: leaderboard snapshot, then deltas after every likes refresh."""
+    # each stream holds a thread / greenlet of the worker for its whole lifetime
+    if not broadcaster.accepting():
+        return Response("live updates unavailable\n", status=503, mimetype="text/plain",
+                        headers={"Retry-After": "60"})
+
+    # same competition as the landing page: only its participants get the stream
+    user = User.query.filter_by(id_qr_code=qr_id).first()
+    active_comp = None
+    if user and getattr(user, "is_active", False) and getattr(user, "is_gold", False):
+        active_comp = next((c for c in user.competitions if c.is_active), None)
+    if active_comp is None:
+        return Response("not found\n", status=404, mimetype="text/plain")
 
-    return render_template("user/user_dashboard.html", user=user)
+    competition_id = active_comp.id
+    wake, standings = broadcaster.subscribe(competition_id)
+    if wake is None:
+        return Response("not found\n", status=404, mimetype="text/plain")
 
+    return Response(
+        broadcaster.stream(competition_id, wake, standings),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -5,5 +5,8 @@ set -o errexit
 # Run DB migrations
 flask db upgrade
 
+# Fingerprint and pre-compress static files (before the workers load the manifest)
+python -m services.assets
+
 # Start Gunicorn
 exec gunicorn --config gunicorn-cfg.py app:app
@@ -21,10 +21,62 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = timedelta(hours=1)
+    # requests one worker serves at once, exported by gunicorn-cfg.py (threads / greenlets)
+    WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 1))
+    # cap on pooled DB connections per worker: greenlets beyond it wait for a free one
+    DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 5,           # Maximum number of connections to keep open
+        'pool_size': max(5, min(WORKER_CONCURRENCY, DB_POOL_MAX)),  # Connections kept open
         'max_overflow': 10,       # Additional connections when pool is full
         'pool_pre_ping': True,    # Verify connections before using
         'pool_recycle': 3600,     # Recycle connections after 1 hour
         'pool_timeout': 30        # Timeout for getting connection from pool
-    }
\ No newline at end of file
+    }
+    # Graph API fetch engine: parallel requests per likes refresh
+    LIKES_FETCH_WORKERS = int(os.getenv("LIKES_FETCH_WORKERS", 8))
+    # Graph client: per-attempt timeouts (s), retries with jittered backoff, total budget per call
+    GRAPH_CONNECT_TIMEOUT = float(os.getenv("GRAPH_CONNECT_TIMEOUT", 3.05))
+    GRAPH_READ_TIMEOUT = float(os.getenv("GRAPH_READ_TIMEOUT", 10))
+    GRAPH_RETRIES = int(os.getenv("GRAPH_RETRIES", 2))
+    GRAPH_RETRY_BACKOFF = float(os.getenv("GRAPH_RETRY_BACKOFF", 0.5))
+    GRAPH_CALL_BUDGET = float(os.getenv("GRAPH_CALL_BUDGET", 20))
+    # circuit breaker: failed calls in a row before Graph is left alone for the cooldown (s)
+    GRAPH_BREAKER_THRESHOLD = int(os.getenv("GRAPH_BREAKER_THRESHOLD", 5))
+    GRAPH_BREAKER_COOLDOWN = float(os.getenv("GRAPH_BREAKER_COOLDOWN", 60))
+    # adaptive likes refresh: base staleness allowed, planner period (> 0), Graph request budget
+    # (per hour for all workers and refreshes together, the planner only uses what is left)
+    LIKES_REFRESH_BASE_MINUTES = int(os.getenv("LIKES_REFRESH_BASE_MINUTES", 360))
+    LIKES_REFRESH_PLAN_MINUTES = int(os.getenv("LIKES_REFRESH_PLAN_MINUTES", 10))
+    LIKES_GRAPH_CALLS_PER_HOUR = int(os.getenv("LIKES_GRAPH_CALLS_PER_HOUR", 120))
+    # admin 'update likes' jobs: failed when their worker stops reporting progress this long (s)
+    LIKES_JOB_LOST_SECONDS = int(os.getenv("LIKES_JOB_LOST_SECONDS", 300))
+    # seconds before the Graph access token is re-read from the config table
+    ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL", 60))
+    # Rendered QR pages cache, shared by all workers on this host
+    PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") == "1"
+    PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(BASE_DIR, "instance", "page_cache.sqlite"))
+    PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", 300))
+    # how often workers check / take over scheduler leadership
+    SCHEDULER_LEADER_CHECK_SECONDS = int(os.getenv("SCHEDULER_LEADER_CHECK_SECONDS", 15))
+    # likes history retention: raw change points, then hourly rollups (daily ones are kept)
+    LIKES_HISTORY_RAW_DAYS = int(os.getenv("LIKES_HISTORY_RAW_DAYS", 3))
+    LIKES_HISTORY_HOURLY_DAYS = int(os.getenv("LIKES_HISTORY_HOURLY_DAYS", 45))
+    # on-demand QR images: rendered files kept on disk, least recently used evicted past the cap
+    QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", os.path.join(BASE_DIR, "instance", "qr_cache"))
+    QR_CACHE_MAX_BYTES = int(os.getenv("QR_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+    # requests slower than this are logged with their slowest SQL statements
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 1000))
+    # bearer token for Prometheus scrapes of /api/metrics (admins can also use their session)
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    # live leaderboard (SSE): open streams per worker, each one pins a thread / greenlet.
+    # Off by default on sync workers, which would be blocked by a single stream.
+    SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", 0 if WORKER_CONCURRENCY == 1 else WORKER_CONCURRENCY // 2))
+    # streams are closed after this and the browser reconnects (frees slots, survives deploys)
+    SSE_STREAM_SECONDS = int(os.getenv("SSE_STREAM_SECONDS", 600))
+    # br / gzip of HTML, JSON, CSV... responses; bodies under COMPRESS_MIN_BYTES are sent as is
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+    COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", 4))
+    # compiled templates shared by the workers, survives worker recycling (max_requests)
+    JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", os.path.join(BASE_DIR, "instance", "jinja_cache"))
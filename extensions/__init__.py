@@ -4,4 +4,18 @@ from apscheduler.schedulers.background import BackgroundScheduler
 
 db = SQLAlchemy()
 migrate = Migrate()
-scheduler = BackgroundScheduler()
\ No newline at end of file
+
+
+def _make_scheduler():
+    # gevent workers: run jobs in greenlets instead of real threads
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched("socket"):
+            from apscheduler.schedulers.gevent import GeventScheduler
+            return GeventScheduler()
+    except ImportError:
+        pass
+    return BackgroundScheduler()
+
+
+scheduler = _make_scheduler()
\ No newline at end of file
@@ -5,6 +5,9 @@ Copyright (c) 2025 - present vip.masmoudiweddingplanner.com
 Gunicorn configuration for production on QNAP TS-264
 """
 
+import os
+import shutil
+
 # Bind to all IP addresses inside the container on port 8000
 bind = '0.0.0.0:8000'
 
@@ -12,8 +15,26 @@ bind = '0.0.0.0:8000'
 # 4 workers is suitable for 4 cores and 8GB RAM of the NAS
 workers = 4
 
-# Worker type (sync is default, good for most Flask apps)
-worker_class = 'sync'
+# Worker type, picked with GUNICORN_PROFILE:
+#   sync    - one request per worker (default)
+#   gthread - GUNICORN_THREADS threads per worker
+#   gevent  - GUNICORN_WORKER_CONNECTIONS greenlets per worker; sockets, threads
+#             and psycopg2 become cooperative, so slow Graph calls don't block scans
+profile = os.getenv("GUNICORN_PROFILE", "sync")
+if profile == "gevent":
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 100))
+    concurrency = worker_connections
+elif profile == "gthread":
+    worker_class = 'gthread'
+    threads = int(os.getenv("GUNICORN_THREADS", 8))
+    concurrency = threads
+else:
+    worker_class = 'sync'
+    concurrency = 1
+
+# config.py sizes the DB pool from this
+os.environ.setdefault("WORKER_CONCURRENCY", str(concurrency))
 
 # Logging configuration
 accesslog = '-'      # log access messages to stdout
@@ -32,3 +53,25 @@ timeout = 120
 # Helps prevent memory leaks
 max_requests = 1000
 max_requests_jitter = 50
+
+# Prometheus multiprocess mode: every worker writes its metrics to files in
+# this folder, /api/metrics merges them. Must be set before the app is imported.
+prometheus_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/vip-prometheus")
+
+
+def on_starting(server):
+    # stale files from a previous run would be merged into the new counters
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    if profile == "gevent":
+        # gunicorn patches the stdlib; psycopg2 is a C extension and needs a wait callback
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
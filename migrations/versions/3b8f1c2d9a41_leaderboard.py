@@ -0,0 +1,39 @@
+"""materialized leaderboard
+
+Revision ID: 3b8f1c2d9a41
+Revises: a1c4e7f90b12
+Create Date: 2026-10-18 11:10:02.418337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8f1c2d9a41'
+down_revision = 'a1c4e7f90b12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_entries',
+    sa.Column('competition_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('full_name', sa.String(length=80), nullable=True),
+    sa.Column('likes_number', sa.Integer(), nullable=True),
+    sa.Column('views_number', sa.Integer(), nullable=True),
+    sa.Column('url', sa.String(length=200), nullable=True),
+    sa.ForeignKeyConstraint(['competition_id'], ['competitions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('competition_id', 'user_id')
+    )
+    op.create_index('ix_leaderboard_entries_competition_rank', 'leaderboard_entries', ['competition_id', 'rank'], unique=False)
+    op.add_column('competitions', sa.Column('participants_count', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('competitions', 'participants_count')
+    op.drop_index('ix_leaderboard_entries_competition_rank', table_name='leaderboard_entries')
+    op.drop_table('leaderboard_entries')
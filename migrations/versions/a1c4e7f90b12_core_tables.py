@@ -0,0 +1,76 @@
+"""users, competitions and user_competition
+
+Revision ID: a1c4e7f90b12
+Revises: 5920667fe708
+Create Date: 2026-10-18 11:05:47.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c4e7f90b12'
+down_revision = '5920667fe708'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # databases created before this revision already have these tables
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('id_qr_code', sa.String(length=120), nullable=False),
+        sa.Column('is_gold', sa.Boolean(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('full_name', sa.String(length=80), nullable=True),
+        sa.Column('phone_number', sa.String(length=20), nullable=True),
+        sa.Column('date_wedding', sa.Date(), nullable=True),
+        sa.Column('lieu_wedding', sa.String(length=120), nullable=True),
+        sa.Column('url', sa.String(length=200), nullable=True),
+        sa.Column('solde_to_pay', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('avance_paid', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('reduction', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('slow_music', sa.String(length=500), nullable=True),
+        sa.Column('in_music', sa.String(length=500), nullable=True),
+        sa.Column('special_music', sa.String(length=500), nullable=True),
+        sa.Column('pnts', sa.Integer(), nullable=True),
+        sa.Column('note', sa.String(length=5000), nullable=True),
+        sa.Column('is_winner', sa.Boolean(), nullable=True),
+        sa.Column('rank', sa.Integer(), nullable=True),
+        sa.Column('likes_number', sa.Integer(), nullable=True),
+        sa.Column('views_number', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id_qr_code')
+        )
+
+    if 'competitions' not in existing:
+        op.create_table('competitions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('start_date', sa.DateTime(), nullable=False),
+        sa.Column('end_date', sa.DateTime(), nullable=False),
+        sa.Column('registration_deadline', sa.DateTime(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('winner_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['winner_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'user_competition' not in existing:
+        op.create_table('user_competition',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('competition_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['competition_id'], ['competitions.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'competition_id')
+        )
+
+
+def downgrade():
+    op.drop_table('user_competition')
+    op.drop_table('competitions')
+    op.drop_table('users')
@@ -0,0 +1,44 @@
+"""background likes refresh jobs
+
+Revision ID: a7d3c5e1f092
+Revises: f2c6a9d8b134
+Create Date: 2026-10-18 21:12:07.318640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3c5e1f092'
+down_revision = 'f2c6a9d8b134'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('likes_refresh_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('competition_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('done', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.Integer(), nullable=False),
+    sa.Column('summary', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['competition_id'], ['competitions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # one active job per competition: concurrent clicks coalesce on it
+    op.create_index('ux_likes_refresh_jobs_active', 'likes_refresh_jobs', ['competition_id'], unique=True,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"))
+
+
+def downgrade():
+    op.drop_index('ux_likes_refresh_jobs_active', table_name='likes_refresh_jobs',
+                  postgresql_where=sa.text("status IN ('queued', 'running')"))
+    op.drop_table('likes_refresh_jobs')
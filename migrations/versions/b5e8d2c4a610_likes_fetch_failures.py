@@ -0,0 +1,26 @@
+"""likes fetch failures for the refresh backoff
+
+Revision ID: b5e8d2c4a610
+Revises: a7d3c5e1f092
+Create Date: 2026-10-18 22:31:18.904215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8d2c4a610'
+down_revision = 'a7d3c5e1f092'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('likes_failed_at', sa.DateTime(), nullable=True))
+    op.add_column('users', sa.Column('likes_failures', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('users', 'likes_failures')
+    op.drop_column('users', 'likes_failed_at')
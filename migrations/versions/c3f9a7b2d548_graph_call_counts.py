@@ -0,0 +1,28 @@
+"""shared Graph call budget counters
+
+Revision ID: c3f9a7b2d548
+Revises: b5e8d2c4a610
+Create Date: 2026-10-18 22:58:44.120397
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f9a7b2d548'
+down_revision = 'b5e8d2c4a610'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('graph_call_counts',
+    sa.Column('minute', sa.DateTime(), nullable=False),
+    sa.Column('calls', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('minute')
+    )
+
+
+def downgrade():
+    op.drop_table('graph_call_counts')
@@ -0,0 +1,44 @@
+"""performance indexes for scheduler and API queries
+
+Revision ID: c7d2e5a8f316
+Revises: 3b8f1c2d9a41
+Create Date: 2026-10-18 11:38:05.117630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e5a8f316'
+down_revision = '3b8f1c2d9a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # joins from a competition to its participants (PK leads with user_id)
+    op.create_index('ix_user_competition_competition_id', 'user_competition', ['competition_id', 'user_id'], unique=False)
+
+    # update_competitions: gold + active users with a video, range on date_wedding
+    op.create_index('ix_users_enrollment_candidates', 'users', ['date_wedding'], unique=False,
+                    postgresql_where=sa.text("is_gold AND is_active AND url IS NOT NULL AND url <> ''"))
+
+    # update_likes (start <= now <= end) and close_competition (end <= now)
+    op.create_index('ix_competitions_active_end_start', 'competitions', ['end_date', 'start_date'], unique=False,
+                    postgresql_where=sa.text('is_active'))
+
+    # update_competitions / create_monthly_competition (registration still open)
+    op.create_index('ix_competitions_active_registration', 'competitions', ['registration_deadline', 'start_date'], unique=False,
+                    postgresql_where=sa.text('is_active'))
+
+    # admin API lists competitions newest first
+    op.create_index('ix_competitions_start_date', 'competitions', ['start_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_competitions_start_date', table_name='competitions')
+    op.drop_index('ix_competitions_active_registration', table_name='competitions')
+    op.drop_index('ix_competitions_active_end_start', table_name='competitions')
+    op.drop_index('ix_users_enrollment_candidates', table_name='users')
+    op.drop_index('ix_user_competition_competition_id', table_name='user_competition')
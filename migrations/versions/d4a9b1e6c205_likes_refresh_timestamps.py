@@ -0,0 +1,26 @@
+"""likes refresh timestamps
+
+Revision ID: d4a9b1e6c205
+Revises: c7d2e5a8f316
+Create Date: 2026-10-18 12:02:41.553907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a9b1e6c205'
+down_revision = 'c7d2e5a8f316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('likes_refreshed_at', sa.DateTime(), nullable=True))
+    op.add_column('users', sa.Column('likes_changed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('users', 'likes_changed_at')
+    op.drop_column('users', 'likes_refreshed_at')
@@ -0,0 +1,34 @@
+"""likes/views history snapshots
+
+Revision ID: e8b3f0a4d917
+Revises: d4a9b1e6c205
+Create Date: 2026-10-18 15:42:17.903261
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f0a4d917'
+down_revision = 'd4a9b1e6c205'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('likes_snapshots',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('resolution', sa.String(length=4), nullable=False),
+    sa.Column('ts', sa.DateTime(), nullable=False),
+    sa.Column('likes_number', sa.Integer(), nullable=False),
+    sa.Column('views_number', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'resolution', 'ts')
+    )
+    op.create_index('ix_likes_snapshots_resolution_ts', 'likes_snapshots', ['resolution', 'ts'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_likes_snapshots_resolution_ts', table_name='likes_snapshots')
+    op.drop_table('likes_snapshots')
@@ -0,0 +1,33 @@
+"""data version counters for admin API ETags
+
+Revision ID: f2c6a9d8b134
+Revises: e8b3f0a4d917
+Create Date: 2026-10-18 18:05:41.552107
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c6a9d8b134'
+down_revision = 'e8b3f0a4d917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_versions = op.create_table('data_versions',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(data_versions, [
+        {'name': 'users', 'version': 0},
+        {'name': 'competitions', 'version': 0},
+        {'name': 'participation', 'version': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('data_versions')
@@ -1,6 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
-from services.facebook_likes import get_video_likes_from_url
+from services.facebook_likes import TransientError, get_video_likes_from_url
+from services.token_provider import access_token_provider
 from extensions import db
 from flask import current_app as app
 
@@ -8,7 +9,9 @@ from flask import current_app as app
 user_competition = db.Table(
     'user_competition',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-    db.Column('competition_id', db.Integer, db.ForeignKey('competitions.id'), primary_key=True)
+    db.Column('competition_id', db.Integer, db.ForeignKey('competitions.id'), primary_key=True),
+    # the PK leads with user_id, joins from a competition need their own index
+    db.Index('ix_user_competition_competition_id', 'competition_id', 'user_id')
 )
 
 
@@ -40,6 +43,12 @@ class User(db.Model):
     rank = db.Column(db.Integer, default=0)  
     likes_number = db.Column(db.Integer, default=0)
     views_number = db.Column(db.Integer, default=0)
+    # refresh bookkeeping (UTC), used by services.refresh_planner
+    likes_refreshed_at = db.Column(db.DateTime, nullable=True)
+    likes_changed_at = db.Column(db.DateTime, nullable=True)
+    # failed fetches in a row for the video itself (removed, invalid...), the planner backs off
+    likes_failed_at = db.Column(db.DateTime, nullable=True)
+    likes_failures = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # competition relationship
     competitions = db.relationship(
@@ -60,11 +69,29 @@ class User(db.Model):
             app.logger.info(f"User {self.id_qr_code} has no URL set.")
             return
         
-        likes, views = get_video_likes_from_url(self.url, app.config["FACEBOOK_ACCESS_TOKEN"])
-        
-        # update likes_number if valid
+        result = access_token_provider.call(get_video_likes_from_url, self.url)
+        self.apply_video_stats(result)
+
+        # commit the changes to DB only once
+        db.session.commit()
+
+    def apply_video_stats(self, result):
+        """Copy a Graph result (likes, views) onto the user, without committing."""
+        if isinstance(result, dict):
+            app.logger.info(f"Error updating likes for user {self.id_qr_code}: {result.get('error')}")
+            if not isinstance(result.get('error'), TransientError):
+                self.likes_failed_at = datetime.utcnow()
+                self.likes_failures = (self.likes_failures or 0) + 1
+            return
+
+        likes, views = result
+        self.likes_refreshed_at = datetime.utcnow()
+        self.likes_failed_at, self.likes_failures = None, 0
+
         # update likes_number if valid
         if isinstance(likes, int):
+            if likes != self.likes_number:
+                self.likes_changed_at = self.likes_refreshed_at
             self.likes_number = likes
         else:
             app.logger.info(f"Error updating likes for user {self.id_qr_code}: {likes}")
@@ -74,14 +101,27 @@ class User(db.Model):
             self.views_number = views
         else:
             app.logger.info(f"Error updating views for user {self.id_qr_code}: {views}")
-
-        # commit the changes to DB only once
-        db.session.commit()
         
        
 
+# enrollment candidates of update_competitions (gold, active, with a video url)
+db.Index(
+    'ix_users_enrollment_candidates',
+    User.date_wedding,
+    postgresql_where=db.and_(User.is_gold, User.is_active, User.url.isnot(None), User.url != '')
+)
+
+
 class Competition(db.Model):
     __tablename__ = 'competitions'
+    __table_args__ = (
+        # scheduler: running (planned likes refresh) and ended (close_competition) competitions
+        db.Index('ix_competitions_active_end_start', 'end_date', 'start_date', postgresql_where=db.text('is_active')),
+        # scheduler: competitions still open for registration (update_competitions, create_monthly)
+        db.Index('ix_competitions_active_registration', 'registration_deadline', 'start_date', postgresql_where=db.text('is_active')),
+        # admin API lists competitions newest first
+        db.Index('ix_competitions_start_date', 'start_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -90,6 +130,9 @@ class Competition(db.Model):
     registration_deadline = db.Column(db.DateTime, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
 
+    # maintained by services.leaderboard when participants or likes change
+    participants_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # winner of the competition (foreign key to User)
     winner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
 
@@ -106,6 +149,107 @@ class Competition(db.Model):
     def __repr__(self):
         return f'<Competition {self.name}>'
 
+class LeaderboardEntry(db.Model):
+    """Materialized standings of a competition, rebuilt after each likes refresh."""
+    __tablename__ = 'leaderboard_entries'
+    __table_args__ = (
+        db.Index('ix_leaderboard_entries_competition_rank', 'competition_id', 'rank'),
+    )
+
+    competition_id = db.Column(db.Integer, db.ForeignKey('competitions.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    rank = db.Column(db.Integer, nullable=False)
+    full_name = db.Column(db.String(80), nullable=True)
+    likes_number = db.Column(db.Integer, default=0)
+    views_number = db.Column(db.Integer, default=0)
+    url = db.Column(db.String(200), nullable=True)
+
+    def __repr__(self):
+        return f'<LeaderboardEntry {self.competition_id} #{self.rank} {self.user_id}>'
+
+class LikesSnapshot(db.Model):
+    """
+    Append-only likes/views history, written only when a refresh changes the values.
+
+    'raw' rows are the change points, 'hour' and 'day' rows hold the last
+    value of each bucket and are maintained by services.likes_history.
+    """
+    __tablename__ = 'likes_snapshots'
+    __table_args__ = (
+        # rollup watermarks and retention deletes
+        db.Index('ix_likes_snapshots_resolution_ts', 'resolution', 'ts'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    resolution = db.Column(db.String(4), primary_key=True)  # 'raw' | 'hour' | 'day'
+    ts = db.Column(db.DateTime, primary_key=True)  # UTC, bucket start for rollups
+    likes_number = db.Column(db.Integer, nullable=False)
+    views_number = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<LikesSnapshot {self.user_id} {self.resolution} {self.ts}>'
+
+class DataVersion(db.Model):
+    """
+    Change counter per entity ('users', 'competitions', 'participation',
+    'standings' for the likes / rank columns of users).
+
+    Bumped in the writing transaction by services.data_versions, read to
+    build the ETags of the admin list APIs.
+    """
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}: {self.version}>'
+
+class GraphCallCount(db.Model):
+    """
+    Graph requests made per minute by likes refreshes, all workers together.
+
+    Read over the last hour by the refresh planner against
+    LIKES_GRAPH_CALLS_PER_HOUR; rows older than a day are dropped.
+    """
+    __tablename__ = 'graph_call_counts'
+
+    minute = db.Column(db.DateTime, primary_key=True)  # UTC, truncated to the minute
+    calls = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<GraphCallCount {self.minute}: {self.calls}>'
+
+class LikesRefreshJob(db.Model):
+    """
+    Admin 'update likes' of a competition, run in the background and polled for progress.
+
+    At most one queued / running job per competition (partial unique index):
+    a second click gets the running job back instead of starting another refresh.
+    """
+    __tablename__ = 'likes_refresh_jobs'
+    __table_args__ = (
+        db.Index('ux_likes_refresh_jobs_active', 'competition_id', unique=True,
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    competition_id = db.Column(db.Integer, db.ForeignKey('competitions.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued, running, done, failed
+    total = db.Column(db.Integer, nullable=False, default=0)
+    done = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Integer, nullable=False, default=0)
+    summary = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # bumped with every progress write: a job whose worker died stops moving
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<LikesRefreshJob {self.id} competition {self.competition_id} {self.status}>'
+
 class config(db.Model):
     __tablename__ = 'config'
 
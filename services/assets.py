@@ -0,0 +1,175 @@
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import click
+from flask import current_app, request, send_from_directory
+from PIL import Image
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped, gzip still works
+    brotli = None
+
+# build output inside the static folder: dist/<path>/<name>.<hash><ext> + manifest.json
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+
+HASH_LENGTH = 12
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt"}
+# smaller files gain nothing from a compressed variant
+MIN_COMPRESS_BYTES = 512
+IMMUTABLE = "public, max-age=31536000, immutable"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest = {}
+
+
+def _optimize_png(data):
+    """Smallest lossless re-encoding: optimized deflate, palette when the colours fit."""
+    image = Image.open(io.BytesIO(data))
+    variants = [image]
+    # at most 256 colours: a palette keeps every pixel, check it anyway
+    if image.mode != "P" and image.getcolors(256) is not None:
+        palette = image.convert("RGBA").quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        if list(palette.convert("RGBA").getdata()) == list(image.convert("RGBA").getdata()):
+            variants.append(palette)
+
+    candidates = [data]
+    for img in variants:
+        out = io.BytesIO()
+        img.save(out, format="PNG", optimize=True)
+        candidates.append(out.getvalue())
+    return min(candidates, key=len)
+
+
+def _compressed_variants(data):
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    # a variant is only worth serving when it is smaller
+    return {ext: body for ext, body in variants.items() if len(body) < len(data)}
+
+
+def build(static_dir):
+    """
+    Fingerprint every static file into static/dist and write the manifest.
+
+    Returns {logical path: fingerprinted path}. Earlier builds are kept, so
+    pages rendered by a previous release keep resolving during a deploy.
+    """
+    dist = os.path.join(static_dir, DIST_DIR)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir) and DIST_DIR in dirs:
+            dirs.remove(DIST_DIR)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            stem, ext = os.path.splitext(logical)
+            with open(source, "rb") as f:
+                data = f.read()
+            if ext.lower() == ".png":
+                data = _optimize_png(data)
+
+            digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+            fingerprinted = f"{DIST_DIR}/{stem}.{digest}{ext}"
+            target = os.path.join(static_dir, fingerprinted)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            outputs = {"": data}
+            if ext.lower() in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES:
+                outputs.update(_compressed_variants(data))
+            for suffix, body in outputs.items():
+                with open(target + suffix, "wb") as f:
+                    f.write(body)
+            manifest[logical] = fingerprinted
+
+    os.makedirs(dist, exist_ok=True)
+    # atomic swap: running workers never read a half written manifest
+    tmp = os.path.join(dist, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(dist, MANIFEST))
+    return manifest
+
+
+def load_manifest(static_dir):
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _fingerprint(endpoint, values):
+    # url_for('static', filename='css/user/competition.css') -> dist/css/user/competition.<hash>.css
+    if endpoint == "static" and values.get("filename") in _manifest:
+        values["filename"] = _manifest[values["filename"]]
+
+
+def _is_fingerprinted():
+    return request.endpoint == "static" and (request.view_args or {}).get("filename", "").startswith(DIST_DIR + "/")
+
+
+def _serve_precompressed():
+    """Send the .br / .gz variant built next to a fingerprinted file when the client accepts it."""
+    if not _is_fingerprinted():
+        return None
+    filename = request.view_args["filename"]
+    if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE:
+        return None
+    for encoding, suffix in ENCODINGS:
+        if not request.accept_encodings[encoding]:
+            continue
+        if not os.path.isfile(os.path.join(current_app.static_folder, filename + suffix)):
+            continue
+        response = send_from_directory(
+            current_app.static_folder, filename + suffix,
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        )
+        response.headers["Content-Encoding"] = encoding
+        return response
+    return None
+
+
+def _cache_headers(response):
+    if _is_fingerprinted() and response.status_code in (200, 206, 304):
+        # the name changes with the content: browsers never need to revalidate
+        response.headers["Cache-Control"] = IMMUTABLE
+        if os.path.splitext(request.view_args["filename"])[1].lower() in COMPRESSIBLE:
+            response.vary.add("Accept-Encoding")
+    return response
+
+
+@click.command("build-assets")
+def build_assets_command():
+    """Fingerprint and pre-compress static files into static/dist."""
+    manifest = build(current_app.static_folder)
+    click.echo(f"{len(manifest)} assets written to {os.path.join(current_app.static_folder, DIST_DIR)}")
+
+
+def init_app(app):
+    """Fingerprinted url_for('static', ...) once `build-assets` ran, plain static files otherwise (dev)."""
+    _manifest.clear()
+    _manifest.update(load_manifest(app.static_folder))
+    app.url_defaults(_fingerprint)
+    app.before_request(_serve_precompressed)
+    app.after_request(_cache_headers)
+    app.cli.add_command(build_assets_command)
+
+
+def main(argv=None):
+    # build.sh runs this without importing the app (no DB / scheduler needed)
+    parser = argparse.ArgumentParser(description="Fingerprint and pre-compress static files.")
+    parser.add_argument("static_dir", nargs="?", default=os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), "static"))
+    args = parser.parse_args(argv)
+    manifest = build(args.static_dir)
+    print(f"{len(manifest)} assets written to {os.path.join(args.static_dir, DIST_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
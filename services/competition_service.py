@@ -2,8 +2,13 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from dateutil.relativedelta import relativedelta
 from extensions import db
-from models import Competition, User
+from models import Competition, User, user_competition
 from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from services.likes_fetcher import refresh_users_likes
+from services.leaderboard import rebuild_leaderboard
+from services.ranking import top_n
+from services import data_versions, page_cache
 
 TUNIS_TZ = ZoneInfo("Africa/Tunis")
 DURATION_COMPETITION = 1
@@ -12,31 +17,56 @@ def now_tunis():
     return datetime.now(TUNIS_TZ)
 
 
-def update_likes(app):
-    with app.app_context():
-        try:
-            now = now_tunis()
-            active_competitions = Competition.query.options(
-                db.joinedload(Competition.users)
-            ).filter(
-                Competition.is_active == True,
-                Competition.start_date <= now,
-                Competition.end_date >= now
-            ).all()
-            
-            for comp in active_competitions:
-                for user in comp.users:
-                    try:
-                        user.update_likes_number()
-                    except Exception as e:
-                        app.logger.error(f"Error updating likes for user {user.id}: {e}")
-            
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            app.logger.error(f"Error in update_likes: {e}")
-        finally:
-            db.session.remove()  # ✅ Clean up session
+def naive_local(now):
+    """
+    Tunis wall-clock time without tzinfo, like the competition dates in the DB.
+
+    An aware value is sent as timestamptz: Postgres would compare the naive
+    columns in the session time zone (UTC, an hour off) instead of as is.
+    """
+    return now.astimezone(TUNIS_TZ).replace(tzinfo=None) if now.tzinfo else now
+
+
+# Query shapes of the scheduler jobs, shared with services.query_plans (EXPLAIN check)
+def running_competitions_filter(now):
+    now = naive_local(now)
+    return (
+        Competition.is_active == True,
+        Competition.start_date <= now,
+        Competition.end_date >= now
+    )
+
+
+def open_registration_filter(now):
+    now = naive_local(now)
+    return (
+        Competition.is_active == True,
+        Competition.start_date <= now,
+        Competition.registration_deadline > now
+    )
+
+
+def ending_competitions_filter(now):
+    now = naive_local(now)
+    return (
+        Competition.is_active == True,
+        Competition.end_date <= now
+    )
+
+
+def eligible_users_filter(comp, now):
+    now = naive_local(now)
+    return (
+        User.is_gold == True,
+        User.is_active == True,
+        User.date_wedding.isnot(None),
+        User.date_wedding >= comp.start_date,
+        User.date_wedding <= now,
+        User.date_wedding < comp.registration_deadline,
+        User.url.isnot(None),
+        User.url != '',
+        ~User.competitions.any(and_(*open_registration_filter(now)))
+    )
 
 
 def create_monthly_competition(app):
@@ -74,41 +104,43 @@ def create_monthly_competition(app):
             db.session.remove()  # ✅ Clean up session
 
 
+def enroll_eligible_users(comp, now):
+    """
+    Enroll every eligible user in `comp` with one INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+
+    No User objects are loaded. Returns the QR codes of the newly enrolled users.
+    """
+    candidates = db.select(User.id, db.literal(comp.id)).where(*eligible_users_filter(comp, now))
+    inserted = pg_insert(user_competition).from_select(
+        ['user_id', 'competition_id'], candidates
+    ).on_conflict_do_nothing().returning(user_competition.c.user_id).cte('inserted')
+
+    added = db.session.execute(
+        db.select(User.id_qr_code).join(inserted, inserted.c.user_id == User.id)
+    ).scalars().all()
+    if added:
+        # the INSERT hides in a CTE of a SELECT, not seen by the ORM events
+        data_versions.touch("participation")
+    return added
+
+
 def update_competitions(app):
     with app.app_context():
         try:
             now = now_tunis()
-            competitions = Competition.query.options(
-                db.joinedload(Competition.users)
-            ).filter(
-                Competition.is_active == True,
-                Competition.start_date <= now,
-                Competition.registration_deadline > now
-            ).all()
+            competitions = Competition.query.filter(*open_registration_filter(now)).all()
             
+            total_added = 0
             for comp in competitions:
-                eligible_users = User.query.filter(
-                    User.is_gold == True,
-                    User.is_active == True,
-                    User.date_wedding.isnot(None),
-                    User.date_wedding >= comp.start_date,
-                    User.date_wedding <= now,
-                    User.date_wedding < comp.registration_deadline,
-                    User.url.isnot(None),
-                    User.url != '',
-                    ~User.competitions.any(and_(
-                        Competition.is_active == True,
-                        Competition.start_date <= now,
-                        Competition.registration_deadline > now    
-                    ))  
-                ).all()
-                
-                for user in eligible_users:
-                    if user not in comp.users:
-                        comp.users.append(user)
+                added = enroll_eligible_users(comp, now)
+                total_added += len(added)
+
+                if added:
+                    rebuild_leaderboard(comp.id)
+                    page_cache.invalidate_on_commit(qr_ids=added)
             
             db.session.commit()  # ✅ Single commit after all changes
-            app.logger.info("Competitions updated with eligible users.")
+            app.logger.info(f"Competitions updated with eligible users ({total_added} enrolled).")
         except Exception as e:
             db.session.rollback()
             app.logger.error(f"Error updating competitions: {e}")
@@ -122,34 +154,25 @@ def close_competition(app):
             now = now_tunis()
             competitions_to_close = Competition.query.options(
                 db.joinedload(Competition.users)
-            ).filter(
-                Competition.is_active == True,
-                Competition.end_date <= now
-            ).all()
+            ).filter(*ending_competitions_filter(now)).order_by(Competition.end_date).all()  # oldest first
             
             for comp in competitions_to_close:
-                # ✅ Fixed: Pass app parameter
-                update_likes(app)
-                
-                users_sorted = sorted(
-                    [u for u in comp.users if u.likes_number is not None],
-                    key=lambda u: u.likes_number,
-                    reverse=True
-                )
+                # final likes refresh for this competition only (batched Graph calls)
+                refresh_users_likes(app, comp.users)
                 
                 # Reset all users
-                for u in comp.users:
-                    u.is_winner = False
-                
-                # Set winner
-                if users_sorted:
-                    winner = users_sorted[0]
-                    comp.winner_id = winner.id
-                    winner.is_winner = True
+                User.query.filter(User.competitions.any(Competition.id == comp.id)).update(
+                    {'is_winner': False}, synchronize_session=False
+                )
                 
-                # Set ranks
-                for idx, user in enumerate(users_sorted, start=1):
-                    user.rank = idx
+                # Set ranks (final standings) and winner, computed in SQL
+                rebuild_leaderboard(comp.id)
+                top = top_n(comp.id, 1)
+                if top:
+                    comp.winner_id = top[0].user_id
+                    User.query.filter_by(id=top[0].user_id).update(
+                        {'is_winner': True}, synchronize_session=False
+                    )
                 
                 comp.is_active = False
             
@@ -0,0 +1,93 @@
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# dynamic responses worth compressing (SSE, images and already encoded bodies are left alone)
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/plain", "text/css", "text/csv", "text/javascript",
+    "application/json", "application/javascript", "application/x-ndjson", "image/svg+xml",
+}
+
+_settings = {"enabled": True, "min_bytes": 1024, "gzip_level": 6, "br_quality": 4}
+
+
+def _encoding():
+    """'br' or 'gzip' from Accept-Encoding (client preference first, br on ties), None for identity."""
+    accepted = request.accept_encodings
+    candidates = [("br", accepted["br"])] if brotli is not None else []
+    candidates.append(("gzip", accepted["gzip"]))
+    encoding, quality = max(candidates, key=lambda c: c[1])
+    return encoding if quality > 0 else None
+
+
+def _compressor(encoding):
+    """(compress, flush, finish) callables for a streamed body."""
+    if encoding == "br":
+        c = brotli.Compressor(quality=_settings["br_quality"])
+        return c.process, c.flush, c.finish
+    c = zlib.compressobj(_settings["gzip_level"], zlib.DEFLATED, 31)  # 31: gzip container
+    return c.compress, lambda: c.flush(zlib.Z_SYNC_FLUSH), c.flush
+
+
+def _compress_stream(chunks, encoding):
+    compress, flush, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()  # what werkzeug does for str chunks
+            # flushed per chunk: the client keeps receiving rows as they are produced
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _compress(response):
+    if not _settings["enabled"] or request.method == "HEAD":
+        return response
+    if response.status_code != 200 or response.direct_passthrough or "Content-Encoding" in response.headers:
+        return response
+    if response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < _settings["min_bytes"]:
+            return response
+        if encoding == "br":
+            body = brotli.compress(body, quality=_settings["br_quality"])
+        else:
+            body = gzip.compress(body, compresslevel=_settings["gzip_level"], mtime=0)
+        response.set_data(body)
+
+    response.headers["Content-Encoding"] = encoding
+    # other bytes than the identity body: a strong validator would lie (RFC 9110 8.8.1)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    _settings["enabled"] = app.config["COMPRESS_ENABLED"]
+    _settings["min_bytes"] = app.config["COMPRESS_MIN_BYTES"]
+    _settings["gzip_level"] = app.config["COMPRESS_GZIP_LEVEL"]
+    _settings["br_quality"] = app.config["COMPRESS_BR_QUALITY"]
+    app.after_request(_compress)
@@ -0,0 +1,149 @@
+import hashlib
+from functools import wraps
+from itertools import chain
+from flask import current_app, request
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from extensions import db
+from models import DataVersion
+
+# tables feeding the admin lists -> version bumped when they are written
+TRACKED_TABLES = {
+    "users": "users",
+    "competitions": "competitions",
+    "user_competition": "participation",
+}
+
+# user attributes only the competition standings show: written by every likes refresh,
+# they bump 'standings' instead of invalidating the whole users list
+STANDINGS_ATTRIBUTES = {
+    "rank", "likes_number", "views_number", "is_winner",
+    "likes_refreshed_at", "likes_changed_at", "likes_failed_at", "likes_failures",
+}
+
+_PENDING = "data_versions_pending"
+
+
+def touch(*names):
+    """
+    Bump `names` when the current transaction commits.
+
+    ORM flushes and ORM update/delete/insert statements are tracked
+    automatically; raw SQL (text(), COPY, CTE inserts) must call this.
+    Bulk statements can name their version with the `data_version`
+    execution option.
+    """
+    db.session.info.setdefault(_PENDING, set()).update(names)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    # new / dirty / deleted still hold the pre-flush state here
+    pending = set()
+    dirty, deleted = session.dirty, session.deleted
+    for obj in chain(session.new, dirty, deleted):
+        state = inspect(obj)
+        name = TRACKED_TABLES.get(getattr(state.mapper.local_table, "name", None))
+        if name is None:
+            continue
+        if obj in dirty:
+            if not session.is_modified(obj):
+                continue
+            changed = {
+                attr.key for attr in state.attrs
+                if attr.key in state.mapper.column_attrs and attr.history.has_changes()
+            }
+            if name == "users" and changed and changed <= STANDINGS_ATTRIBUTES:
+                name = "standings"
+        pending.add(name)
+        for rel in state.mapper.relationships:
+            # many-to-many collections write the association table
+            secondary = TRACKED_TABLES.get(getattr(rel.secondary, "name", None))
+            if secondary and (obj in deleted or state.attrs[rel.key].history.has_changes()):
+                pending.add(secondary)
+    if pending:
+        session.info.setdefault(_PENDING, set()).update(pending)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    name = orm_execute_state.execution_options.get("data_version") or TRACKED_TABLES.get(
+        getattr(orm_execute_state.statement.table, "name", None)
+    )
+    if not name:
+        return
+    result = orm_execute_state.invoke_statement()
+    # a statement that matched no row leaves the cached lists valid (-1: count unknown)
+    if getattr(result, "rowcount", -1) != 0:
+        orm_execute_state.session.info.setdefault(_PENDING, set()).add(name)
+    return result
+
+
+@event.listens_for(Session, "before_commit")
+def _bump(session):
+    # bumped inside the writing transaction: a version is never newer than the data
+    session.flush()
+    names = session.info.pop(_PENDING, None)
+    if not names:
+        return
+    # sorted: concurrent writers lock the rows in the same order
+    stmt = pg_insert(DataVersion).values([{"name": name, "version": 1} for name in sorted(names)])
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=[DataVersion.name], set_={"version": DataVersion.version + 1}
+    ))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop(_PENDING, None)
+
+
+def current(*names):
+    """{name: version} in one indexed lookup (0 for names never bumped)."""
+    rows = db.session.execute(
+        db.select(DataVersion.name, DataVersion.version).where(DataVersion.name.in_(names))
+    ).all()
+    versions = dict.fromkeys(names, 0)
+    versions.update(rows)
+    return versions
+
+
+def etag_for(*names):
+    """
+    Strong ETag of a GET response built from the `names` tables.
+
+    The versions are read before the view queries the data, so a write
+    landing in between gives newer data under an older tag: the next
+    request just misses. Arguments are part of the tag (fields, paging).
+    """
+    versions = current(*names)
+    key = ".".join(str(versions[name]) for name in names)
+    digest = hashlib.sha256(request.full_path.encode()).hexdigest()[:16]
+    return f"{key}-{digest}"
+
+
+def conditional(*names):
+    """Serve GETs of the decorated view with an ETag; 304 before any ORM work when unchanged."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+
+            etag = etag_for(*names)
+            # weak comparison (RFC 9110): compression marks the tag weak on the way out
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # cached by the browser, revalidated on every fetch()
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
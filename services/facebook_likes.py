@@ -1,45 +1,377 @@
+import json
+import os
+import random
 import re
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from services import metrics
+
+GRAPH_API_URL = os.getenv("GRAPH_API_URL", "https://graph.facebook.com/v24.0")
+
+# Graph API accepts at most 50 IDs per multi-ID request
+GRAPH_MAX_IDS_PER_REQUEST = 50
+
+# Graph error codes meaning the access token is invalid, expired or revoked
+GRAPH_AUTH_ERROR_CODES = {102, 190}
+
+# Graph "temporary issue / service unavailable" codes, worth a retry (rate limits are not:
+# graph_usage and the refresh planner back off from those)
+GRAPH_TRANSIENT_ERROR_CODES = {1, 2}
+
+# HTTP statuses retried when Graph (or a proxy in front of it) fails without a JSON error
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+# timeouts, retries and circuit breaker, set from the app config by configure_graph_client
+_client = {
+    "connect_timeout": 3.05,
+    "read_timeout": 10.0,
+    "retries": 2,
+    "backoff_s": 0.5,
+    "max_backoff_s": 4.0,
+    "budget_s": 20.0,
+}
+
+# shared keep-alive session, reused by every Graph call (thread-safe for GETs)
+http_session = requests.Session()
+
+
+class GraphUsage:
+    """
+    Latest rate-limit usage reported by Graph in X-App-Usage and
+    X-Business-Use-Case-Usage headers (percentages of the quota).
+    """
+
+    def __init__(self):
+        self.percent = 0
+        self.blocked_until = 0.0
+        self.updated_at = None
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        values, regain_minutes = [], 0
+        app_usage = headers.get("X-App-Usage")
+        if app_usage:
+            try:
+                values.extend(v for v in json.loads(app_usage).values() if isinstance(v, (int, float)))
+            except ValueError:
+                pass
+        buc_usage = headers.get("X-Business-Use-Case-Usage")
+        if buc_usage:
+            try:
+                for entries in json.loads(buc_usage).values():
+                    for entry in entries:
+                        values.extend(entry.get(k, 0) for k in ("call_count", "total_time", "total_cputime"))
+                        regain_minutes = max(regain_minutes, entry.get("estimated_time_to_regain_access", 0))
+            except (ValueError, AttributeError):
+                pass
+        if not values and not regain_minutes:
+            return
+        with self._lock:
+            self.percent = max(values, default=0)
+            self.updated_at = time.time()
+            if regain_minutes:
+                self.blocked_until = max(self.blocked_until, time.time() + regain_minutes * 60)
+
+    def snapshot(self):
+        return {
+            "percent": self.percent,
+            "blocked_for_s": max(0, round(self.blocked_until - time.time())),
+            "updated_at": self.updated_at,
+        }
+
+
+graph_usage = GraphUsage()
+
+
+class GraphUnavailable(Exception):
+    """Graph could not be reached (timeouts, 5xx, circuit open): keep the last known values."""
+
+
+class TransientError(str):
+    """
+    Error message of a failure that says nothing about the video (Graph
+    unreachable, token rejected): the user stays due, without error backoff.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stop calling Graph after `threshold` failed calls in a row.
+
+    Open: calls fail at once for `cooldown` seconds. Then one probe is let
+    through (half open); its success closes the circuit, its failure opens
+    it again. Per worker process, like the connection pool.
+    """
+
+    def __init__(self, threshold=5, cooldown=60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.opened_count = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def available(self):
+        """Would a call go through now (no state change)."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                return time.monotonic() - self.opened_at >= self.cooldown
+            return not self._probing
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures, self._probing = "closed", 0, False
+        metrics.observe_graph_circuit(False)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.opened_count += 1
+                self.state, self.opened_at = "open", time.monotonic()
+            is_open = self.state == "open"
+        metrics.observe_graph_circuit(is_open)
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = 0
+            if self.state == "open":
+                retry_in = max(0, round(self.cooldown - (time.monotonic() - self.opened_at)))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retry_in_s": retry_in,
+                "opened_count": self.opened_count,
+                "pid": os.getpid(),
+            }
+
+
+graph_circuit = CircuitBreaker()
+
+
+def _graph_get(url, params):
+    """
+    GET a Graph endpoint with bounded latency.
+
+    (connect, read) timeouts on every attempt, full-jitter retries for
+    network errors, 5xx and transient Graph errors, all within `budget_s`.
+    Raises GraphUnavailable when the retries are exhausted or the circuit
+    is open. Graph answers (data or API errors) are returned as is.
+    """
+    kind = "batch" if "ids" in params else "single"
+    if not graph_circuit.allow():
+        metrics.observe_graph(kind, None, "circuit_open")
+        raise GraphUnavailable("Graph API circuit open")
+
+    timeout = (_client["connect_timeout"], _client["read_timeout"])
+    deadline = time.monotonic() + _client["budget_s"]
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            response = http_session.get(url, params=params, timeout=timeout)
+            graph_usage.update(response.headers)
+            if response.status_code in RETRYABLE_STATUSES:
+                reason, failure = "http", f"HTTP {response.status_code}"
+            else:
+                data = response.json()
+                error = data.get("error") if isinstance(data, dict) else None
+                if error and (error.get("is_transient") or error.get("code") in GRAPH_TRANSIENT_ERROR_CODES):
+                    reason, failure = "transient", error.get("message", "Graph API transient error")
+                else:
+                    reason = None
+                    if error:
+                        reason = "auth" if error.get("code") in GRAPH_AUTH_ERROR_CODES else "api"
+                    metrics.observe_graph(kind, time.perf_counter() - started, reason)
+                    graph_circuit.record_success()  # Graph answered, even with an error
+                    return data
+        except requests.Timeout as e:
+            reason, failure = "timeout", str(e)
+        except (requests.RequestException, ValueError) as e:  # ValueError: not JSON (proxy error page)
+            reason, failure = "http", str(e)
+        metrics.observe_graph(kind, time.perf_counter() - started, reason)
+
+        attempt += 1
+        delay = random.uniform(0, min(_client["max_backoff_s"], _client["backoff_s"] * 2 ** attempt))
+        if attempt > _client["retries"] or time.monotonic() + delay + _client["read_timeout"] > deadline:
+            graph_circuit.record_failure()
+            raise GraphUnavailable(failure)
+        time.sleep(delay)
+
+
+def configure_http_session(pool_size):
+    """Size the connection pool so every fetch worker keeps its own socket alive."""
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    http_session.mount("https://", adapter)
+    http_session.mount("http://", adapter)
+
+
+def configure_graph_client(config):
+    configure_http_session(config["LIKES_FETCH_WORKERS"])
+    _client.update(
+        connect_timeout=config["GRAPH_CONNECT_TIMEOUT"],
+        read_timeout=config["GRAPH_READ_TIMEOUT"],
+        retries=config["GRAPH_RETRIES"],
+        backoff_s=config["GRAPH_RETRY_BACKOFF"],
+        budget_s=config["GRAPH_CALL_BUDGET"],
+    )
+    graph_circuit.threshold = config["GRAPH_BREAKER_THRESHOLD"]
+    graph_circuit.cooldown = config["GRAPH_BREAKER_COOLDOWN"]
+
+
+class GraphAuthError(Exception):
+    """The Graph API rejected the access token (rotated or expired)."""
+
+
+def _raise_for_auth_error(data):
+    error = data.get("error") if isinstance(data, dict) else None
+    # not every OAuthException is an auth problem (bad IDs are too), go by code
+    if error and error.get("code") in GRAPH_AUTH_ERROR_CODES:
+        raise GraphAuthError(error.get("message", "Invalid access token"))
+
+
+def extract_video_id(video_url):
+    match = re.search(r"(\d{8,})", video_url or "")
+    return match.group(1) if match else None
+
+
+def parse_video_insights(data):
+    """Return (total_reactions, views) from a Graph `video_insights` payload."""
+    total_reactions = 0
+    views = 0
+
+    # Navigate through the nested structure
+    video_insights = data.get("video_insights", {}).get("data", [])
+
+    for item in video_insights:
+        if item["name"] == "post_video_likes_by_reaction_type":
+            reactions = item["values"][0].get("value", {})
+            total_reactions = sum(reactions.values())
+        elif item["name"] == "fb_reels_total_plays":
+            views = item["values"][0].get("value", 0)
+
+    return total_reactions, views
+
 
 def get_video_likes_from_url(video_url, ACCESS_TOKEN):
     # Extract video ID from the URL
-    match = re.search(r"(\d{8,})", video_url)
-    if not match:
+    video_id = extract_video_id(video_url)
+    if not video_id:
         return {"error": "Invalid video URL"}
 
-    video_id = match.group(1)
-    #print("Video ID:", video_id)
-    
     # Updated URL to match your working curl command
-    url = f"https://graph.facebook.com/v24.0/{video_id}"
+    url = f"{GRAPH_API_URL}/{video_id}"
     params = {
         "fields": "video_insights",
         "access_token": ACCESS_TOKEN
     }
 
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
-
-        total_reactions = 0
-        views = 0
-
-        # Navigate through the nested structure
-        video_insights = data.get("video_insights", {}).get("data", [])
-        
-        for item in video_insights:
-            if item["name"] == "post_video_likes_by_reaction_type":
-                reactions = item["values"][0].get("value", {})
-                # print("Reactions:", reactions)
-                total_reactions = sum(reactions.values())
-            elif item["name"] == "fb_reels_total_plays":
-                views = item["values"][0].get("value", 0)
-                # print("Views:", views)
-
-        return total_reactions, views
-        
+        data = _graph_get(url, params)
+    except GraphUnavailable as e:
+        return {"error": TransientError(e)}
+    except Exception as e:
+        return {"error": str(e)}
+
+    _raise_for_auth_error(data)
+    if "error" in data:
+        return {"error": data["error"].get("message", "Graph API error")}
 
+    try:
+        return parse_video_insights(data)
     except Exception as e:
-        # print("Error:", str(e))
         return {"error": str(e)}
-    
\ No newline at end of file
+
+
+def _named_video_ids(message, video_ids):
+    """IDs of the request that a Graph error message names (deleted / foreign videos)."""
+    return set(re.findall(r"\d{8,}", message)) & set(video_ids)
+
+
+def get_video_stats_batch(video_ids, ACCESS_TOKEN, allow_request=None):
+    """
+    Fetch up to GRAPH_MAX_IDS_PER_REQUEST videos in one multi-ID request.
+
+    Returns (stats, errors, requests_made): {video_id: (reactions, plays)},
+    {video_id: message} and the number of HTTP requests made. Graph rejects
+    the whole request when a single ID is bad: the IDs named in the error
+    are dropped and the rest retried, a rejection naming none is split in
+    halves until the bad ID is alone. Raises GraphAuthError when the token
+    is rejected. When Graph is unavailable every ID not fetched yet is
+    reported in errors (TransientError), without retrying. So are they when
+    `allow_request()` refuses a request (the caller's request limit).
+    """
+    stats, errors = {}, {}
+    requests_made = 0
+    pending = [list(video_ids)]
+
+    while pending:
+        ids = pending.pop()
+        if allow_request and not allow_request():
+            for video_id in ids + [v for chunk in pending for v in chunk]:
+                errors[video_id] = TransientError("Graph request limit reached")
+            break
+        params = {
+            "ids": ",".join(ids),
+            "fields": "video_insights",
+            "access_token": ACCESS_TOKEN
+        }
+        requests_made += 1
+        try:
+            data = _graph_get(f"{GRAPH_API_URL}/", params)
+        except GraphUnavailable as e:
+            # more requests would only hammer an API that is down
+            for video_id in ids + [v for chunk in pending for v in chunk]:
+                errors[video_id] = TransientError(e)
+            break
+
+        _raise_for_auth_error(data)
+        if "error" in data:
+            message = data["error"].get("message", "Graph API error")
+            bad = _named_video_ids(message, ids) if len(ids) > 1 else set(ids)
+            if bad:
+                errors.update((video_id, message) for video_id in bad)
+                rest = [v for v in ids if v not in bad]
+                if rest:
+                    pending.append(rest)
+            else:
+                half = len(ids) // 2
+                pending += [ids[half:], ids[:half]]
+            continue
+
+        for video_id in ids:
+            item = data.get(video_id)
+            if item is None:
+                errors[video_id] = "Missing from Graph response"
+                continue
+            try:
+                stats[video_id] = parse_video_insights(item)
+            except Exception as e:
+                errors[video_id] = str(e)
+
+    return stats, errors, requests_made
+
+
+def chunk_video_ids(urls, size=GRAPH_MAX_IDS_PER_REQUEST):
+    """Map urls to unique video IDs and split them into multi-ID request chunks."""
+    video_ids = list(dict.fromkeys(v for v in map(extract_video_id, urls) if v))
+    return [video_ids[i:i + size] for i in range(0, len(video_ids), size)]
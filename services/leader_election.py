@@ -0,0 +1,124 @@
+import atexit
+import os
+import socket
+import threading
+from functools import wraps
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from extensions import db
+
+# Postgres advisory lock held by the worker that runs the scheduler jobs.
+# Below 2**31 so pg_locks reports it as classid 0 / objid SCHEDULER_LOCK_ID.
+SCHEDULER_LOCK_ID = 482750101
+
+_HOLDS_LOCK_SQL = db.text(
+    "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' "
+    "AND classid = 0 AND objid = :key AND objsubid = 1 "
+    "AND pid = pg_backend_pid() AND granted"
+)
+
+_HOLDER_SQL = db.text(
+    "SELECT a.pid, a.application_name, a.client_addr::text AS client_addr, a.backend_start "
+    "FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid "
+    "WHERE l.locktype = 'advisory' AND l.classid = 0 AND l.objid = :key "
+    "AND l.objsubid = 1 AND l.granted"
+)
+
+
+class SchedulerLeader:
+    """
+    Elect one process (across all gunicorn workers and hosts) to run the scheduler jobs.
+
+    Every worker tries pg_try_advisory_lock on a dedicated, unpooled
+    connection. The winner keeps that connection open, so the lock lives as
+    long as the process: when the leader dies Postgres drops its session,
+    the lock is released and another worker takes over on its next check.
+    """
+
+    def __init__(self):
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+        self._engine = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+        # dedicated engine: closing the connection must really end the session (and the lock)
+        self._engine = create_engine(
+            db.engine.url,
+            poolclass=NullPool,
+            connect_args={"application_name": f"vip-scheduler {self.identity}"}
+        )
+        # graceful worker exit hands leadership over immediately
+        atexit.register(self.release)
+
+    @property
+    def is_leader(self):
+        return self._conn is not None
+
+    def _drop(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    def check(self):
+        """Confirm or try to take leadership. Returns True when this process is the leader."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    held = self._conn.execute(_HOLDS_LOCK_SQL, {"key": SCHEDULER_LOCK_ID}).scalar()
+                    self._conn.commit()
+                    if held:
+                        return True
+                except Exception:
+                    pass
+                self._drop()
+
+            conn = None
+            try:
+                conn = self._engine.connect()
+                acquired = conn.execute(
+                    db.text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_ID}
+                ).scalar()
+                conn.commit()  # session-level lock survives the transaction
+            except Exception:
+                acquired = False
+            if acquired:
+                self._conn = conn
+                return True
+            if conn is not None:
+                conn.close()
+            return False
+
+    def release(self):
+        with self._lock:
+            self._drop()
+
+    def holder(self):
+        """Describe the backend currently holding the scheduler lock (any worker, any host)."""
+        row = db.session.execute(_HOLDER_SQL, {"key": SCHEDULER_LOCK_ID}).first()
+        if row is None:
+            return None
+        return {
+            "backend_pid": row.pid,
+            "worker": row.application_name.replace("vip-scheduler ", "", 1),
+            "client_addr": row.client_addr,
+            "since": row.backend_start.isoformat() if row.backend_start else None,
+        }
+
+
+scheduler_leader = SchedulerLeader()
+
+
+def leader_only(func):
+    """Wrap a scheduler job so it only runs in the elected worker."""
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        # re-check right before running: a silently dropped connection loses the lock
+        if not scheduler_leader.check():
+            return None
+        return func(*args, **kwargs)
+    return wrapped
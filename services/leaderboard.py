@@ -0,0 +1,43 @@
+from extensions import db
+from models import Competition, LeaderboardEntry
+from services.ranking import apply_ranks, ranked_participants
+from services import leaderboard_events, page_cache
+
+TOP_ENTRIES = 10
+
+LEADERBOARD_COLUMNS = ['competition_id', 'user_id', 'rank', 'full_name', 'likes_number', 'views_number', 'url']
+
+
+def rebuild_leaderboard(competition_id):
+    """
+    Recompute ranks of a competition and store them as derived state.
+
+    Writes `users.rank`, the `leaderboard_entries` rows and
+    `competitions.participants_count`. Runs when likes or participants
+    change, never on the read path. Ranking happens in Postgres, no User
+    objects are loaded. The caller commits.
+    """
+    ranked = ranked_participants(competition_id)
+
+    LeaderboardEntry.query.filter_by(competition_id=competition_id).delete(synchronize_session=False)
+    inserted = db.session.execute(
+        db.insert(LeaderboardEntry).from_select(
+            LEADERBOARD_COLUMNS,
+            db.select(*(ranked.c[name] for name in LEADERBOARD_COLUMNS))
+        )
+    ).rowcount
+    apply_ranks(competition_id)
+
+    Competition.query.filter(
+        Competition.id == competition_id, Competition.participants_count != inserted
+    ).update({'participants_count': inserted}, synchronize_session=False)
+    page_cache.invalidate_on_commit(competition_ids=[competition_id])
+    # live pages of every worker reload the top entries once this commits
+    leaderboard_events.notify_changed(competition_id)
+    return inserted
+
+
+def get_top_entries(competition_id, limit=TOP_ENTRIES):
+    return LeaderboardEntry.query.filter_by(
+        competition_id=competition_id
+    ).order_by(LeaderboardEntry.rank, LeaderboardEntry.user_id).limit(limit).all()
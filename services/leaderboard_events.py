@@ -0,0 +1,214 @@
+import json
+import os
+import queue
+import select
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from extensions import db
+from models import Competition, LeaderboardEntry
+
+# Postgres channel, payload is the competition id
+CHANNEL = "leaderboard_changed"
+
+LIVE_TOP_ENTRIES = 10
+HEARTBEAT_SECONDS = 15
+
+
+def notify_changed(competition_id):
+    """
+    Announce a rebuilt leaderboard to every worker.
+
+    NOTIFY is transactional: Postgres delivers it when the caller commits
+    and drops it on rollback, so listeners never see uncommitted ranks.
+    """
+    db.session.execute(
+        db.text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": CHANNEL, "payload": str(competition_id)}
+    )
+
+
+def load_standings(competition_id):
+    """(participants_count, {user_id: entry}) of a competition's top entries, None if unknown."""
+    count = db.session.execute(
+        db.select(Competition.participants_count).where(Competition.id == competition_id)
+    ).scalar()
+    if count is None:
+        return None
+    rows = db.session.execute(
+        db.select(LeaderboardEntry).where(
+            LeaderboardEntry.competition_id == competition_id
+        ).order_by(LeaderboardEntry.rank, LeaderboardEntry.user_id).limit(LIVE_TOP_ENTRIES)
+    ).scalars()
+    entries = {
+        e.user_id: {
+            "user_id": e.user_id,
+            "rank": e.rank,
+            "name": e.full_name,
+            "likes": e.likes_number,
+            "views": e.views_number,
+            "url": e.url,
+        }
+        for e in rows
+    }
+    return count, entries
+
+
+def standings_delta(old, new):
+    """Entries added or changed since `old`, and user ids that left the top."""
+    old_entries = old[1]
+    count, entries = new
+    return {
+        "participants_count": count,
+        "upserts": [e for uid, e in entries.items() if old_entries.get(uid) != e],
+        "removed": [uid for uid in old_entries if uid not in entries],
+    }
+
+
+class LeaderboardBroadcaster:
+    """
+    Fan leaderboard changes out to the SSE clients of this worker.
+
+    One listener thread per worker (started with the first client) holds a
+    LISTEN connection. On a notification it reloads the competition's top
+    entries once and wakes the clients, which each send the delta against
+    what they last sent. Every worker does the same, so all clients see
+    every commit whichever worker ran the refresh.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._engine = None
+        self._lock = threading.Lock()
+        self._clients = {}  # competition_id -> set of wake-up queues
+        self._latest = {}  # competition_id -> (participants_count, entries)
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self._app = app
+        self.max_clients = app.config["SSE_MAX_CLIENTS"]
+        self.stream_seconds = app.config["SSE_STREAM_SECONDS"]
+
+    def accepting(self):
+        with self._lock:
+            return sum(len(c) for c in self._clients.values()) < self.max_clients
+
+    def subscribe(self, competition_id):
+        """Register a client; returns (wake-up queue, current standings) or (None, None)."""
+        with self._lock:
+            standings = self._latest.get(competition_id)
+        if standings is None:
+            standings = load_standings(competition_id)
+            if standings is None:
+                return None, None
+
+        wake = queue.Queue(maxsize=1)
+        with self._lock:
+            self._ensure_listener()
+            self._latest.setdefault(competition_id, standings)
+            self._clients.setdefault(competition_id, set()).add(wake)
+            return wake, self._latest[competition_id]
+
+    def unsubscribe(self, competition_id, wake):
+        with self._lock:
+            clients = self._clients.get(competition_id)
+            if clients is not None:
+                clients.discard(wake)
+                if not clients:
+                    del self._clients[competition_id]
+                    self._latest.pop(competition_id, None)
+
+    def latest(self, competition_id):
+        with self._lock:
+            return self._latest.get(competition_id)
+
+    def stream(self, competition_id, wake, standings):
+        """SSE body: a snapshot, then deltas as commits land, heartbeats in between."""
+        try:
+            sent = standings
+            yield f"retry: 10000\nevent: snapshot\ndata: {json.dumps(standings_delta((None, {}), sent))}\n\n"
+            deadline = time.monotonic() + self.stream_seconds
+            while time.monotonic() < deadline:
+                try:
+                    wake.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                current = self.latest(competition_id)
+                if current is None or current is sent:
+                    continue
+                delta = standings_delta(sent, current)
+                changed = delta["upserts"] or delta["removed"] or current[0] != sent[0]
+                sent = current
+                if changed:
+                    yield f"event: delta\ndata: {json.dumps(delta)}\n\n"
+            # closing makes EventSource reconnect: frees the slot and survives worker restarts
+        finally:
+            self.unsubscribe(competition_id, wake)
+
+    def _ensure_listener(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        if self._engine is None or self._pid != os.getpid():
+            with self._app.app_context():
+                self._engine = create_engine(db.engine.url, poolclass=NullPool)
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._listen, name="leaderboard-listener", daemon=True)
+        self._thread.start()
+
+    def _listen(self):
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = self._engine.raw_connection()
+                pg = conn.driver_connection
+                pg.autocommit = True
+                with pg.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                backoff = 1
+                while True:
+                    if select.select([pg], [], [], HEARTBEAT_SECONDS) == ([], [], []):
+                        continue
+                    pg.poll()
+                    changed = set()
+                    while pg.notifies:
+                        payload = pg.notifies.pop(0).payload
+                        if payload.isdigit():
+                            changed.add(int(payload))
+                    for competition_id in changed:
+                        self._publish(competition_id)
+            except Exception as e:
+                self._app.logger.warning(f"Leaderboard listener error, reconnecting: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _publish(self, competition_id):
+        with self._lock:
+            clients = list(self._clients.get(competition_id, ()))
+        if not clients:
+            return
+        with self._app.app_context():
+            standings = load_standings(competition_id)
+        if standings is None:
+            return
+        with self._lock:
+            if competition_id not in self._clients:
+                return
+            self._latest[competition_id] = standings
+        for wake in clients:
+            try:
+                wake.put_nowait(True)
+            except queue.Full:
+                pass  # already woken, it will read the latest standings
+
+
+broadcaster = LeaderboardBroadcaster()
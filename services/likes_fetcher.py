@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from extensions import db
+from models import GraphCallCount
+from services.facebook_likes import (
+    TransientError, chunk_video_ids, extract_video_id, get_video_stats_batch, graph_circuit
+)
+from services.likes_history import record_snapshots
+from services.token_provider import access_token_provider
+
+
+class GraphCallBudget:
+    """
+    Sliding one-hour window of Graph requests, shared by every worker.
+
+    Kept in per-minute rows (graph_call_counts) and spent by every likes
+    refresh (planner, admin jobs, competition close), so leader failover
+    and worker recycling don't reset it.
+    """
+
+    def spent(self):
+        since = datetime.utcnow() - timedelta(hours=1)
+        return db.session.execute(
+            db.select(db.func.coalesce(db.func.sum(GraphCallCount.calls), 0)).where(GraphCallCount.minute > since)
+        ).scalar()
+
+    def spend(self, count):
+        if not count:
+            return
+        now = datetime.utcnow()
+        # own connection, committed right away: the calls were made even if the refresh rolls back
+        with db.engine.begin() as conn:
+            stmt = pg_insert(GraphCallCount).values(minute=now.replace(second=0, microsecond=0), calls=count)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[GraphCallCount.minute], set_={"calls": GraphCallCount.calls + stmt.excluded.calls}
+            ))
+            conn.execute(db.delete(GraphCallCount).where(GraphCallCount.minute < now - timedelta(days=1)))
+
+
+call_budget = GraphCallBudget()
+
+
+class RequestLimit:
+    """Graph requests a refresh may still make, taken by the batches of every pool thread."""
+
+    def __init__(self, limit):
+        self.left = limit
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self.left <= 0:
+                return False
+            self.left -= 1
+            return True
+
+
+def _timed_batch(video_ids, allow_request=None):
+    started = time.perf_counter()
+    try:
+        stats, errors, requests_made = access_token_provider.call(
+            partial(get_video_stats_batch, allow_request=allow_request), video_ids
+        )
+    except Exception as e:
+        # token rejected or similar: not the videos' fault
+        stats, errors, requests_made = {}, {v: TransientError(e) for v in video_ids}, 1
+    return stats, errors, requests_made, time.perf_counter() - started
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def refresh_users_likes(app, users, max_workers=None, progress=None, max_requests=None):
+    """
+    Fetch likes/views for `users` with batched Graph requests and apply them in one flush.
+
+    Video IDs are grouped into multi-ID requests which run in parallel on a
+    bounded thread pool. Only plain IDs cross into the worker threads, the
+    ORM objects are updated back on the calling thread, users whose values
+    changed get a history point. The caller commits.
+    Users whose fetch failed keep their last known likes/views and stay
+    due for the planner (stale-while-revalidate).
+    `progress(done, total, errors)`, counted in users, is called on the
+    calling thread as batches complete.
+    `max_requests` caps the Graph requests of the run, retries of rejected
+    batches included; the videos left over stay due. Every request made is
+    spent from the shared hourly budget.
+    Returns a summary dict (counts, latency, throughput).
+    """
+    max_workers = max_workers or app.config.get("LIKES_FETCH_WORKERS", 8)
+
+    # dedupe: a user can be listed by more than one competition
+    targets = {u.id: u for u in users if u.url}
+    skipped = len({u.id for u in users}) - len(targets)
+    # circuit open: no request at all, every user keeps its last known values
+    circuit_open = not graph_circuit.available()
+    chunks = [] if circuit_open else chunk_video_ids([u.url for u in targets.values()])
+
+    # users per video ID: a batch settles every user sharing one of its videos
+    per_video = Counter(extract_video_id(u.url) for u in targets.values())
+    requested = {v for chunk in chunks for v in chunk}
+    # nothing to wait for: invalid urls, everyone while the circuit is open
+    done = failed_so_far = sum(n for v, n in per_video.items() if v not in requested)
+    if progress:
+        progress(done, len(targets), failed_so_far)
+
+    fetch = _timed_batch
+    if max_requests is not None:
+        fetch = partial(_timed_batch, allow_request=RequestLimit(max_requests).take)
+
+    started = time.perf_counter()
+    batches = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for chunk, batch in zip(chunks, pool.map(fetch, chunks)):
+            batches.append(batch)
+            if progress:
+                done += sum(per_video[v] for v in chunk)
+                failed_so_far += sum(per_video[v] for v in chunk if v not in batch[0])
+                progress(done, len(targets), failed_so_far)
+    elapsed = time.perf_counter() - started
+
+    stats, errors, latencies, requests_made = {}, {}, [], 0
+    for batch_stats, batch_errors, batch_requests, latency in batches:
+        stats.update(batch_stats)
+        errors.update(batch_errors)
+        requests_made += batch_requests
+        latencies.append(latency)
+    call_budget.spend(requests_made)
+
+    failed, changed = 0, []
+    for user in targets.values():
+        video_id = extract_video_id(user.url)
+        if video_id in stats:
+            before = (user.likes_number, user.views_number)
+            first_fetch = user.likes_refreshed_at is None
+            user.apply_video_stats(stats[video_id])
+            if first_fetch or (user.likes_number, user.views_number) != before:
+                changed.append(user)
+        else:
+            failed += 1
+            if not circuit_open:
+                user.apply_video_stats({"error": errors.get(video_id, "Invalid video URL")})
+
+    record_snapshots(changed)  # history: only values that moved
+    db.session.flush()  # ✅ Single flush for the whole batch
+
+    summary = {
+        "users": len(targets),
+        "errors": failed,
+        "stale": failed,  # not refreshed, still showing their last known values
+        "circuit": graph_circuit.snapshot()["state"],
+        "changed": len(changed),
+        "skipped": skipped,
+        "requests": requests_made,
+        "workers": max_workers,
+        "elapsed_s": round(elapsed, 3),
+        "latency_p50_s": round(_percentile(latencies, 50), 3),
+        "latency_p95_s": round(_percentile(latencies, 95), 3),
+        "latency_max_s": round(max(latencies, default=0.0), 3),
+        "throughput_per_s": round(len(targets) / elapsed, 2) if elapsed else 0.0,
+    }
+    app.logger.info(f"Likes refresh summary: {summary}")
+    return summary
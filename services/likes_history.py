@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from extensions import db
+from models import LikesSnapshot, user_competition
+
+RESOLUTIONS = ('raw', 'hour', 'day')
+
+# width of a bucket: a rollup row holds the value at ts + width
+BUCKET = {
+    'raw': timedelta(0),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+# widest range served from each resolution (anything longer reads daily rows)
+MAX_SPAN = {
+    'raw': timedelta(days=2),
+    'hour': timedelta(days=7),
+}
+
+# last value of each (user, bucket) from the finer resolution, upserted so
+# the current, still open bucket is simply recomputed on the next run
+_ROLLUP_SQL = db.text(
+    "INSERT INTO likes_snapshots (user_id, resolution, ts, likes_number, views_number) "
+    "SELECT DISTINCT ON (user_id, bucket) user_id, :target, bucket, likes_number, views_number "
+    "FROM (SELECT user_id, date_trunc(:unit, ts) AS bucket, ts, likes_number, views_number "
+    "      FROM likes_snapshots WHERE resolution = :source AND ts >= :since) s "
+    "ORDER BY user_id, bucket, ts DESC "
+    "ON CONFLICT (user_id, resolution, ts) DO UPDATE "
+    "SET likes_number = EXCLUDED.likes_number, views_number = EXCLUDED.views_number"
+)
+
+
+def record_snapshots(users, ts=None):
+    """Append a 'raw' point for each user whose likes/views changed. The caller commits."""
+    if not users:
+        return 0
+    ts = ts or datetime.utcnow()
+    rows = [
+        {
+            'user_id': u.id,
+            'resolution': 'raw',
+            'ts': ts,
+            'likes_number': u.likes_number or 0,
+            'views_number': u.views_number or 0,
+        }
+        for u in users
+    ]
+    stmt = pg_insert(LikesSnapshot).on_conflict_do_nothing(
+        index_elements=['user_id', 'resolution', 'ts']
+    )
+    db.session.execute(stmt, rows)
+    return len(rows)
+
+
+def _watermark(resolution):
+    return db.session.execute(
+        db.select(db.func.max(LikesSnapshot.ts)).where(LikesSnapshot.resolution == resolution)
+    ).scalar()
+
+
+def _rollup(source, target, unit, keep_source_for):
+    # restart from the newest bucket already rolled up: it may have been partial
+    since = _watermark(target) or datetime(1970, 1, 1)
+    rolled = db.session.execute(
+        _ROLLUP_SQL, {'target': target, 'unit': unit, 'source': source, 'since': since}
+    ).rowcount
+
+    # drop expired source rows, never past what was just rolled up
+    cutoff = min(datetime.utcnow() - keep_source_for, _watermark(target) or since)
+    dropped = LikesSnapshot.query.filter(
+        LikesSnapshot.resolution == source,
+        LikesSnapshot.ts < cutoff
+    ).delete(synchronize_session=False)
+    return rolled, dropped
+
+
+def rollup_history(app):
+    """Scheduler job: raw points -> hourly -> daily, then apply retention."""
+    with app.app_context():
+        try:
+            hourly, raw_dropped = _rollup(
+                'raw', 'hour', 'hour', timedelta(days=app.config["LIKES_HISTORY_RAW_DAYS"])
+            )
+            daily, hourly_dropped = _rollup(
+                'hour', 'day', 'day', timedelta(days=app.config["LIKES_HISTORY_HOURLY_DAYS"])
+            )
+            db.session.commit()
+            app.logger.info(
+                f"Likes history rollup: {hourly} hourly / {daily} daily buckets, "
+                f"dropped {raw_dropped} raw / {hourly_dropped} hourly rows."
+            )
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error in rollup_history: {e}")
+        finally:
+            db.session.remove()  # ✅ Clean up session
+
+
+def pick_resolution(start, end, now, raw_days, hourly_days):
+    """Finest resolution that covers [start, end] without reading too many rows."""
+    span = end - start
+    if span <= MAX_SPAN['raw'] and start >= now - timedelta(days=raw_days):
+        return 'raw'
+    if span <= MAX_SPAN['hour'] and start >= now - timedelta(days=hourly_days):
+        return 'hour'
+    return 'day'
+
+
+def _carry_in(user_filter, resolution, start):
+    """
+    Last point of each user before `start`, so the chart starts at the right level.
+
+    Points are only written on change and finer rows are pruned after
+    retention, so a flat user may have nothing at `resolution`: fall back
+    to a coarser row whose bucket had closed by `start`.
+    """
+    coarser = RESOLUTIONS[RESOLUTIONS.index(resolution) + 1:]
+    known = [(LikesSnapshot.resolution == resolution, LikesSnapshot.ts, LikesSnapshot.ts < start)]
+    for r in coarser:
+        closed_at = LikesSnapshot.ts + BUCKET[r]
+        known.append((LikesSnapshot.resolution == r, closed_at, closed_at <= start))
+    known_at = db.case(*[(same, at) for same, at, _ in known])
+
+    return db.select(
+        LikesSnapshot.user_id, LikesSnapshot.ts, LikesSnapshot.likes_number, LikesSnapshot.views_number
+    ).distinct(LikesSnapshot.user_id).where(
+        user_filter,
+        db.or_(*[db.and_(same, before) for same, _, before in known])
+    ).order_by(LikesSnapshot.user_id, known_at.desc())
+
+
+def _series_query(user_filter, resolution, start, end):
+    # points in range, plus the last known point before it
+    in_range = db.select(
+        LikesSnapshot.user_id, LikesSnapshot.ts, LikesSnapshot.likes_number, LikesSnapshot.views_number
+    ).where(
+        user_filter,
+        LikesSnapshot.resolution == resolution,
+        LikesSnapshot.ts >= start,
+        LikesSnapshot.ts <= end
+    )
+    carry_in = _carry_in(user_filter, resolution, start)
+
+    points = db.union_all(in_range, carry_in.subquery().select()).subquery()
+    return db.session.execute(
+        db.select(points).order_by(points.c.user_id, points.c.ts)
+    ).all()
+
+
+def _points(rows):
+    return [[r.ts.isoformat(), r.likes_number, r.views_number] for r in rows]
+
+
+def user_history(user_id, resolution, start, end):
+    return _points(_series_query(LikesSnapshot.user_id == user_id, resolution, start, end))
+
+
+def competition_history(competition_id, resolution, start, end):
+    """Series per participant: {user_id: [[ts, likes, views], ...]}."""
+    participants = db.select(user_competition.c.user_id).where(
+        user_competition.c.competition_id == competition_id
+    )
+    series = {}
+    for row in _series_query(LikesSnapshot.user_id.in_(participants), resolution, start, end):
+        series.setdefault(row.user_id, []).append(row)
+    return {user_id: _points(rows) for user_id, rows in series.items()}
@@ -0,0 +1,173 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from flask import current_app
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from extensions import db, scheduler
+from models import Competition, LikesRefreshJob
+from services.leaderboard import rebuild_leaderboard
+from services.likes_fetcher import refresh_users_likes
+
+ACTIVE = ("queued", "running")
+# progress is written at most this often (s), the last batch always
+PROGRESS_INTERVAL = 1.0
+# finished jobs kept for the admin page
+RETENTION = timedelta(days=7)
+
+
+def _active_clause():
+    return LikesRefreshJob.status.in_(ACTIVE)
+
+
+def _expire(*where):
+    """
+    Fail active jobs whose worker stopped reporting (killed, recycled).
+
+    Run on enqueue and on every read, so a lost job neither blocks new
+    refreshes nor keeps the admin page polling. Returns the number failed.
+    """
+    now = datetime.utcnow()
+    lost_after = timedelta(seconds=current_app.config["LIKES_JOB_LOST_SECONDS"])
+    return db.session.execute(
+        db.update(LikesRefreshJob).where(
+            *where,
+            _active_clause(),
+            LikesRefreshJob.heartbeat_at < now - lost_after
+        ).values(status="failed", error="Worker lost", finished_at=now)
+    ).rowcount
+
+
+def enqueue(app, competition_id):
+    """
+    Queue a likes refresh of a competition; returns (job, created).
+
+    Coalesced across workers by the partial unique index: while a job of the
+    competition is queued or running, the insert does nothing and that job
+    is returned instead. The job starts after the commit, on this worker.
+    """
+    _expire(LikesRefreshJob.competition_id == competition_id)
+    db.session.execute(
+        db.delete(LikesRefreshJob).where(LikesRefreshJob.finished_at < datetime.utcnow() - RETENTION)
+    )
+    for _ in range(3):
+        now = datetime.utcnow()
+        job_id = db.session.execute(
+            pg_insert(LikesRefreshJob).values(
+                competition_id=competition_id, status="queued", total=0, done=0, errors=0,
+                created_at=now, heartbeat_at=now
+            ).on_conflict_do_nothing(
+                index_elements=[LikesRefreshJob.competition_id], index_where=_active_clause()
+            ).returning(LikesRefreshJob.id)
+        ).scalar()
+        if job_id is not None:
+            db.session.commit()
+            _start(app, job_id)
+            return db.session.get(LikesRefreshJob, job_id), True
+
+        job = db.session.execute(
+            db.select(LikesRefreshJob).where(
+                LikesRefreshJob.competition_id == competition_id, _active_clause()
+            )
+        ).scalar()
+        if job is not None:
+            db.session.commit()
+            return job, False
+        # finished between the insert and the select: try again
+    raise RuntimeError("Could not queue the likes refresh")
+
+
+def _start(app, job_id):
+    run = partial(run_job, app, job_id)
+    if scheduler.running:
+        # one-off job (date trigger, now) on this worker's scheduler pool
+        scheduler.add_job(run, id=f"likes_refresh_job_{job_id}", misfire_grace_time=None)
+    else:
+        threading.Thread(target=run, name=f"likes-refresh-job-{job_id}", daemon=True).start()
+
+
+def _write(job_id, **values):
+    # own connection, committed right away: progress is visible while the refresh transaction is open
+    with db.engine.begin() as conn:
+        conn.execute(
+            db.update(LikesRefreshJob).where(LikesRefreshJob.id == job_id).values(
+                heartbeat_at=datetime.utcnow(), **values
+            )
+        )
+
+
+def _reporter(job_id):
+    last = [0.0]
+
+    def report(done, total, errors):
+        now = time.monotonic()
+        if done < total and now - last[0] < PROGRESS_INTERVAL:
+            return
+        last[0] = now
+        _write(job_id, done=done, total=total, errors=errors)
+    return report
+
+
+def run_job(app, job_id):
+    """Refresh the competition's participants, rebuild its leaderboard, record the outcome."""
+    with app.app_context():
+        try:
+            job = db.session.get(LikesRefreshJob, job_id)
+            if job is None or job.status != "queued":
+                return
+            _write(job_id, status="running", started_at=datetime.utcnow())
+
+            comp = db.session.get(Competition, job.competition_id)
+            summary = refresh_users_likes(app, comp.users, progress=_reporter(job_id))
+            rebuild_leaderboard(comp.id)
+
+            # same transaction as the likes: 'done' is never seen before the new values
+            db.session.refresh(job)
+            job.status = "done"
+            job.done = job.total = summary["users"]
+            job.errors = summary["errors"]
+            job.summary = summary
+            job.finished_at = job.heartbeat_at = datetime.utcnow()
+            db.session.commit()
+            app.logger.info(f"Likes refresh job {job_id} done: {summary}")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error in likes refresh job {job_id}: {e}")
+            _write(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        finally:
+            db.session.remove()  # ✅ Clean up session
+
+
+def get(job_id):
+    """A job by id, failed first if its worker was lost. None if unknown."""
+    if _expire(LikesRefreshJob.id == job_id):
+        db.session.commit()
+    return db.session.get(LikesRefreshJob, job_id)
+
+
+def latest(competition_id):
+    """The competition's active job, else its last finished one."""
+    if _expire(LikesRefreshJob.competition_id == competition_id):
+        db.session.commit()
+    return db.session.execute(
+        db.select(LikesRefreshJob).where(LikesRefreshJob.competition_id == competition_id).order_by(
+            _active_clause().desc(), LikesRefreshJob.id.desc()
+        ).limit(1)
+    ).scalar()
+
+
+def to_dict(job):
+    return {
+        "id": job.id,
+        "competition_id": job.competition_id,
+        "status": job.status,
+        "total": job.total,
+        "done": job.done,
+        "errors": job.errors,
+        "summary": job.summary,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat(),
+    }
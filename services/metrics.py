@@ -0,0 +1,171 @@
+import os
+import time
+from flask import current_app, g, has_request_context, request, before_render_template, template_rendered
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn-cfg.py) makes every
+# worker write its samples to mmap files there; /api/metrics merges them.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    "vip_http_request_duration_seconds", "Request latency", ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "vip_http_request_sql_queries", "SQL statements per request", ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+)
+SQL_QUERIES = Counter("vip_sql_queries_total", "SQL statements executed", ["endpoint"])
+SQL_SECONDS = Counter("vip_sql_query_seconds_total", "Time spent in SQL statements", ["endpoint"])
+TEMPLATE_LATENCY = Histogram(
+    "vip_template_render_seconds", "Template render time", ["template"], buckets=LATENCY_BUCKETS
+)
+GRAPH_LATENCY = Histogram(
+    "vip_graph_request_duration_seconds", "Graph API request latency", ["kind"], buckets=LATENCY_BUCKETS
+)
+GRAPH_ERRORS = Counter("vip_graph_errors_total", "Graph API errors", ["kind", "reason"])
+# QR page cache lookups, counted here rather than in the cache: lookups stay read-only
+PAGE_CACHE_LOOKUPS = Counter("vip_page_cache_lookups_total", "Rendered page cache lookups", ["result"])
+# 1 while the Graph circuit breaker of any live worker is open
+GRAPH_CIRCUIT_OPEN = Gauge(
+    "vip_graph_circuit_open", "Graph API circuit breaker open", multiprocess_mode="livemax"
+)
+
+# statements kept per request for the slow-request log
+SLOW_LOG_TOP_QUERIES = 5
+
+_settings = {"slow_ms": 1000}
+
+
+def _endpoint():
+    # request.endpoint keeps label cardinality bounded (no raw paths / qr ids)
+    if has_request_context():
+        return request.endpoint or "unmatched"
+    return "background"
+
+
+def _request_stats():
+    if has_request_context():
+        return g.get("_perf")
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    endpoint = _endpoint()
+    SQL_QUERIES.labels(endpoint).inc()
+    SQL_SECONDS.labels(endpoint).inc(elapsed)
+    stats = _request_stats()
+    if stats is not None:
+        stats["queries"] += 1
+        stats["sql_s"] += elapsed
+        stats["statements"].append((elapsed, statement))
+
+
+def _query_failed(context):
+    # after_cursor_execute does not run for failed statements
+    if context.connection is not None:
+        starts = context.connection.info.get("_query_start")
+        if starts:
+            starts.pop()
+
+
+def _before_render(sender, template, context, **extra):
+    stats = _request_stats()
+    if stats is not None:
+        stats["render_start"] = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    stats = _request_stats()
+    if stats is not None and "render_start" in stats:
+        TEMPLATE_LATENCY.labels(template.name or "string").observe(time.perf_counter() - stats.pop("render_start"))
+
+
+def _start_request():
+    g._perf = {"start": time.perf_counter(), "queries": 0, "sql_s": 0.0, "statements": []}
+
+
+def _finish_request(response):
+    # streamed bodies are timed up to the first byte, not the last
+    stats = g.pop("_perf", None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats["start"]
+    endpoint = _endpoint()
+    REQUEST_LATENCY.labels(endpoint, request.method, str(response.status_code)).observe(elapsed)
+    REQUEST_QUERIES.labels(endpoint).observe(stats["queries"])
+
+    if elapsed * 1000 >= _settings["slow_ms"]:
+        top = sorted(stats["statements"], key=lambda s: s[0], reverse=True)[:SLOW_LOG_TOP_QUERIES]
+        queries = "".join(
+            f"\n    {seconds * 1000:8.1f} ms  {' '.join(statement.split())[:300]}" for seconds, statement in top
+        )
+        current_app.logger.warning(
+            f"Slow request {request.method} {request.path} ({endpoint}) -> {response.status_code}: "
+            f"{elapsed * 1000:.0f} ms, {stats['queries']} queries in {stats['sql_s'] * 1000:.0f} ms{queries}"
+        )
+    return response
+
+
+def observe_graph(kind, seconds, error=None):
+    """Record one Graph API call; `error` is a short reason ('http', 'timeout', 'api', ...)."""
+    if seconds is not None:  # None: refused without a request (circuit open)
+        GRAPH_LATENCY.labels(kind).observe(seconds)
+    if error:
+        GRAPH_ERRORS.labels(kind, error).inc()
+
+
+def observe_graph_circuit(is_open):
+    GRAPH_CIRCUIT_OPEN.set(1 if is_open else 0)
+
+
+def observe_page_cache(hit):
+    PAGE_CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+
+
+def _registry():
+    # merged across gunicorn workers when multiprocess
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def page_cache_lookups():
+    """{'hit': n, 'miss': n} of every worker since it started."""
+    counts = {"hit": 0, "miss": 0}
+    for family in _registry().collect():
+        if family.name == "vip_page_cache_lookups":
+            for sample in family.samples:
+                if sample.name.endswith("_total"):
+                    counts[sample.labels["result"]] += int(sample.value)
+    return counts
+
+
+def render_latest():
+    """Prometheus text exposition, merged across gunicorn workers when multiprocess."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def init_app(app, engine):
+    _settings["slow_ms"] = app.config["SLOW_REQUEST_MS"]
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _query_failed)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from extensions import db
+from services import metrics
+
+# rendered public pages, shared by all gunicorn workers through one sqlite file
+_settings = {"path": None, "ttl": 300, "enabled": False}
+_local = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    qr_id TEXT NOT NULL,
+    competition_id INTEGER,
+    status INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_pages_qr_id ON pages (qr_id);
+CREATE INDEX IF NOT EXISTS ix_pages_competition_id ON pages (competition_id);
+"""
+
+
+def init_app(app):
+    _settings["path"] = app.config["PAGE_CACHE_PATH"]
+    _settings["ttl"] = app.config["PAGE_CACHE_TTL"]
+    _settings["enabled"] = app.config["PAGE_CACHE_ENABLED"]
+    if _settings["enabled"]:
+        os.makedirs(os.path.dirname(_settings["path"]) or ".", exist_ok=True)
+        _connect().executescript(_SCHEMA)
+
+
+def _connect():
+    # one connection per thread and per process (workers fork after import)
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        conn = sqlite3.connect(_settings["path"], timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def _key(qr_id, variant):
+    return f"{variant}:{qr_id}"
+
+
+def get_page(qr_id, variant):
+    """Return (body, status) of a fresh cached page, or None on a miss. Read-only: no lock taken."""
+    if not _settings["enabled"]:
+        return None
+    try:
+        row = _connect().execute(
+            "SELECT body, status FROM pages WHERE key = ? AND expires_at > ?",
+            (_key(qr_id, variant), time.time())
+        ).fetchone()
+        metrics.observe_page_cache(row is not None)
+        return (row[0], row[1]) if row else None
+    except sqlite3.Error:
+        return None
+
+
+def set_page(qr_id, variant, body, status=200, competition_id=None):
+    if not _settings["enabled"]:
+        return
+    try:
+        _connect().execute(
+            "INSERT OR REPLACE INTO pages (key, qr_id, competition_id, status, body, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (_key(qr_id, variant), qr_id, competition_id, status,
+             body.encode() if isinstance(body, str) else body, time.time() + _settings["ttl"])
+        )
+    except sqlite3.Error:
+        pass
+
+
+def invalidate_user(qr_id):
+    if not _settings["enabled"] or not qr_id:
+        return
+    try:
+        _connect().execute("DELETE FROM pages WHERE qr_id = ?", (qr_id,))
+    except sqlite3.Error:
+        pass
+
+
+def invalidate_competition(competition_id):
+    if not _settings["enabled"]:
+        return
+    try:
+        _connect().execute("DELETE FROM pages WHERE competition_id = ?", (competition_id,))
+    except sqlite3.Error:
+        pass
+
+
+def invalidate_on_commit(qr_ids=(), competition_ids=()):
+    """
+    Queue invalidations on the current DB session, applied once it commits.
+
+    Invalidating before the commit would let a concurrent scan re-cache the
+    old data for a whole TTL.
+    """
+    pending = db.session.info.setdefault("page_cache_invalidate", {"qr_ids": set(), "competition_ids": set()})
+    pending["qr_ids"].update(q for q in qr_ids if q)
+    pending["competition_ids"].update(c for c in competition_ids if c is not None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    pending = session.info.pop("page_cache_invalidate", None)
+    if not pending:
+        return
+    for qr_id in pending["qr_ids"]:
+        invalidate_user(qr_id)
+    for competition_id in pending["competition_ids"]:
+        invalidate_competition(competition_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop("page_cache_invalidate", None)
+
+
+def stats():
+    if not _settings["enabled"]:
+        return {"enabled": False}
+    lookups = metrics.page_cache_lookups()
+    hits, misses = lookups["hit"], lookups["miss"]
+    entries = _connect().execute("SELECT COUNT(*) FROM pages WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+    return {
+        "enabled": True,
+        "ttl_s": _settings["ttl"],
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+    }
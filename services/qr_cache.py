@@ -0,0 +1,93 @@
+import hashlib
+import os
+import threading
+from services.qr_generator import RENDER_VERSION, card_png, card_svg, card_url
+
+# on-demand QR images, one file per rendered card, shared by all workers on this host
+_settings = {"dir": None, "max_bytes": 50 * 1024 * 1024}
+_evict_lock = threading.Lock()
+
+# running size estimate, so the directory is only scanned when it may be over the cap.
+# Other workers write too: rescan every RESCAN_EVERY writes regardless.
+_usage = {"bytes": 0, "writes": 0}
+RESCAN_EVERY = 500
+
+RENDERERS = {
+    "png": card_png,
+    "svg": card_svg,
+}
+
+MIMETYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+def init_app(app):
+    _settings["dir"] = app.config["QR_CACHE_DIR"]
+    _settings["max_bytes"] = app.config["QR_CACHE_MAX_BYTES"]
+    os.makedirs(_settings["dir"], exist_ok=True)
+    _evict()
+
+
+def etag_for(qr_id, fmt):
+    """
+    Strong validator computed from the inputs only.
+
+    Rendering is deterministic for a given URL, format and RENDER_VERSION,
+    so If-None-Match can be answered without touching the disk.
+    """
+    return hashlib.sha256(f"{RENDER_VERSION}|{fmt}|{card_url(qr_id)}".encode()).hexdigest()[:32]
+
+
+def get_image(qr_id, fmt):
+    """Return the image bytes, from disk when cached, rendered (and stored) otherwise."""
+    path = os.path.join(_settings["dir"], f"{etag_for(qr_id, fmt)}.{fmt}")
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # mtime is the LRU clock
+        return data
+    except OSError:
+        pass
+
+    data = RENDERERS[fmt](qr_id)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        _usage["bytes"] += len(data)
+        _usage["writes"] += 1
+        if _usage["bytes"] > _settings["max_bytes"] or _usage["writes"] % RESCAN_EVERY == 0:
+            _evict()
+    except OSError:
+        pass  # a full or read-only disk only costs a re-render
+    return data
+
+
+def _evict():
+    """Drop least recently used files until the cache is back under 90% of its cap."""
+    with _evict_lock:
+        entries, total = [], 0
+        with os.scandir(_settings["dir"]) as it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue  # removed by another worker meanwhile
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        if total > _settings["max_bytes"]:
+            target = _settings["max_bytes"] * 0.9
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= target:
+                    break
+        _usage["bytes"] = total
@@ -1,30 +1,302 @@
-import qrcode
+"""
+QR card generator.
+
+    python -m services.qr_generator --ids 1-1000
+    python -m services.qr_generator --ids 1-50000 --zip print_run.zip --sheet --mask 0
+
+Renders in a process pool. In directory mode a manifest of input keys and
+content hashes skips cards that would come out the same and never rewrites
+identical files.
+"""
+import argparse
+import hashlib
+import io
+import json
 import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import qrcode
+from PIL import Image
 import dotenv
 dotenv.load_dotenv()
 
-# create output folder if not exists
-output_folder = "qr_codes"
-os.makedirs(output_folder, exist_ok=True)
+DEFAULT_BASE_URL = os.getenv("QR_BASE_URL", "https://vip.masmoudiweddingplanner.com/")
+DEFAULT_OUTPUT = "qr_codes"
+MANIFEST_NAME = "manifest.json"
+
+# bump when the rendering changes, so every card is re-rendered once
+RENDER_VERSION = 1
+
+BOX_SIZE = 8
+BORDER = 3
+
+# printable sheets: A4 at 300 dpi, 10 mm margins
+SHEET_SIZE = (2480, 3508)
+SHEET_MARGIN = 118
+SHEET_GAP = 24
 
-base_url = os.getenv("QR_BASE_URL", "https://vip.masmoudiweddingplanner.com/")
+# 2-colour palette: index 0 transparent, index 1 white modules
+_PALETTE = [0, 0, 0, 255, 255, 255]
 
-# توليد 100 QR code
-for i in range(1, 1001):
-    user_id = f"USER{i}"  # USER1, USER2 ...
-    full_url = f"{base_url}AbX9TqVrKmN{user_id}4FjHsW2GyUeRc"
-    
+
+def card_id(number, prefix="USER"):
+    return f"{prefix}{number}"
+
+
+def card_url(qr_id, base_url=None):
+    return f"{base_url or DEFAULT_BASE_URL}AbX9TqVrKmN{qr_id}4FjHsW2GyUeRc"
+
+
+def qr_matrix(data, mask_pattern=None):
+    """
+    Module matrix (border included) for `data`.
+
+    mask_pattern=None lets qrcode score all 8 masks, as the original cards
+    did. A fixed mask (0-7) is just as valid and about 5x faster.
+    """
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=8,
-        border=3,
+        box_size=BOX_SIZE,
+        border=BORDER,
+        mask_pattern=mask_pattern,
     )
-    qr.add_data(full_url)
+    qr.add_data(data)
     qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def render_card(qr_id, base_url=None, mask_pattern=None, box_size=BOX_SIZE):
+    """White QR code on a transparent background, as a palette image."""
+    matrix = qr_matrix(card_url(qr_id, base_url), mask_pattern)
+    n = len(matrix)
+    img = Image.frombytes('P', (n, n), bytes(1 if cell else 0 for row in matrix for cell in row))
+    img = img.resize((n * box_size, n * box_size), Image.NEAREST)
+    img.putpalette(_PALETTE)
+    return img
+
+
+def _png_bytes(img):
+    buf = io.BytesIO()
+    img.save(buf, "PNG", transparency=0, bits=1)
+    return buf.getvalue()
+
+
+def card_png(qr_id, base_url=None, mask_pattern=None):
+    return _png_bytes(render_card(qr_id, base_url, mask_pattern))
+
+
+def card_svg(qr_id, base_url=None, mask_pattern=None, box_size=BOX_SIZE):
+    """Same card as SVG: one path, a rectangle per horizontal run of modules."""
+    matrix = qr_matrix(card_url(qr_id, base_url), mask_pattern)
+    n = len(matrix)
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < n:
+            if row[x]:
+                start = x
+                while x < n and row[x]:
+                    x += 1
+                runs.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+            else:
+                x += 1
+    size = n * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<path fill="#fff" d="{"".join(runs)}"/></svg>'
+    ).encode()
+
+
+def parse_ids(spec):
+    """'1-1000,2000,2500-2600' -> [1, ..., 1000, 2000, 2500, ..., 2600]"""
+    numbers = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(x) for x in part.split('-', 1))
+            numbers.extend(range(start, end + 1))
+        else:
+            numbers.append(int(part))
+    return numbers
+
+
+def _input_key(*parts):
+    return hashlib.sha1("|".join(str(p) for p in (RENDER_VERSION,) + parts).encode()).hexdigest()
+
+
+def sheet_grid(cell):
+    cols = (SHEET_SIZE[0] - 2 * SHEET_MARGIN + SHEET_GAP) // (cell + SHEET_GAP)
+    rows = (SHEET_SIZE[1] - 2 * SHEET_MARGIN + SHEET_GAP) // (cell + SHEET_GAP)
+    if cols < 1 or rows < 1:
+        raise ValueError("card does not fit on a sheet")
+    return cols, rows
 
-    # create white QR code on transparent background
-    img = qr.make_image(fill_color="white", back_color="transparent")
-    img.save(os.path.join(output_folder, f"{user_id}.png"))
+
+# ---- pool workers (module level so they pickle) ----
+
+def _render_card_task(task):
+    name, qr_id, base_url, mask_pattern = task
+    return name, card_png(qr_id, base_url, mask_pattern)
+
+
+def _render_sheet_task(task):
+    name, qr_ids, base_url, mask_pattern, cell, cols = task
+    page = Image.new('P', SHEET_SIZE, 0)
+    page.putpalette(_PALETTE)
+    for i, qr_id in enumerate(qr_ids):
+        card = render_card(qr_id, base_url, mask_pattern)
+        row, col = divmod(i, cols)
+        # cards of longer IDs can be a version bigger: centre each one in its cell
+        x = SHEET_MARGIN + col * (cell + SHEET_GAP) + (cell - card.width) // 2
+        y = SHEET_MARGIN + row * (cell + SHEET_GAP) + (cell - card.height) // 2
+        page.paste(card, (x, y))
+    return name, _png_bytes(page)
+
+
+def _build_tasks(numbers, prefix, base_url, mask_pattern, sheet):
+    """[(name, key, task)] plus the worker that renders the tasks."""
+    if not numbers:
+        return [], _render_card_task
+    if not sheet:
+        tasks = []
+        for number in numbers:
+            qr_id = card_id(number, prefix)
+            name = f"{qr_id}.png"
+            key = _input_key(card_url(qr_id, base_url), mask_pattern, BOX_SIZE, BORDER)
+            tasks.append((name, key, (name, qr_id, base_url, mask_pattern)))
+        return tasks, _render_card_task
+
+    # grid cell from the biggest card in the run (the longest ID)
+    longest = max(numbers, key=lambda n: len(card_id(n, prefix)))
+    cell = render_card(card_id(longest, prefix), base_url, mask_pattern).width
+    cols, rows = sheet_grid(cell)
+    per_page = cols * rows
+
+    tasks = []
+    for page, start in enumerate(range(0, len(numbers), per_page), 1):
+        qr_ids = [card_id(n, prefix) for n in numbers[start:start + per_page]]
+        name = f"sheet-{page:04d}.png"
+        key = _input_key(",".join(qr_ids), base_url, mask_pattern, cell, cols, SHEET_SIZE)
+        tasks.append((name, key, (name, qr_ids, base_url, mask_pattern, cell, cols)))
+    return tasks, _render_sheet_task
+
+
+def _load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(output_dir, files):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"version": RENDER_VERSION, "files": files}, f, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def _write_atomic(path, data):
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def generate_cards(numbers, output_dir=DEFAULT_OUTPUT, zip_path=None, sheet=False,
+                   prefix="USER", base_url=None, mask_pattern=None, workers=None, force=False):
+    """
+    Render QR cards for `numbers` (USER<n>) across a process pool.
+
+    Writes one PNG per card (or one per A4 page with `sheet`) to
+    `output_dir`, skipping outputs whose manifest key is unchanged, or
+    streams everything into `zip_path`. Returns a summary dict.
+    """
+    started = time.perf_counter()
+    base_url = base_url or DEFAULT_BASE_URL
+    tasks, render = _build_tasks(list(numbers), prefix, base_url, mask_pattern, sheet)
+
+    manifest = {}
+    if zip_path is None:
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = {} if force else _load_manifest(output_dir)
+        pending = [
+            t for t in tasks
+            if manifest.get(t[0], {}).get("key") != t[1]
+            or not os.path.exists(os.path.join(output_dir, t[0]))
+        ]
+    else:
+        pending = tasks
+
+    keys = {name: key for name, key, _ in pending}
+    written = unchanged = 0
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, min(256, len(pending) // (workers * 4) or 1))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(render, [t[2] for t in pending], chunksize=chunksize)
+
+        if zip_path is not None:
+            # PNGs are already compressed: store them as they are
+            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+                for name, data in results:
+                    zf.writestr(name, data)
+                    written += 1
+        else:
+            for name, data in results:
+                digest = hashlib.sha256(data).hexdigest()
+                path = os.path.join(output_dir, name)
+                if manifest.get(name, {}).get("sha256") == digest and os.path.exists(path):
+                    unchanged += 1  # new key, same pixels: keep the file as is
+                else:
+                    _write_atomic(path, data)
+                    written += 1
+                manifest[name] = {"key": keys[name], "sha256": digest}
+            _save_manifest(output_dir, manifest)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "cards": len(numbers),
+        "outputs": len(tasks),
+        "written": written,
+        "unchanged": unchanged,
+        "skipped": len(tasks) - len(pending),
+        "workers": workers,
+        "elapsed_s": round(elapsed, 2),
+        "target": zip_path or output_dir,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate VIP card QR codes.")
+    parser.add_argument("--ids", default="1-1000", help="ID numbers, e.g. 1-1000,2000-2500 (default 1-1000)")
+    parser.add_argument("--prefix", default="USER", help="QR id prefix (default USER)")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT, help="output folder (default qr_codes)")
+    parser.add_argument("--zip", dest="zip_path", help="write everything into this ZIP instead of a folder")
+    parser.add_argument("--sheet", action="store_true", help="printable A4 sheets instead of one PNG per card")
+    parser.add_argument("--mask", type=int, choices=range(8), help="fixed QR mask pattern (much faster)")
+    parser.add_argument("--workers", type=int, help="processes (default: all cores)")
+    parser.add_argument("--base-url", default=None, help="card URL prefix (default QR_BASE_URL)")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and re-render everything")
+    args = parser.parse_args(argv)
+
+    summary = generate_cards(
+        parse_ids(args.ids),
+        output_dir=args.out,
+        zip_path=args.zip_path,
+        sheet=args.sheet,
+        prefix=args.prefix,
+        base_url=args.base_url,
+        mask_pattern=args.mask,
+        workers=args.workers,
+        force=args.force,
+    )
+    print(json.dumps(summary))
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from extensions import db
+
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    Collect the SQL statements executed inside the block.
+
+        with count_queries() as statements:
+            client.get("/api/competitions")
+        assert len(statements) == 2
+    """
+    engine = engine or db.engine
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
@@ -0,0 +1,125 @@
+import json
+import re
+from datetime import timedelta
+from types import SimpleNamespace
+import click
+from extensions import db
+from models import User
+
+
+def _index_conditions(plan, found=None):
+    """{index name: [Index Cond, ...]} and the node types of an EXPLAIN (FORMAT JSON) plan tree."""
+    if found is None:
+        found = ({}, set())
+    conds, nodes = found
+    nodes.add(plan["Node Type"])
+    if "Index Name" in plan:
+        conds.setdefault(plan["Index Name"], []).append(plan.get("Index Cond", ""))
+    for child in plan.get("Plans", []):
+        _index_conditions(child, found)
+    return found
+
+
+def _check(plan, index, columns):
+    """
+    Does the plan search `index` on `columns` (an Index Cond, not a full
+    index scan or a filter on its rows)? columns=None: the index must serve
+    the ORDER BY instead, i.e. no Sort node.
+    """
+    conds, nodes = _index_conditions(plan)
+    if index not in conds:
+        return False
+    if columns is None:
+        return "Sort" not in nodes
+    return any(all(re.search(rf"\b{column}\b", cond) for column in columns) for cond in conds[index])
+
+
+def _checked_queries():
+    # imported here: the api blueprint imports services that import this package
+    from blueprints.api.routes import _competitions_summary_query
+    from models import Competition
+    from services.competition_service import (
+        now_tunis, running_competitions_filter, open_registration_filter,
+        ending_competitions_filter, eligible_users_filter
+    )
+    from services.ranking import ranked_participants
+
+    now = now_tunis()
+    sample_comp = SimpleNamespace(
+        start_date=now.replace(tzinfo=None) - timedelta(days=30),
+        registration_deadline=now.replace(tzinfo=None) + timedelta(days=1)
+    )
+    ranked = ranked_participants(1)
+
+    return [
+        ("planned refresh: running competitions",
+         db.select(Competition.id).where(*running_competitions_filter(now)),
+         "ix_competitions_active_end_start", ("end_date", "start_date")),
+        ("close_competition: ended competitions",
+         db.select(Competition.id).where(*ending_competitions_filter(now)).order_by(Competition.end_date),
+         "ix_competitions_active_end_start", ("end_date",)),
+        ("update_competitions: open registrations",
+         db.select(Competition.id).where(*open_registration_filter(now)),
+         "ix_competitions_active_registration", ("registration_deadline", "start_date")),
+        ("update_competitions: eligible users",
+         db.select(User.id).where(*eligible_users_filter(sample_comp, now)),
+         "ix_users_enrollment_candidates", ("date_wedding",)),
+        ("ranking: participants of a competition",
+         db.select(ranked.c.user_id, ranked.c.rank),
+         "ix_user_competition_competition_id", ("competition_id",)),
+        ("api: competitions newest first",
+         _competitions_summary_query().order_by(Competition.start_date.desc()),
+         "ix_competitions_start_date", None),
+        ("user_home: user by qr code",
+         db.select(User.id).where(User.id_qr_code == "USER1"),
+         "users_id_qr_code_key", ("id_qr_code",)),
+    ]
+
+
+def explain_queries():
+    """
+    EXPLAIN the scheduler and API query shapes and check their index searches.
+
+    Sequential scans are disabled for the check: on a small database
+    Postgres seq-scans everything, which says nothing about whether the
+    index matches the query shape. That also makes the planner fall back
+    to full index scans, so a query only passes when its range columns
+    are in the Index Cond. Returns a list of result dicts.
+    """
+    results = []
+    conn = db.session.connection()
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    try:
+        for name, statement, expected, columns in _checked_queries():
+            compiled = statement.compile(dialect=conn.dialect)
+            row = conn.exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params
+            ).scalar()
+            plan = (json.loads(row) if isinstance(row, str) else row)[0]["Plan"]
+            conds, _ = _index_conditions(plan)
+            results.append({
+                "query": name,
+                "expected_index": expected,
+                "expected_cond": list(columns) if columns else "order by",
+                "used_indexes": sorted(conds),
+                "ok": _check(plan, expected, columns),
+            })
+    finally:
+        db.session.rollback()
+    return results
+
+
+@click.command("explain-queries")
+def explain_queries_command():
+    """Check that scheduler and API queries search their indexes on the right columns."""
+    results = explain_queries()
+    for r in results:
+        status = "OK  " if r["ok"] else "MISS"
+        cond = r["expected_cond"] if isinstance(r["expected_cond"], str) else ", ".join(r["expected_cond"])
+        click.echo(f"{status} {r['query']:<42} expects {r['expected_index']} on {cond:<32} uses {', '.join(r['used_indexes']) or '-'}")
+    if not all(r["ok"] for r in results):
+        raise SystemExit(1)
+
+
+def init_app(app):
+    app.cli.add_command(explain_queries_command)
@@ -0,0 +1,61 @@
+from extensions import db
+from models import User, user_competition
+
+
+def ranked_participants(competition_id=None):
+    """
+    Subquery ranking participants server-side with
+    RANK() OVER (PARTITION BY competition ORDER BY likes_number DESC).
+
+    Only the columns needed by the leaderboard and the admin list are selected.
+    """
+    query = db.select(
+        user_competition.c.competition_id,
+        User.id.label('user_id'),
+        User.full_name,
+        User.id_qr_code,
+        User.is_gold,
+        User.url,
+        db.func.coalesce(User.likes_number, 0).label('likes_number'),
+        db.func.coalesce(User.views_number, 0).label('views_number'),
+        db.func.rank().over(
+            partition_by=user_competition.c.competition_id,
+            order_by=db.func.coalesce(User.likes_number, 0).desc()
+        ).label('rank')
+    ).join(User, User.id == user_competition.c.user_id)
+
+    if competition_id is not None:
+        query = query.where(user_competition.c.competition_id == competition_id)
+    return query.subquery('ranked')
+
+
+def apply_ranks(competition_id=None):
+    """
+    Write `users.rank` for one competition (or all) with a single UPDATE ... FROM.
+
+    Only rows whose rank moved are written (no dead tuples), and they bump
+    the 'standings' data version, not 'users': the users list shows no rank.
+    """
+    ranked = ranked_participants(competition_id)
+    result = db.session.execute(
+        db.update(User)
+        .where(User.id == ranked.c.user_id, User.rank.is_distinct_from(ranked.c.rank))
+        .values(rank=ranked.c.rank)
+        .execution_options(synchronize_session=False, data_version="standings")
+    )
+    return result.rowcount
+
+
+def top_n(competition_id, n=10):
+    ranked = ranked_participants(competition_id)
+    query = db.select(ranked).order_by(ranked.c.rank, ranked.c.user_id)
+    if n is not None:
+        query = query.limit(n)
+    return db.session.execute(query).all()
+
+
+def rank_of(competition_id, user_id):
+    ranked = ranked_participants(competition_id)
+    return db.session.execute(
+        db.select(ranked.c.rank).where(ranked.c.user_id == user_id)
+    ).scalar()
@@ -0,0 +1,193 @@
+import heapq
+from datetime import datetime, timedelta
+from extensions import db
+from models import Competition, User, user_competition
+from services.competition_service import now_tunis, running_competitions_filter
+from services.facebook_likes import GRAPH_MAX_IDS_PER_REQUEST, graph_circuit, graph_usage
+from services.leaderboard import rebuild_leaderboard
+from services.likes_fetcher import call_budget, refresh_users_likes
+
+# refresh interval bounds
+MIN_INTERVAL = timedelta(minutes=10)
+MAX_INTERVAL = timedelta(hours=24)
+
+# wait after a permanent fetch error (removed / invalid video, API error), doubled per failure
+ERROR_BACKOFF = timedelta(hours=1)
+
+# how many ranks count as "top" (shown on every card's leaderboard)
+HOT_RANKS = 10
+
+
+def throttle_factor():
+    """Share of the hourly budget to use, from the Graph usage headers."""
+    usage = graph_usage.snapshot()
+    if usage["blocked_for_s"] > 0 or usage["percent"] >= 90:
+        return 0.0
+    # circuit open: due users stay due (and keep their last likes) until Graph is back
+    if not graph_circuit.available():
+        return 0.0
+    if usage["percent"] >= 75:
+        return 0.25
+    if usage["percent"] >= 50:
+        return 0.5
+    return 1.0
+
+
+def refresh_interval(base, now_local, now_utc, end_date, rank, changed_at):
+    """
+    How stale a participant may get before it is refreshed again.
+
+    Shorter near the competition end, for the top ranks and for videos whose
+    likes moved recently. Longer for videos that have not changed in days.
+    """
+    interval = base
+
+    time_left = end_date - now_local
+    if time_left <= timedelta(hours=6):
+        interval = min(interval, MIN_INTERVAL)
+    elif time_left <= timedelta(days=1):
+        interval = min(interval, timedelta(minutes=30))
+    elif time_left <= timedelta(days=3):
+        interval = min(interval, timedelta(hours=2))
+
+    if rank and rank <= HOT_RANKS:
+        interval /= 2
+
+    if changed_at is None or now_utc - changed_at > timedelta(days=3):
+        interval *= 2  # static video: back off
+    elif now_utc - changed_at < timedelta(hours=2):
+        interval /= 2
+
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
+
+
+def error_backoff(failures):
+    """How long a video that failed `failures` times in a row is left alone."""
+    return min(MAX_INTERVAL, ERROR_BACKOFF * 2 ** (failures - 1))
+
+
+def plan_refresh(app, now_local=None, now_utc=None):
+    """
+    Pick the participants to refresh in this run, most overdue first.
+
+    Every participant of a running competition gets a staleness priority
+    (age / allowed interval). Entries with priority >= 1 are due; they are
+    popped from a heap until this run's share of the hourly Graph budget is
+    used. Videos that keep failing for themselves wait out an exponential
+    backoff; transient failures (Graph down) leave users due.
+    Returns (user_ids, budget_calls).
+    """
+    now_local = now_local or now_tunis()
+    now_utc = now_utc or datetime.utcnow()
+    base = timedelta(minutes=app.config["LIKES_REFRESH_BASE_MINUTES"])
+
+    rows = db.session.execute(
+        db.select(
+            User.id,
+            User.rank,
+            User.likes_refreshed_at,
+            User.likes_changed_at,
+            User.likes_failed_at,
+            User.likes_failures,
+            db.func.min(Competition.end_date).label('end_date')
+        ).join(
+            user_competition, user_competition.c.user_id == User.id
+        ).join(
+            Competition, Competition.id == user_competition.c.competition_id
+        ).where(
+            *running_competitions_filter(now_local),
+            User.url.isnot(None),
+            User.url != ''
+        ).group_by(User.id)
+    ).all()
+
+    naive_local = now_local.replace(tzinfo=None)
+    heap = []
+    for row in rows:
+        if row.likes_failures and now_utc - row.likes_failed_at < error_backoff(row.likes_failures):
+            continue
+        interval = refresh_interval(base, naive_local, now_utc, row.end_date, row.rank, row.likes_changed_at)
+        if row.likes_refreshed_at is None:
+            priority = float("inf")  # never fetched
+        else:
+            priority = (now_utc - row.likes_refreshed_at) / interval
+        if priority >= 1:
+            heapq.heappush(heap, (-priority, row.id))
+
+    # this run's share of the hourly budget, scaled down when Graph reports high usage
+    runs_per_hour = max(1, 60 // app.config["LIKES_REFRESH_PLAN_MINUTES"])
+    per_hour = app.config["LIKES_GRAPH_CALLS_PER_HOUR"]
+    remaining = max(0, per_hour - call_budget.spent())
+    calls = min(remaining, int(per_hour / runs_per_hour * throttle_factor()))
+    if calls <= 0:
+        return [], 0
+
+    # full batches; rejected ones need more requests, run_planned_refresh caps the run at `calls`
+    capacity = calls * GRAPH_MAX_IDS_PER_REQUEST
+    user_ids = [heapq.heappop(heap)[1] for _ in range(min(capacity, len(heap)))]
+    return user_ids, calls
+
+
+def staleness(app, now_local=None, now_utc=None):
+    """Participants of running competitions whose likes are older than the base interval."""
+    now_local = now_local or now_tunis()
+    now_utc = now_utc or datetime.utcnow()
+    limit = now_utc - timedelta(minutes=app.config["LIKES_REFRESH_BASE_MINUTES"])
+    participants = db.select(User.id, User.likes_refreshed_at).join(
+        user_competition, user_competition.c.user_id == User.id
+    ).join(
+        Competition, Competition.id == user_competition.c.competition_id
+    ).where(
+        *running_competitions_filter(now_local),
+        User.url.isnot(None),
+        User.url != ''
+    ).distinct().subquery()
+
+    total, stale, oldest = db.session.execute(
+        db.select(
+            db.func.count(),
+            db.func.count().filter(db.or_(
+                participants.c.likes_refreshed_at.is_(None), participants.c.likes_refreshed_at < limit
+            )),
+            db.func.min(participants.c.likes_refreshed_at)
+        )
+    ).one()
+    return {
+        "participants": total,
+        "stale": stale,
+        "stale_after_minutes": app.config["LIKES_REFRESH_BASE_MINUTES"],
+        "oldest_refresh_age_s": round((now_utc - oldest).total_seconds()) if oldest else None,
+    }
+
+
+def run_planned_refresh(app):
+    """Scheduler job: refresh the most overdue participants within the Graph call budget."""
+    with app.app_context():
+        try:
+            user_ids, calls = plan_refresh(app)
+            if not user_ids:
+                app.logger.info(f"Likes refresh: nothing due (budget {calls} calls, usage {graph_usage.snapshot()}).")
+                return
+
+            users = User.query.filter(User.id.in_(user_ids)).all()
+            # never more than this run's share, retries included; spent from the shared budget
+            refresh_users_likes(app, users, max_requests=calls)
+
+            competition_ids = db.session.execute(
+                db.select(user_competition.c.competition_id).distinct().join(
+                    Competition, Competition.id == user_competition.c.competition_id
+                ).where(
+                    user_competition.c.user_id.in_(user_ids),
+                    *running_competitions_filter(now_tunis())
+                )
+            ).scalars().all()
+            for competition_id in competition_ids:
+                rebuild_leaderboard(competition_id)
+
+            db.session.commit()
+            app.logger.info(f"Likes refresh: {len(user_ids)} due users refreshed, {call_budget.spent()} Graph calls this hour.")
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error in run_planned_refresh: {e}")
+        finally:
+            db.session.remove()  # ✅ Clean up session
@@ -1,19 +1,36 @@
 from extensions import scheduler
-from services.competition_service import update_likes, create_monthly_competition, update_competitions, close_competition
+from services.competition_service import create_monthly_competition, update_competitions, close_competition
+from services.refresh_planner import run_planned_refresh
+from services.leader_election import scheduler_leader, leader_only
+from services.likes_history import rollup_history
 from functools import partial
+from datetime import datetime
 
 def init_scheduler(app):
+    # an interval of 0 would only fail inside the catch-all below, leaving no scheduler
+    if app.config["LIKES_REFRESH_PLAN_MINUTES"] <= 0:
+        raise ValueError("LIKES_REFRESH_PLAN_MINUTES must be a positive number of minutes")
+
     try:
         # ✅ Prevent double-init (Flask debug mode reloads twice)
         if scheduler.running:
             app.logger.info("Scheduler already running, skipping init.")
             return
 
+        # every worker runs a scheduler, only the advisory-lock holder runs the jobs
+        scheduler_leader.init_app(app)
+
         jobs = [
-            ("job_update_likes", partial(update_likes, app), "interval", {"hours": 24}),
-            ("job_create_monthly", partial(create_monthly_competition, app), "interval", {"hours": 24}),
-            ("job_update_competitions", partial(update_competitions, app), "interval", {"minutes": 5}),
-            ("job_close_competition", partial(close_competition, app), "interval", {"minutes": 60}),
+            # adaptive: refreshes the most overdue participants within the Graph call budget
+            ("job_update_likes", leader_only(partial(run_planned_refresh, app)), "interval",
+             {"minutes": app.config["LIKES_REFRESH_PLAN_MINUTES"]}),
+            ("job_create_monthly", leader_only(partial(create_monthly_competition, app)), "interval", {"hours": 24}),
+            ("job_update_competitions", leader_only(partial(update_competitions, app)), "interval", {"minutes": 5}),
+            ("job_close_competition", leader_only(partial(close_competition, app)), "interval", {"minutes": 60}),
+            ("job_rollup_likes_history", leader_only(partial(rollup_history, app)), "interval", {"minutes": 60}),
+            # leader election / failover: a dead leader's lock is picked up within one interval
+            ("job_leader_election", scheduler_leader.check, "interval",
+             {"seconds": app.config["SCHEDULER_LEADER_CHECK_SECONDS"], "next_run_time": datetime.now()}),
         ]
 
         for job_id, func, trigger, kwargs in jobs:
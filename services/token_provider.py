@@ -0,0 +1,72 @@
+import threading
+import time
+from sqlalchemy.exc import SQLAlchemyError
+from extensions import db
+from services.facebook_likes import GraphAuthError
+
+
+class AccessTokenProvider:
+    """
+    Graph API access token read from the `config` table, cached for a short TTL.
+
+    The hot path is a clock comparison. A stale cache, or a Graph auth error
+    (see `call`), re-reads the row, so rotating the token in the database is
+    picked up by every worker without a restart.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._ttl = 60
+        self._token = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        self._ttl = app.config["ACCESS_TOKEN_TTL"]
+
+    def _read(self):
+        # may run in a fetch worker thread: use its own app context and a plain connection
+        from models import config
+        with self._app.app_context():
+            try:
+                with db.engine.connect() as conn:
+                    return conn.execute(
+                        db.select(config.value).where(config.name == "ACCESS_TOKEN")
+                    ).scalar()
+            except SQLAlchemyError as e:
+                # fresh database (before `flask db upgrade`) or DB hiccup: keep what we have
+                self._app.logger.warning(f"Could not load ACCESS_TOKEN: {e}")
+                return self._token
+
+    def get(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self._ttl:
+            return self._token
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self._ttl:
+                self._token = self._read()
+                self._loaded_at = time.monotonic()
+            return self._token
+
+    def refresh(self, rejected_token):
+        """Re-read the token after `rejected_token` failed, once for all concurrent callers."""
+        with self._lock:
+            if self._token == rejected_token:
+                self._token = self._read()
+                self._loaded_at = time.monotonic()
+            return self._token
+
+    def call(self, fn, *args):
+        """Run fn(*args, token); on GraphAuthError reload the token and retry once."""
+        token = self.get()
+        try:
+            return fn(*args, token)
+        except GraphAuthError:
+            fresh = self.refresh(token)
+            if fresh == token:
+                raise
+            return fn(*args, fresh)
+
+
+access_token_provider = AccessTokenProvider()
@@ -0,0 +1,335 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import click
+from extensions import db
+from models import User
+from services import data_versions, page_cache
+
+# importable / exported columns (DB names) and their parsers
+_TRUE = {'1', 'true', 'yes', 'y', 'oui', 't'}
+_FALSE = {'0', 'false', 'no', 'n', 'non', 'f', ''}
+
+
+def _text(limit):
+    def parse(value):
+        if value is None:
+            return None
+        value = str(value).strip()
+        if len(value) > limit:
+            raise ValueError(f"longer than {limit} characters")
+        return value or None
+    return parse
+
+
+def _money(value):
+    if value in (None, ''):
+        return Decimal('0.00')
+    try:
+        amount = Decimal(str(value).replace(',', '.')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError("not a number")
+    if abs(amount) >= Decimal('100000000'):
+        raise ValueError("out of range")
+    return amount
+
+
+def _int(value):
+    if value in (None, ''):
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("not an integer")
+
+
+def _bool(default):
+    def parse(value):
+        if value is None:
+            return default
+        if isinstance(value, bool):
+            return value
+        value = str(value).strip().lower()
+        if value in _TRUE:
+            return True
+        if value in _FALSE:
+            return default if value == '' else False
+        raise ValueError("not a boolean")
+    return parse
+
+
+def _date(value):
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError("expected YYYY-MM-DD")
+
+
+COLUMNS = {
+    'id_qr_code': _text(120),
+    'full_name': _text(80),
+    'phone_number': _text(20),
+    'date_wedding': _date,
+    'lieu_wedding': _text(120),
+    'url': _text(200),
+    'solde_to_pay': _money,
+    'avance_paid': _money,
+    'reduction': _money,
+    'slow_music': _text(500),
+    'in_music': _text(500),
+    'special_music': _text(500),
+    'pnts': _int,
+    'note': _text(5000),
+    'is_gold': _bool(True),
+    'is_active': _bool(False),
+}
+
+# model defaults are applied by the ORM, not the DB: new rows get them explicitly
+INSERT_DEFAULTS = {
+    'solde_to_pay': Decimal('0.00'),
+    'avance_paid': Decimal('0.00'),
+    'reduction': Decimal('0.00'),
+    'pnts': 0,
+    'is_gold': True,
+    'is_active': False,
+    'is_winner': False,
+    'rank': 0,
+    'likes_number': 0,
+    'views_number': 0,
+}
+
+MAX_REPORTED_ERRORS = 1000
+EXPORT_CHUNK = 1000
+
+
+def _records(stream, fmt):
+    """(line number, dict) per input record. `stream` is a text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_num, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield line_num, record if isinstance(record, dict) else {'__invalid__': True}
+
+
+class _CopySource:
+    """File-like over an iterator of CSV lines, read by COPY ... FROM STDIN."""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def import_users(stream, fmt='csv', dry_run=False):
+    """
+    Validate and upsert users keyed on id_qr_code, in one transaction.
+
+    Valid rows are streamed into a temp table with COPY, then merged with a
+    single INSERT ... ON CONFLICT. Only the columns present in the file are
+    updated on existing users, new users get the model defaults for the
+    rest. Invalid rows are skipped and reported. The caller commits.
+    """
+    started = time.perf_counter()
+    errors, error_count = [], 0
+    seen = set()
+    imported_codes = []
+
+    def report(line, qr_code, message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({'line': line, 'id_qr_code': qr_code, 'error': message})
+
+    records = _records(stream, fmt)
+    first = next(records, None)
+    if first is None:
+        return {'inserted': 0, 'updated': 0, 'valid': 0, 'error_count': 0, 'errors': [],
+                'dry_run': dry_run, 'elapsed_s': 0.0}
+
+    # the first record (CSV header / first NDJSON object) decides which columns the file carries
+    present = [c for c in COLUMNS if c in first[1]]
+    if 'id_qr_code' not in present:
+        raise ValueError("the file needs an id_qr_code column")
+    columns = present + [c for c in INSERT_DEFAULTS if c not in present]
+
+    def valid_lines():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for line, record in _chain(first, records):
+            if record.get('__invalid__'):
+                report(line, None, "not a JSON object")
+                continue
+            row, qr_code = {}, record.get('id_qr_code')
+            try:
+                extra = [c for c in COLUMNS if c in record and c not in present]
+                if extra:
+                    raise ValueError(f"{', '.join(extra)}: not in the first record's columns")
+                for column in present:
+                    try:
+                        row[column] = COLUMNS[column](record.get(column))
+                    except ValueError as e:
+                        raise ValueError(f"{column}: {e}")
+                qr_code = row['id_qr_code']
+                if not qr_code:
+                    raise ValueError("id_qr_code is required")
+                if qr_code in seen:
+                    raise ValueError("duplicate id_qr_code in file")
+            except ValueError as e:
+                report(line, qr_code, str(e))
+                continue
+            seen.add(qr_code)
+            imported_codes.append(qr_code)
+            writer.writerow(['\\N' if v is None else v for v in
+                             (row[c] if c in row else INSERT_DEFAULTS[c] for c in columns)])
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+
+    quoted = ', '.join(f'"{c}"' for c in columns)
+    cursor = db.session.connection().connection.driver_connection.cursor()
+    try:
+        cursor.execute(
+            f"CREATE TEMP TABLE users_import ON COMMIT DROP AS SELECT {quoted} FROM users WITH NO DATA"
+        )
+        cursor.copy_expert(
+            f"COPY users_import ({quoted}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            _CopySource(valid_lines())
+        )
+        inserted = updated = 0
+        if not dry_run:
+            updates = ', '.join(f'"{c}" = EXCLUDED."{c}"' for c in present if c != 'id_qr_code')
+            conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            cursor.execute(
+                f"INSERT INTO users ({quoted}) SELECT {quoted} FROM users_import "
+                f"ON CONFLICT (id_qr_code) {conflict} RETURNING (xmax = 0)"
+            )
+            for (was_inserted,) in cursor:
+                if was_inserted:
+                    inserted += 1
+                else:
+                    updated += 1
+        cursor.execute("DROP TABLE users_import")
+    finally:
+        cursor.close()
+
+    if not dry_run:
+        page_cache.invalidate_on_commit(qr_ids=imported_codes)
+        # COPY / raw SQL is invisible to the ORM events
+        data_versions.touch("users")
+
+    return {
+        'inserted': inserted,
+        'updated': updated,
+        'valid': len(imported_codes),
+        'error_count': error_count,
+        'errors': errors,
+        'dry_run': dry_run,
+        'elapsed_s': round(time.perf_counter() - started, 3),
+    }
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def _export_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def export_users(fmt='csv'):
+    """Yield the users table as CSV or NDJSON chunks, through a server-side cursor."""
+    names = list(COLUMNS)
+    table = User.__table__
+    query = db.select(*(table.c[name] for name in names)).order_by(table.c.id)
+    result = db.session.execute(query.execution_options(yield_per=EXPORT_CHUNK))
+
+    if fmt == 'csv':
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(names)
+        for partition in result.partitions():
+            writer.writerows([_export_value(v) for v in row] for row in partition)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+    else:
+        for partition in result.partitions():
+            # dates and amounts as strings, like /api/users
+            yield ''.join(json.dumps(dict(zip(names, row)), default=str) + '\n' for row in partition)
+
+
+def guess_format(filename, default='csv'):
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+@click.command("import-users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default=None)
+@click.option("--dry-run", is_flag=True, help="validate only, nothing is written")
+def import_users_command(path, fmt, dry_run):
+    """Bulk upsert users from a CSV or NDJSON file (keyed on id_qr_code)."""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        try:
+            summary = import_users(f, fmt or guess_format(path), dry_run=dry_run)
+        except Exception:
+            db.session.rollback()
+            raise
+    db.session.commit()
+    for error in summary['errors']:
+        click.echo(f"line {error['line']} ({error['id_qr_code']}): {error['error']}", err=True)
+    if dry_run:
+        click.echo(f"{summary['valid']} valid, {summary['error_count']} rejected (dry run, nothing written)")
+    else:
+        click.echo(f"{summary['inserted']} inserted, {summary['updated']} updated, "
+                   f"{summary['error_count']} rejected in {summary['elapsed_s']}s")
+
+
+@click.command("export-users")
+@click.argument("path", type=click.Path(dir_okay=False, writable=True, allow_dash=True))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default=None)
+def export_users_command(path, fmt):
+    """Write all users to a CSV or NDJSON file ('-' for stdout)."""
+    fmt = fmt or guess_format(path)
+    with click.open_file(path, 'wb') as f:
+        for chunk in export_users(fmt):
+            f.write(chunk.encode('utf-8'))
+
+
+def init_app(app):
+    app.cli.add_command(import_users_command)
+    app.cli.add_command(export_users_command)
@@ -0,0 +1,480 @@
+        let html5QrcodeScanner = null;
+        let allUsers = []; 
+
+        const getUserType = (is_gold) => is_gold ? 'Gold' : 'Platinum';
+
+        const getUserTypeClass = (type) => {
+            const typeMap = { 'Gold': 'type-gold', 'Platinum': 'type-platinum' };
+            return typeMap[type] || '';
+        };
+
+        function toggleFilters() {
+            const filterInputs = document.getElementById('filterInputs');
+            const toggleBtn = document.querySelector('.filter-toggle-btn');
+
+            filterInputs.classList.toggle('show');
+            toggleBtn.classList.toggle('active');
+        }
+
+        function showTab(event, tabName) {
+            document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+            document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+
+            event.target.classList.add('active');
+            document.getElementById(tabName + '-tab').classList.add('active');
+
+            if (tabName === 'users') {
+                loadUsers();
+                if (html5QrcodeScanner?.getState() === 2) stopScanner();
+            }
+        }
+
+        function startScanner() {
+            hideUserForm();
+
+            if (!html5QrcodeScanner) {
+                html5QrcodeScanner = new Html5Qrcode("qr-reader");
+            }
+
+            const config = {
+                fps: 10,
+                qrbox: { width: 200, height: 200 },
+                aspectRatio: 1.0,
+                disableFlip: false
+            };
+
+            html5QrcodeScanner.start(
+                { facingMode: "environment" },
+                config,
+                onScanSuccess,
+                onScanError
+            ).catch(err => {
+                console.error("Impossible de démarrer le scan", err);
+                showAlert("Accès à la caméra refusé ou non disponible", "error");
+                toggleScanButtons(true);
+            });
+
+            toggleScanButtons(false);
+        }
+
+        function stopScanner() {
+            if (html5QrcodeScanner) {
+                html5QrcodeScanner.stop()
+                    .then(() => html5QrcodeScanner.clear())
+                    .catch(err => console.error("Erreur lors de l'arrêt du scanner:", err));
+            }
+            toggleScanButtons(true);
+        }
+
+        function toggleScanButtons(showStart) {
+            document.getElementById('startScanBtn').style.display = showStart ? 'inline-block' : 'none';
+            document.getElementById('stopScanBtn').style.display = showStart ? 'none' : 'inline-block';
+        }
+
+        function onScanSuccess(decodedText) {
+            console.log('Code QR détecté:', decodedText);
+            showAlert('Code QR scanné avec succès!', 'success');
+            stopScanner();
+
+            const qrCodeId = extractQrCodeId(decodedText);
+
+            if (qrCodeId) {
+                console.log('ID Code QR extrait:', qrCodeId);
+                loadUserByQrCode(qrCodeId);
+            } else {
+                showAlert('Impossible d\'extraire l\'ID du code QR : ' + decodedText, 'error');
+            }
+        }
+
+    function extractQrCodeId(decodedText) {
+    // Pattern for the new URL structure with embedded user_id
+    // Matches: AbX9TqVrKmN{USER_ID}4FjHsW2GyUeRc
+    const urlPattern = /AbX9TqVrKmN([A-Z0-9-_]+?)4FjHsW2GyUeRc/i;
+    const match = decodedText.match(urlPattern);
+
+    if (match && match[1]) {
+        console.log('Extracted ID from pattern:', match[1]);
+        return match[1];
+    }
+
+    // Fallback: Handle URLs with slashes (old format)
+    if (decodedText.includes('/')) {
+        const parts = decodedText.split('/').filter(Boolean);
+        const lastPart = parts[parts.length - 1];
+        console.log('Extracted ID from URL path:', lastPart);
+        return lastPart;
+    }
+
+    console.log('Using raw decoded text as ID:', decodedText.trim());
+    return decodedText.trim();
+}
+
+    function onScanError(errorMessage) {
+            if (errorMessage && !errorMessage.includes("NotFound")) {
+                console.warn("Erreur de scan:", errorMessage);
+            }
+        }
+
+        function loadUserByQrCode(qrCodeId) {
+            fetch('/api/user/' + qrCodeId)
+                .then(response => response.json())
+                .then(data => {
+                    if (data.success) {
+                        populateUserForm(data.user);
+                        showAlert(data.user.id ? 'Client trouvé!' : 'Nouveau client - Veuillez remplir les détails', 'success');
+                    } else {
+                        showAlert('Erreur de chargement du client: ' + (data.error || 'Erreur inconnue'), 'error');
+                    }
+                })
+                .catch(error => {
+                    console.error('Erreur Fetch:', error);
+                    showAlert('Erreur de connexion au serveur', 'error');
+                });
+        }
+
+        function populateUserForm(user) {
+            const fields = {
+                userId: user.id || '',
+                idQrCode: user.id_qr_code,
+                fullName: user.full_name || '',
+                phoneNumber: user.phone_number || '',
+                dateWedding: user.date_wedding || '',
+                lieuWedding: user.lieu_wedding || '',
+                url: user.url || '',
+                soldeToPay: user.solde_to_pay || 0,
+                avancePaid: user.avance_paid || 0,
+                reduction: user.reduction || 0,
+                slowMusic: user.slow_music || '',
+                inMusic: user.in_music || '',
+                specialMusic: user.special_music || '',
+                pnts: user.pnts || 0,
+                note: user.note || ''
+            };
+
+            Object.entries(fields).forEach(([key, value]) => {
+                const element = document.getElementById(key);
+                if (element) element.value = value;
+            });
+
+            document.getElementById('isGold').checked = user.is_gold;
+            document.getElementById('isActive').checked = user.id ? user.is_active : true;
+
+            toggleUrlField(user.is_gold);
+
+            document.getElementById('isGold').onchange = function() {
+                toggleUrlField(this.checked);
+            };
+
+            document.getElementById('userForm').classList.add('show');
+        }
+
+        function toggleUrlField(show) {
+            const urlFormGroup = document.getElementById('url-form-group');
+            urlFormGroup.style.display = show ? 'block' : 'none';
+            if (!show) document.getElementById('url').value = '';
+        }
+
+        const USER_LIST_FIELDS = 'id,id_qr_code,full_name,phone_number,date_wedding,lieu_wedding,solde_to_pay,avance_paid,reduction,is_gold,is_active';
+
+        // Load the users table page by page (keyset pagination on id)
+        function loadUsers() {
+            const users = [];
+            const loadPage = (afterId) => {
+                const cursor = afterId ? `&after_id=${afterId}` : '';
+                return fetch(`/api/users?fields=${USER_LIST_FIELDS}&limit=1000${cursor}`)
+                    .then(response => response.json())
+                    .then(data => {
+                        if (!data.success) throw new Error(data.error);
+                        users.push(...(data.users || []));
+                        if (data.next_after_id) return loadPage(data.next_after_id);
+                    });
+            };
+
+            loadPage(null)
+                .then(() => {
+                    allUsers = users;
+                    displayUsers(allUsers);
+                })
+                .catch(error => {
+                    console.error('Erreur de chargement des clients:', error);
+                    alert('Erreur de chargement des clients.');
+                });
+        }
+
+        function displayUsers(users) {
+            const tbody = document.getElementById('usersTableBody');
+            tbody.innerHTML = '';
+
+            if (users.length === 0) {
+                tbody.innerHTML = '<tr><td colspan="10" style="text-align:center; padding: 10px;">Aucun client trouvé.</td></tr>';
+                return;
+            }
+
+            users.forEach(user => {
+                const userType = getUserType(user.is_gold);
+                const typeBadgeClass = getUserTypeClass(userType);
+
+                const row = tbody.insertRow();
+                row.innerHTML = `
+                    <td>${user.id_qr_code}</td>
+                    <td>${user.full_name || '-'}</td>
+                    <td>${user.phone_number || '-'}</td>
+                    <td>${user.date_wedding || '-'}</td>
+                    <td>${user.lieu_wedding || '-'}</td>
+                    <td>${(Number(user.solde_to_pay) || 0).toFixed(2)} DT</td>
+                    <td>${(Number(user.avance_paid) || 0).toFixed(2)} DT</td>
+                    <td>${(Number(user.reduction )|| 0).toFixed(2)} DT</td>
+                    <td><span class="status-badge ${user.is_active ? 'status-active' : 'status-inactive'}">${user.is_active ? 'Actif' : 'Inactif'}</span></td>
+                    <td><span class="user-type-badge ${typeBadgeClass}">${userType}</span></td>
+                    <td>
+                        <div class="action-icon-group">
+                            <button class="action-icon edit" title="Modifier" onclick="editUser('${user.id_qr_code}')"><i class="fas fa-edit"></i></button>
+                            <button class="action-icon delete" title="Supprimer" onclick="deleteUser(${user.id})"><i class="fas fa-trash-alt"></i></button>
+                            <button class="action-icon" title="link" onclick="window.open('/AbX9TqVrKmN${user.id_qr_code}4FjHsW2GyUeRk', '_blank')"><i class="fas fa-link"></i></button>
+                            <button class="action-icon" title="QR" onclick="window.open('/api/qr/${user.id_qr_code}.png', '_blank')"><i class="fas fa-qrcode"></i></button>
+                    </td>
+                `;
+            });
+        }
+
+        // bulk import: one request, one transaction, rejected rows listed in the alert
+        function importUsers(input) {
+            const file = input.files[0];
+            if (!file) return;
+            const formData = new FormData();
+            formData.append('file', file);
+            fetch('/api/users/import', { method: 'POST', body: formData })
+                .then(response => response.json())
+                .then(result => {
+                    input.value = '';
+                    if (!result.success) {
+                        showAlert('Erreur import: ' + (result.error || 'Erreur inconnue'), 'error');
+                        return;
+                    }
+                    let message = `${result.inserted} ajoutés, ${result.updated} mis à jour, ${result.error_count} rejetés`;
+                    if (result.errors.length) {
+                        message += ' — ' + result.errors.slice(0, 5).map(e => `ligne ${e.line}: ${e.error}`).join('; ');
+                    }
+                    showAlert(message, result.error_count ? 'error' : 'success');
+                    loadUsers();
+                })
+                .catch(() => showAlert('Erreur de connexion au serveur', 'error'));
+        }
+
+        function searchUsers() {
+            const filters = {
+                name: document.getElementById('searchName').value.toLowerCase(),
+                qrCode: document.getElementById('searchQrCode').value.toLowerCase(),
+                date: document.getElementById('searchDate').value,
+                type: document.getElementById('filterType').value,
+                status: document.getElementById('filterStatus').value
+            };
+
+            const filtered = allUsers.filter(user => {
+                const nameMatch = !filters.name || (user.full_name?.toLowerCase().includes(filters.name));
+                const qrMatch = !filters.qrCode || (user.id_qr_code?.toLowerCase().includes(filters.qrCode));
+                const dateMatch = !filters.date || user.date_wedding === filters.date;
+
+                const userType = getUserType(user.is_gold).toLowerCase();
+                const typeMatch = filters.type === 'tous' || userType === filters.type;
+
+                const statusMatch = filters.status === 'tous' ||
+                                  (filters.status === 'actif' && user.is_active) ||
+                                  (filters.status === 'inactif' && !user.is_active);
+
+                return nameMatch && qrMatch && dateMatch && typeMatch && statusMatch;
+            });
+
+            displayUsers(filtered);
+        }
+
+        function clearSearch() {
+            const searchDate = document.getElementById('searchDate');
+            document.getElementById('searchName').value = '';
+            document.getElementById('searchQrCode').value = '';
+            searchDate.value = '';
+            searchDate.type = 'text';
+            document.getElementById('filterType').value = 'tous';
+            document.getElementById('filterStatus').value = 'tous';
+            displayUsers(allUsers);
+        }
+
+        function editUser(qrCodeId) {
+            document.querySelector('.tab:first-child').click(); 
+            loadUserByQrCode(qrCodeId);
+        }
+
+        function deleteUser(userId) {
+            if (!confirm('Êtes-vous sûr de vouloir supprimer ce client ?')) return;
+
+            fetch('/api/user/delete/' + userId, { method: 'DELETE' })
+                .then(response => response.json())
+                .then(result => {
+                    if (result.success) {
+                        showAlert('Client supprimé avec succès!', 'success');
+                        loadUsers(); 
+                    } else {
+                        showAlert('Erreur lors de la suppression du client: ' + (result.error || 'Erreur inconnue'), 'error');
+                    }
+                })
+                .catch(error => {
+                    console.error('Erreur Fetch:', error);
+                    showAlert('Erreur de connexion au serveur', 'error');
+                });
+        }
+
+        function hideUserForm() {
+            document.getElementById('userForm').classList.remove('show');
+            document.getElementById('saveUserForm').reset();
+            document.getElementById('alertContainer').innerHTML = '';
+            document.getElementById('url-form-group').style.display = 'none';
+        }
+
+        function addUserManually() {
+            stopScanner();
+            // Generate a new QR code ID
+            const newQrCodeId = 'USER-' + Date.now() + '-' + Math.random().toString(36).substr(2, 6).toUpperCase();
+
+            // Populate form with new QR code
+            document.getElementById('userId').value = '';
+            document.getElementById('idQrCode').value = newQrCodeId;
+            document.getElementById('fullName').value = '';
+            document.getElementById('phoneNumber').value = '';
+            document.getElementById('dateWedding').value = '';
+            document.getElementById('lieuWedding').value = '';
+            document.getElementById('url').value = '';
+            document.getElementById('soldeToPay').value = '';
+            document.getElementById('avancePaid').value = '';
+            document.getElementById('reduction').value = '';
+            document.getElementById('pnts').value = '';
+            document.getElementById('slowMusic').value = '';
+            document.getElementById('inMusic').value = '';
+            document.getElementById('specialMusic').value = '';
+            document.getElementById('note').value = '';
+            document.getElementById('isGold').checked = true;
+            document.getElementById('isActive').checked = false;
+            document.getElementById('alertContainer').innerHTML = '';
+
+            toggleUrlField(true);
+            document.getElementById('userForm').classList.add('show');
+        }
+
+        function checkAndCreateUser() {
+            stopScanner();
+            const numField = document.getElementById('manualNumber');
+            const raw = (numField && numField.value) ? numField.value.trim() : '';
+
+            if (!raw) {
+                showAlert('Veuillez entrer un numéro de client.', 'error');
+                return;
+            }
+
+            // Keep only digits
+            const digits = raw.replace(/\D/g, '');
+            if (!digits) {
+                showAlert('Le numéro doit contenir des chiffres (ex: 501).', 'error');
+                return;
+            }
+
+            const qrId = 'USER' + digits;
+
+            // Check existence via API
+            fetch('/api/user/' + qrId)
+                .then(resp => resp.json())
+                .then(data => {
+                    if (!data || !data.success) {
+                        showAlert('Erreur lors de la vérification du client.', 'error');
+                        return;
+                    }
+
+                    // If user exists (id is present), do not open fields
+                    if (data.user && data.user.id) {
+                        showAlert('Ce client existe déjà : ' + qrId, 'error');
+                        return;
+                    }
+
+                    // Not existing: open form with all fields editable and prefilled id
+                    document.getElementById('userId').value = '';
+                    document.getElementById('idQrCode').value = qrId;
+                    document.getElementById('fullName').value = '';
+                    document.getElementById('phoneNumber').value = '';
+                    document.getElementById('dateWedding').value = '';
+                    document.getElementById('lieuWedding').value = '';
+                    document.getElementById('url').value = '';
+                    document.getElementById('soldeToPay').value = '';
+                    document.getElementById('avancePaid').value = '';
+                    document.getElementById('reduction').value = '';
+                    document.getElementById('pnts').value = '';
+                    document.getElementById('slowMusic').value = '';
+                    document.getElementById('inMusic').value = '';
+                    document.getElementById('specialMusic').value = '';
+                    document.getElementById('note').value = '';
+                    document.getElementById('isGold').checked = true;
+                    document.getElementById('isActive').checked = false;
+                    document.getElementById('alertContainer').innerHTML = '';
+
+                    toggleUrlField(true);
+                    document.getElementById('userForm').classList.add('show');
+                })
+                .catch(err => {
+                    console.error('Erreur Fetch:', err);
+                    showAlert('Erreur de connexion au serveur', 'error');
+                });
+        }
+
+        function showAlert(message, type) {
+            const alertContainer = document.getElementById('alertContainer');
+            alertContainer.innerHTML = `<div class="alert alert-${type === 'error' ? 'error' : 'success'}">${message}</div>`;
+
+            setTimeout(() => {
+                alertContainer.innerHTML = '';
+            }, 5000);
+        }
+
+        function logout() {
+            window.location.href = '/logout';
+        }
+
+        document.getElementById('saveUserForm').addEventListener('submit', function(e) {
+            e.preventDefault();
+
+            const formData = new FormData(this);
+            const data = {
+                user_id: formData.get('user_id') || null,
+                id_qr_code: formData.get('id_qr_code'),
+                full_name: formData.get('full_name'),
+                phone_number: formData.get('phone_number'),
+                date_wedding: formData.get('date_wedding'),
+                lieu_wedding: formData.get('lieu_wedding'),
+                url: formData.get('url'),
+                solde_to_pay: parseFloat(formData.get('solde_to_pay')) || 0,
+                avance_paid: parseFloat(formData.get('avance_paid')) || 0,
+                reduction: parseFloat(formData.get('reduction')) || 0,
+                slow_music: formData.get('slow_music'),
+                in_music: formData.get('in_music'),
+                special_music: formData.get('special_music'),
+                pnts: parseInt(formData.get('pnts')) || 0,
+                note: formData.get('note'),
+                is_gold: document.getElementById('isGold').checked,
+                is_active: document.getElementById('isActive').checked
+            };
+
+            fetch('/api/user/save', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(data)
+            })
+            .then(response => response.json())
+            .then(result => {
+                if (result.success) {
+                    showAlert('Client enregistré avec succès!', 'success');
+                    setTimeout(hideUserForm, 2000);
+                } else {
+                    showAlert('Erreur lors de l\'enregistrement: ' + (result.error || 'Erreur inconnue'), 'error');
+                }
+            })
+            .catch(error => {
+                console.error('Erreur Fetch:', error);
+                showAlert('Erreur de connexion au serveur', 'error');
+            });
+        });
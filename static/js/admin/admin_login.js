@@ -0,0 +1,3 @@
+if (new URLSearchParams(window.location.search).get('error')) {
+    document.getElementById('notification').classList.add('show');
+}
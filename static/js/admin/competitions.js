@@ -0,0 +1,396 @@
+let allUsers = [];
+let currentCompetition = null;
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+    loadCompetitions();
+    loadAllUsers();
+});
+
+function goBack() {
+    window.location.href = '/admin/dashboard';
+}
+
+// Load all competitions
+function loadCompetitions() {
+    fetch('/api/competitions')
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                displayCompetitions(data.competitions);
+            } else {
+                showAlert('Erreur de chargement des Competition', 'danger');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showAlert('Erreur de connexion', 'danger');
+        });
+}
+
+// Display competitions
+function displayCompetitions(competitions) {
+    const container = document.getElementById('competitionsContainer');
+
+    if (!competitions || competitions.length === 0) {
+        container.innerHTML = '<div class="col-12"><div class="alert alert-info">Aucun Competition trouvé</div></div>';
+        return;
+    }
+
+    container.innerHTML = competitions.map(comp => {
+        const status = comp.is_active ? '<span class="badge bg-success">Actif</span>' : '<span class="badge bg-secondary">Inactif</span>';
+        const startDate = new Date(comp.start_date).toLocaleDateString('fr-FR');
+        const endDate = new Date(comp.end_date).toLocaleDateString('fr-FR');
+        const winner = comp.winner_name ? `<div class="mt-2"><strong>Gagnant:</strong> ${comp.winner_name}</div>` : '';
+        const didlineDate = new Date(comp.registration_deadline).toLocaleDateString('fr-FR');
+
+        return `
+            <div class="col-md-6 col-lg-4 mb-3">
+                <div class="card h-100 shadow-sm">
+                    <div class="card-header header text-white d-flex justify-content-between align-items-center">
+                        <h5 class="mb-0">${comp.name}</h5>
+                        ${status}
+                    </div>
+                    <div class="card-body">
+                        <p><strong>Début de competition:</strong> ${startDate}</p>
+                         <p><strong>Fin d'enregistrement:</strong> ${didlineDate}</p>
+                        <p><strong>Fin de competition:</strong> ${endDate}</p>
+                        <p><strong>Participants:</strong> ${comp.participants_count || 0}</p>
+                        ${winner}
+                    </div>
+                    <div class="card-footer bg-white">
+                        <div class="btn-group w-100" role="group">
+                            <button class="btn btn-sm btn-outline-warning me-2" onclick="viewParticipants(${comp.id})">
+                                <i class="fas fa-users"></i> Participants
+                            </button>
+
+                            <button class="btn btn-sm btn-outline-secondary me-2" onclick="editCompetition(${comp.id})">
+                                <i class="fas fa-edit"></i>
+                            </button>
+
+                            <button class="btn btn-sm btn-outline-danger me-2" onclick="deleteCompetition(${comp.id})">
+                                <i class="fas fa-trash"></i>
+                            </button>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        `;
+    }).join('');
+}
+
+// --- Competition CRUD Logic ---
+
+const competitionModal = new bootstrap.Modal(document.getElementById('competitionModal'));
+
+function showCreateCompetitionModal() {
+    document.getElementById('competitionForm').reset();
+    document.getElementById('competitionId').value = '';
+    document.getElementById('modalTitle').innerText = 'Nouveau Competition';
+    competitionModal.show();
+}
+
+function editCompetition(id) {
+    fetch(`/api/competitions/${id}`)
+        .then(res => res.json())
+        .then(data => {
+            if (data.success) {
+                const comp = data.competition;
+                document.getElementById('competitionId').value = comp.id;
+                document.getElementById('competitionName').value = comp.name;
+                document.getElementById('startDate').value = formatDateForInput(comp.start_date);
+                document.getElementById('endDate').value = formatDateForInput(comp.end_date);
+                document.getElementById('registrationDeadline').value = formatDateForInput(comp.registration_deadline);
+                document.getElementById('isActive').checked = comp.is_active;
+
+                document.getElementById('modalTitle').innerText = 'Modifier le Competition';
+                competitionModal.show();
+            }
+        });
+}
+
+function saveCompetition() {
+    const id = document.getElementById('competitionId').value;
+    const data = {
+        name: document.getElementById('competitionName').value,
+        start_date: document.getElementById('startDate').value,
+        end_date: document.getElementById('endDate').value,
+        registration_deadline: document.getElementById('registrationDeadline').value,
+        is_active: document.getElementById('isActive').checked
+    };
+
+    const method = id ? 'PUT' : 'POST';
+    const url = id ? `/api/competitions/${id}` : '/api/competitions';
+
+    fetch(url, {
+        method: method,
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    })
+    .then(res => res.json())
+    .then(result => {
+        if (result.success) {
+            competitionModal.hide();
+            loadCompetitions();
+            showAlert('Competition enregistré avec succès', 'success');
+        } else {
+            showAlert('Erreur lors de l\'enregistrement', 'danger');
+        }
+    });
+}
+
+function deleteCompetition(id) {
+    if (confirm('Êtes-vous sûr de vouloir supprimer ce Competition ?')) {
+        fetch(`/api/competitions/${id}`, { method: 'DELETE' })
+            .then(res => res.json())
+            .then(result => {
+                if (result.success) {
+                    loadCompetitions();
+                    showAlert('Competition supprimé', 'success');
+                }
+            });
+    }
+}
+
+// --- Participants Logic ---
+
+const participantsModal = new bootstrap.Modal(document.getElementById('participantsModal'));
+
+function loadAllUsers() {
+    fetch('/api/users?fields=id,full_name,id_qr_code') // only the columns the picker needs
+        .then(res => res.json())
+        .then(data => {
+            allUsers = data.users;
+            const select = document.getElementById('userSelect');
+            select.innerHTML = '<option value="">Sélectionner un client...</option>' + 
+                allUsers.map(u => `<option value="${u.id}">${u.full_name} (${u.id_qr_code})</option>`).join('');
+        });
+}
+
+function viewParticipants(competitionId) {
+    document.getElementById('currentCompetitionId').value = competitionId;
+    currentCompetition = competitionId;
+    loadParticipants(competitionId);
+    resumeLikesJob(competitionId);
+    participantsModal.show();
+}
+
+function loadParticipants(competitionId) {
+    fetch(`/api/competitions/${competitionId}/participants`)
+        .then(res => res.json())
+        .then(data => {
+            const list = document.getElementById('participantsList');
+            if (data.participants.length === 0) {
+                list.innerHTML = '<div class="col-12"><div class="alert alert-light">Aucun participant.</div></div>';
+                return;
+            }
+
+            list.innerHTML = data.participants.map(p => {
+                const badgeClass = p.is_gold ? 'gold-badge' : 'platinum-badge';
+                const badgeText = p.is_gold ? 'Gold' : 'Platinum';
+                const winBtn = p.is_winner ? 
+                    `<span class="badge bg-success"><i class="fas fa-trophy"></i> Gagnant</span>` :
+                    `<button class="btn btn-sm btn-outline-success" onclick="setWinner(${competitionId}, ${p.id})">Désigner Gagnant</button>`;
+
+                return `
+                <div class="col-md-12 mb-2">
+                    <div class="card participant-card">
+                        <div class="card-body d-flex justify-content-between align-items-center p-3">
+                            <div class="d-flex align-items-center gap-3">
+                                <div class="badge ${badgeClass} rounded-circle p-2" style="width:40px;height:40px;display:flex;align-items:center;justify-content:center;">
+                                    ${p.id}
+                                </div>
+                                <div>
+                                    <h6 class="mb-0">${p.full_name}</h6>
+                                    <small class="text-muted">QR: ${p.id_qr_code}</small>
+                                    <div class="mt-1">
+                                        <i class="fab fa-facebook text-primary"></i> 
+                                        <strong>${p.likes_number} Likes</strong>
+                                       <i class="fas fa-eye text-secondary"></i>
+                                        <strong>${p.views_number} Views</strong>
+                                        ${p.url ? '<a href="'+p.url+'" target="_blank" class="ms-2"><i class="fas fa-link"></i> Vidéo</a>' : '<span class="text-danger ms-2"><i class="fas fa-exclamation-circle"></i> Pas de lien</span>'}
+                                    </div>
+                                </div>
+                            </div>
+                            <div class="d-flex align-items-center gap-2">
+                                ${winBtn}
+                                <button class="btn btn-sm btn-outline-danger" onclick="removeParticipant(${competitionId}, ${p.id})">
+                                    <i class="fas fa-times"></i>
+                                </button>
+                            </div>
+                        </div>
+                    </div>
+                </div>`;
+            }).join('');
+        });
+}
+
+function addParticipant() {
+    const userId = document.getElementById('userSelect').value;
+    const compId = document.getElementById('currentCompetitionId').value;
+
+    if (!userId) return showAlert('Veuillez sélectionner un utilisateur', 'warning');
+
+    fetch(`/api/competitions/${compId}/participants`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ user_id: userId })
+    })
+    .then(res => res.json())
+    .then(result => {
+        if (result.success) {
+            loadParticipants(compId);
+            loadCompetitions(); // Refresh counts on main page
+        } else {
+            showAlert(result.message || 'Erreur lors de l\'ajout', 'danger');
+        }
+    });
+}
+
+function removeParticipant(compId, userId) {
+    if(!confirm('Retirer ce participant ?')) return;
+
+    fetch(`/api/competitions/${compId}/participants/${userId}`, { method: 'DELETE' })
+    .then(res => res.json())
+    .then(result => {
+        if(result.success) {
+            loadParticipants(compId);
+            loadCompetitions();
+        }
+    });
+}
+
+// likes refresh runs as a background job: poll its progress until it finishes
+const LIKES_JOB_POLL_MS = 1000;
+// only the latest poll loop keeps running (modal reopened, other competition)
+let likesPollToken = 0;
+const LIKES_BUTTON_TEXT = '<i class="fas fa-sync"></i> Actualiser les Likes';
+
+function likesButton() {
+    return document.querySelector('#participantsModal button[onclick="updateLikes()"]');
+}
+
+function setLikesBusy(progress) {
+    const btn = likesButton();
+    btn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Mise à jour...${progress || ''}`;
+    btn.disabled = true;
+}
+
+function resetLikesButton() {
+    const btn = likesButton();
+    btn.innerHTML = LIKES_BUTTON_TEXT;
+    btn.disabled = false;
+}
+
+function updateLikes() {
+    const compId = document.getElementById('currentCompetitionId').value;
+    const token = ++likesPollToken;
+    setLikesBusy();
+
+    fetch(`/api/competitions/${compId}/update_likes`, { method: 'POST' })
+        .then(res => res.json())
+        .then(data => {
+            if(!data.success) {
+                showAlert(data.error || 'Erreur lors de la mise à jour', 'danger');
+                resetLikesButton();
+                return;
+            }
+            if(data.coalesced) showAlert('Une mise à jour est déjà en cours, suivi de sa progression', 'info');
+            pollLikesJob(data.job.id, compId, token);
+        })
+        .catch(() => {
+            showAlert('Erreur lors de la mise à jour', 'danger');
+            resetLikesButton();
+        });
+}
+
+// reopening the modal picks up a refresh still running (page reloaded, other admin)
+function resumeLikesJob(compId) {
+    const token = ++likesPollToken;
+    resetLikesButton();
+    fetch(`/api/competitions/${compId}/update_likes`)
+        .then(res => res.json())
+        .then(data => {
+            const job = data.job;
+            if(token === likesPollToken && job && (job.status === 'queued' || job.status === 'running')) {
+                setLikesBusy();
+                pollLikesJob(job.id, compId, token);
+            }
+        });
+}
+
+// no heartbeat for this long: stop polling (the server fails lost jobs after LIKES_JOB_LOST_SECONDS)
+const LIKES_JOB_STALL_MS = 6 * 60 * 1000;
+
+function pollLikesJob(jobId, compId, token, beat = { at: null, seen: Date.now() }) {
+    if(token !== likesPollToken) return;
+
+    const stalled = () => {
+        if(Date.now() - beat.seen < LIKES_JOB_STALL_MS) return false;
+        resetLikesButton();
+        showAlert('La mise à jour ne progresse plus, vous pouvez la relancer', 'warning');
+        return true;
+    };
+    const retry = delay => setTimeout(() => pollLikesJob(jobId, compId, token, beat), delay);
+
+    fetch(`/api/likes_jobs/${jobId}`)
+        .then(res => res.json())
+        .then(job => {
+            if(token !== likesPollToken) return;
+            if(job.status === 'queued' || job.status === 'running') {
+                if(job.heartbeat_at !== beat.at) beat = { at: job.heartbeat_at, seen: Date.now() };
+                if(stalled()) return;
+                setLikesBusy(job.total ? ` ${job.done}/${job.total}` : '');
+                retry(LIKES_JOB_POLL_MS);
+                return;
+            }
+            resetLikesButton();
+            loadParticipants(compId);
+            if(job.status === 'failed') {
+                showAlert('Échec de la mise à jour des likes', 'danger');
+            } else if(job.errors) {
+                showAlert(`Likes mis à jour, ${job.errors} participant(s) gardent leurs dernières valeurs`, 'warning');
+            } else {
+                showAlert('Likes mis à jour avec succès', 'success');
+            }
+        })
+        .catch(() => {
+            if(token === likesPollToken && !stalled()) retry(LIKES_JOB_POLL_MS * 3);
+        });
+}
+
+function setWinner(compId, userId) {
+    if(!confirm('Confirmer ce participant comme gagnant ?')) return;
+
+    fetch(`/api/competitions/${compId}/winner`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ user_id: userId })
+    })
+    .then(res => res.json())
+    .then(result => {
+        if(result.success) {
+            loadParticipants(compId);
+            loadCompetitions();
+        }
+    });
+}
+
+// --- Helpers ---
+
+function formatDateForInput(dateStr) {
+    if (!dateStr) return '';
+    const date = new Date(dateStr);
+    // Format: YYYY-MM-DDThh:mm
+    return new Date(date.getTime() - (date.getTimezoneOffset() * 60000)).toISOString().slice(0, 16);
+}
+
+function showAlert(message, type = 'success') {
+    // Simple alert implementation, can be replaced with a toast
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert alert-${type} position-fixed top-0 end-0 m-3`;
+    alertDiv.style.zIndex = 9999;
+    alertDiv.innerHTML = message;
+    document.body.appendChild(alertDiv);
+    setTimeout(() => alertDiv.remove(), 3000);
+}
@@ -0,0 +1,124 @@
+// Background Sparkles
+function createSparkles(){
+  const bg=document.getElementById('bgAnimation');
+  for(let i=0;i<50;i++){
+    const sparkle=document.createElement('div');
+    sparkle.className='sparkle';
+    sparkle.style.left=Math.random()*100+'%';
+    sparkle.style.top=Math.random()*100+'%';
+    sparkle.style.animationDelay=Math.random()*3+'s';
+    bg.appendChild(sparkle);
+  }
+}
+
+// Floating Coins
+function createCoins(){
+  for(let i=0;i<8;i++){
+    const coin=document.createElement('div');
+    coin.className='coin';
+    coin.style.left=Math.random()*90+'%';
+    coin.style.animationDelay=Math.random()*6+'s';
+    coin.style.animationDuration=(6+Math.random()*4)+'s';
+    document.body.appendChild(coin);
+  }
+}
+
+// Trophy Icons
+function createTrophies(){
+  const trophies=['🏆','✨','✨','⭐'];
+  for(let i=0;i<6;i++){
+    const trophy=document.createElement('div');
+    trophy.className='trophy';
+    trophy.textContent=trophies[Math.floor(Math.random()*trophies.length)];
+    trophy.style.left=Math.random()*90+'%';
+    trophy.style.top=Math.random()*80+'%';
+    trophy.style.animationDelay=Math.random()*8+'s';
+    trophy.style.animationDuration=(8+Math.random()*4)+'s';
+    document.body.appendChild(trophy);
+  }
+}
+
+function updateCountdown(){
+  const drawDate=new Date(PAGE.endDate);
+  drawDate.setHours(0,0,0,0);
+  const options={weekday:'long',year:'numeric',month:'long',day:'numeric'};
+  document.getElementById('drawDateText').textContent=drawDate.toLocaleDateString('fr-FR',options);
+  function update(){
+    const now=new Date().getTime();
+    const distance=drawDate-now;
+    if(distance<0){
+      document.getElementById('days').textContent='00';
+      document.getElementById('hours').textContent='00';
+      document.getElementById('minutes').textContent='00';
+      document.getElementById('seconds').textContent='00';
+      return;
+    }
+    const days=Math.floor(distance/(1000*60*60*24));
+    const hours=Math.floor((distance%(1000*60*60*24))/(1000*60*60));
+    const minutes=Math.floor((distance%(1000*60*60))/(1000*60));
+    const seconds=Math.floor((distance%(1000*60))/1000);
+    document.getElementById('days').textContent=String(days).padStart(2,'0');
+    document.getElementById('hours').textContent=String(hours).padStart(2,'0');
+    document.getElementById('minutes').textContent=String(minutes).padStart(2,'0');
+    document.getElementById('seconds').textContent=String(seconds).padStart(2,'0');
+  }
+  update();
+  setInterval(update,1000);
+}
+
+let top10=PAGE.top10;
+
+function populateTop10(){
+  const tbody=document.querySelector("#top10Table tbody");
+  const medal=['🥇#','🥈#','🥉#'];
+  tbody.replaceChildren();
+  top10.forEach((item,idx)=>{
+    const tr=document.createElement('tr');
+    // live updates carry raw names: build cells as text, never as HTML
+    [`${medal[idx]||''} ${item.rank}`,item.name,item.likes,item.views].forEach(value=>{
+      const td=document.createElement('td');
+      td.textContent=value;
+      tr.appendChild(td);
+    });
+    const td=document.createElement('td');
+    const a=document.createElement('a');
+    a.href=item.url;
+    a.target='_blank';
+    a.textContent='Voir';
+    td.appendChild(a);
+    tr.appendChild(td);
+    tbody.appendChild(tr);
+  });
+}
+
+// ✅ live leaderboard: the server pushes the changed rows after each likes refresh
+const ME=PAGE.userId;
+function applyStandings(data,replace){
+  const rows=new Map(replace?[]:top10.map(item=>[item.user_id,item]));
+  data.removed.forEach(id=>rows.delete(id));
+  data.upserts.forEach(item=>rows.set(item.user_id,item));
+  top10=[...rows.values()].sort((a,b)=>a.rank-b.rank||a.user_id-b.user_id).slice(0,10);
+  populateTop10();
+  document.getElementById('participantsCount').textContent=data.participants_count;
+  const me=data.upserts.find(item=>item.user_id===ME);
+  if(me){
+    document.getElementById('myRank').textContent=`#${me.rank}`;
+    document.getElementById('myLikes').textContent=me.likes;
+  }
+}
+
+function listenLeaderboard(){
+  if(!window.EventSource) return;
+  const source=new EventSource(PAGE.liveUrl);
+  source.addEventListener('snapshot',e=>applyStandings(JSON.parse(e.data),true));
+  source.addEventListener('delta',e=>applyStandings(JSON.parse(e.data),false));
+}
+
+window.addEventListener('load',()=>{
+  createSparkles();
+  createCoins();
+  createTrophies();
+  updateCountdown();
+  populateTop10();
+  listenLeaderboard();
+});
@@ -0,0 +1,66 @@
+// winner status rendered by the template (window.PAGE)
+const isWinner = Boolean(PAGE.isWinner);
+
+window.onload = function() {
+    if (isWinner) {
+        triggerGoldConfetti();
+    }
+};
+
+function triggerGoldConfetti() {
+    const canvas = document.getElementById('confetti-canvas');
+    const ctx = canvas.getContext('2d');
+    canvas.width = window.innerWidth;
+    canvas.height = window.innerHeight;
+
+    const particles = [];
+    const particleCount = 150;
+
+    // Create Gold & Cream particles
+    for (let i = 0; i < particleCount; i++) {
+        particles.push({
+            x: Math.random() * canvas.width,
+            y: Math.random() * canvas.height - canvas.height,
+            w: Math.random() * 5 + 2,
+            h: Math.random() * 10 + 5,
+            speed: Math.random() * 3 + 2,
+            color: Math.random() > 0.5 ? '#d4af37' : '#f0e5d8', // Gold or Cream
+            angle: Math.random() * 360,
+            spin: Math.random() < 0.5 ? 1 : -1
+        });
+    }
+
+    function draw() {
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+
+        particles.forEach((p) => {
+            ctx.save();
+            ctx.translate(p.x + p.w / 2, p.y + p.h / 2);
+            ctx.rotate(p.angle * Math.PI / 180);
+            ctx.fillStyle = p.color;
+            ctx.fillRect(-p.w / 2, -p.h / 2, p.w, p.h);
+            ctx.restore();
+
+            p.y += p.speed;
+            p.angle += p.spin;
+
+            if (p.y > canvas.height) {
+                p.y = -10;
+                p.x = Math.random() * canvas.width;
+            }
+        });
+
+        requestAnimationFrame(draw);
+    }
+
+    draw();
+}
+
+// Resize canvas on window resize
+window.addEventListener('resize', () => {
+    const canvas = document.getElementById('confetti-canvas');
+    if(canvas) {
+        canvas.width = window.innerWidth;
+        canvas.height = window.innerHeight;
+    }
+});
@@ -0,0 +1,23 @@
+// Parallax effect on mouse move
+document.addEventListener('mousemove', (e) => {
+    const elements = document.querySelectorAll('.floating-element');
+    const mouseX = e.clientX / window.innerWidth;
+    const mouseY = e.clientY / window.innerHeight;
+
+    elements.forEach((el, index) => {
+        const speed = (index + 1) * 25;
+        const x = (mouseX - 0.5) * speed;
+        const y = (mouseY - 0.5) * speed;
+        el.style.transform = `translate(${x}px, ${y}px)`;
+    });
+});
+
+// Smooth rotation effect on decorative symbol
+let rotation = 0;
+setInterval(() => {
+    rotation += 0.2;
+    const decorative = document.querySelector('.decorative-text');
+    if (decorative) {
+        decorative.style.transform = `rotate(${rotation}deg)`;
+    }
+}, 50);
@@ -0,0 +1,39 @@
+document.getElementById('saveBtn').addEventListener('click', async function() {
+    const btn = this;
+    const originalText = btn.innerHTML;
+
+    const data = {
+        slow_music: document.getElementById('slowDanceMusic').value.trim(),
+        in_music: document.getElementById('coupleInMusic').value.trim(),
+        special_music: document.getElementById('otherMusic').value.trim(),
+        note: document.getElementById('generalNotes').value.trim()
+    };
+
+    btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Enregistrement...';
+    btn.disabled = true;
+
+    try {
+        const response = await fetch(PAGE.updateUrl, {
+            method: 'POST',
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(data)
+        });
+
+        const result = await response.json();
+        if (result.status === 'success') {
+            btn.classList.add('success');
+            btn.innerHTML = '<i class="fas fa-check-circle"></i> Enregistré avec Succès!';
+        } else {
+            btn.innerHTML = '<i class="fas fa-times-circle"></i> Échec de l\'Enregistrement!';
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        btn.innerHTML = '<i class="fas fa-times-circle"></i> Erreur Réseau!';
+    }
+
+    setTimeout(() => {
+        btn.classList.remove('success');
+        btn.innerHTML = originalText;
+        btn.disabled = false;
+    }, 2000);
+});
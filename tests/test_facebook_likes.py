@@ -0,0 +1,103 @@
+import pytest
+from benchmarks.graph_stub import GraphStub, video_payload
+from services import facebook_likes
+from services.facebook_likes import (
+    GRAPH_MAX_IDS_PER_REQUEST, TransientError, chunk_video_ids, get_video_stats_batch, parse_video_insights
+)
+
+BAD_IDS = {"100000000007", "100000000063"}
+
+
+def video_url(video_id):
+    return f"https://www.facebook.com/reel/{video_id}"
+
+
+def expected(video_id):
+    return parse_video_insights(video_payload(video_id))
+
+
+def start_stub(monkeypatch, **kwargs):
+    server = GraphStub(latency_s=0, **kwargs).start()
+    monkeypatch.setattr(facebook_likes, "GRAPH_API_URL", server.url)
+    return server
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = start_stub(monkeypatch, bad_ids=BAD_IDS)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def silent_stub(monkeypatch):
+    # rejects the batch without saying which ID is bad
+    server = start_stub(monkeypatch, bad_ids=BAD_IDS, name_bad_ids=False)
+    yield server
+    server.stop()
+
+
+def test_chunks_hold_50_unique_ids():
+    video_ids = [str(100000001000 + i) for i in range(120)]
+    urls = [video_url(v) for v in video_ids] + [video_url(video_ids[0]), "https://www.facebook.com/not-a-video"]
+
+    chunks = chunk_video_ids(urls)
+
+    assert [len(c) for c in chunks] == [GRAPH_MAX_IDS_PER_REQUEST, GRAPH_MAX_IDS_PER_REQUEST, 20]
+    assert [v for c in chunks for v in c] == video_ids
+
+
+def test_batch_is_one_request(stub):
+    video_ids = [str(100000001000 + i) for i in range(GRAPH_MAX_IDS_PER_REQUEST)]
+
+    stats, errors, requests_made = get_video_stats_batch(video_ids, "token")
+
+    assert errors == {}
+    assert stats == {v: expected(v) for v in video_ids}
+    assert requests_made == 1
+    assert stub.ids_per_request == [len(video_ids)]
+
+
+def test_named_bad_ids_are_dropped_and_the_rest_retried(stub):
+    video_ids = [str(100000000000 + i) for i in range(70)]
+
+    stats, errors, requests_made = get_video_stats_batch(video_ids, "token")
+
+    # one rejection per bad ID, then the batch goes through
+    assert requests_made == 3
+    assert stub.ids_per_request == [70, 69, 68]
+    assert set(errors) == BAD_IDS
+    assert "does not exist" in errors["100000000007"]
+    assert stats == {v: expected(v) for v in video_ids if v not in BAD_IDS}
+
+
+def test_unnamed_bad_id_is_isolated_by_halving(silent_stub):
+    video_ids = [str(100000000000 + i) for i in range(GRAPH_MAX_IDS_PER_REQUEST)]
+
+    stats, errors, requests_made = get_video_stats_batch(video_ids, "token")
+
+    # 50 -> 25 -> 13 -> 7 -> 4 -> 2 -> 1: two requests per level, far from one per ID
+    assert requests_made <= 1 + 2 * 6
+    assert max(silent_stub.ids_per_request[1:]) < len(video_ids)
+    assert set(errors) == {"100000000007"}
+    assert stats == {v: expected(v) for v in video_ids if v != "100000000007"}
+
+
+def test_single_bad_id_is_not_split(stub):
+    stats, errors, requests_made = get_video_stats_batch(["100000000063"], "token")
+
+    assert stats == {}
+    assert set(errors) == {"100000000063"}
+    assert requests_made == 1
+
+
+def test_refused_requests_leave_the_rest_transient(stub):
+    video_ids = [str(100000000000 + i) for i in range(70)]
+    allowed = iter([True, True, False])
+
+    stats, errors, requests_made = get_video_stats_batch(video_ids, "token", allow_request=lambda: next(allowed))
+
+    assert requests_made == 2
+    assert stats == {}
+    assert set(errors) == set(video_ids)
+    assert all(isinstance(errors[v], TransientError) for v in set(video_ids) - BAD_IDS)
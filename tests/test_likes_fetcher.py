@@ -0,0 +1,85 @@
+import math
+import pytest
+from benchmarks.graph_stub import GraphStub, video_payload
+from conftest import requires_database
+from services import facebook_likes
+from services.facebook_likes import GRAPH_MAX_IDS_PER_REQUEST, parse_video_insights
+
+pytestmark = requires_database
+
+BAD_VIDEO_ID = "10000005"  # benchmarks.seed: user 5, a participant of the running competition
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = GraphStub(latency_s=0, bad_ids={BAD_VIDEO_ID}).start()
+    monkeypatch.setattr(facebook_likes, "GRAPH_API_URL", server.url)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def participants(app):
+    from benchmarks.seed import seed
+    from extensions import db
+    from models import Competition
+    with app.app_context():
+        seed(1000)
+        yield db.session.get(Competition, 1).users
+        db.session.rollback()
+        db.session.remove()
+
+
+def test_refresh_batches_and_isolates_a_bad_video(app, stub, participants):
+    from services.likes_fetcher import refresh_users_likes
+
+    summary = refresh_users_likes(app, participants)
+
+    batches = math.ceil(len(participants) / GRAPH_MAX_IDS_PER_REQUEST)
+    assert summary["requests"] == stub.requests == batches + 1
+    assert summary["errors"] == 1
+    for user in participants:
+        video_id = facebook_likes.extract_video_id(user.url)
+        if video_id == BAD_VIDEO_ID:
+            assert user.likes_failures == 1
+        else:
+            assert (user.likes_number, user.views_number) == parse_video_insights(video_payload(video_id))
+
+
+def test_refresh_stops_at_its_request_limit(app, stub, participants):
+    from services.likes_fetcher import refresh_users_likes
+
+    batches = math.ceil(len(participants) / GRAPH_MAX_IDS_PER_REQUEST)
+    summary = refresh_users_likes(app, participants, max_workers=1, max_requests=batches)
+
+    # one worker, chunks in order: the retry of the rejected first chunk takes the last chunk's request
+    last_chunk = len(participants) - (batches - 1) * GRAPH_MAX_IDS_PER_REQUEST
+    assert summary["requests"] == stub.requests == batches
+    assert summary["errors"] == 1 + last_chunk
+    # left over, not failed: they stay due and are not backed off
+    left_over = [
+        u for u in participants
+        if u.likes_refreshed_at is None and facebook_likes.extract_video_id(u.url) != BAD_VIDEO_ID
+    ]
+    assert len(left_over) == last_chunk
+    assert not any(u.likes_failures for u in left_over)
+
+
+def test_refresh_bumps_standings_not_users(app, stub, participants):
+    from extensions import db
+    from services import data_versions
+    from services.leaderboard import rebuild_leaderboard
+    from services.likes_fetcher import refresh_users_likes
+    from services.ranking import apply_ranks
+    db.session.commit()
+    before = data_versions.current("users", "standings")
+
+    refresh_users_likes(app, participants)
+    rebuild_leaderboard(1)
+    db.session.commit()
+    after = data_versions.current("users", "standings")
+
+    assert after["users"] == before["users"]  # /api/users shows no likes or rank
+    assert after["standings"] > before["standings"]
+    # ranks already written: a second pass touches no row
+    assert apply_ranks(1) == 0
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+import pytest
+from conftest import requires_database
+
+pytestmark = requires_database
+
+RUNNING_COMPETITION_ID = 1  # benchmarks.seed creates it first
+
+
+@contextmanager
+def assert_max_queries(limit, engine):
+    """Fail when the block runs more than `limit` statements (catches N+1 regressions)."""
+    from services.query_counter import count_queries
+    with count_queries(engine) as statements:
+        yield statements
+    if len(statements) > limit:
+        listing = "\n".join(f"  {i}. {s}" for i, s in enumerate(statements, start=1))
+        raise AssertionError(f"Expected at most {limit} queries, got {len(statements)}:\n{listing}")
+
+
+def seeded(app, users):
+    from benchmarks.seed import seed
+    from extensions import db
+    with app.app_context():
+        seed(users)
+        participants = db.session.execute(db.text(
+            "SELECT count(*) FROM user_competition WHERE competition_id = :id"
+        ), {"id": RUNNING_COMPETITION_ID}).scalar()
+        db.session.remove()
+    return participants
+
+
+def statements_for(app, client, url, limit):
+    from extensions import db
+    with app.app_context():
+        engine = db.engine
+    client.get(url)  # warm up: token, metrics and the like are loaded once per worker
+    with assert_max_queries(limit, engine) as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize("url, limit", [
+    ("/api/competitions", 3),
+    (f"/api/competitions/{RUNNING_COMPETITION_ID}", 3),
+    (f"/api/competitions/{RUNNING_COMPETITION_ID}/participants", 3),
+])
+def test_queries_do_not_grow_with_rows(app, client, url, limit):
+    small = seeded(app, 100)
+    queries_small = statements_for(app, client, url, limit)
+
+    large = seeded(app, 1000)
+    assert large > small
+    queries_large = statements_for(app, client, url, limit)
+
+    assert queries_large == queries_small